@@ -3,19 +3,35 @@
 Network Security Examples
 ------------------------
 This script demonstrates network security concepts in Python:
-1. Simple port scanner
-2. Basic packet sniffing with scapy
-3. TLS/SSL verification
-4. Basic firewall rule creation (demo only)
+1. Port scanner (serial, concurrent asyncio engine, multi-target scheduler,
+   banner grabbing)
+2. Packet sniffing with scapy, and raw-socket flow capture
+3. TLS/SSL verification and bulk certificate inventory
+4. Firewall rule creation (demo only) and iptables/nftables ruleset analysis
 """
 
+import re
+import csv
+import shlex
+import bisect
+import json
+import heapq
+import struct
+import ctypes
+import mmap
 import socket
 import ssl
+import time
+import errno
+import asyncio
+import itertools
 import ipaddress
 import subprocess
 import platform
-from datetime import datetime
+from datetime import datetime, timezone
 from scapy.all import sniff, IP, TCP
+from cryptography import x509
+from cryptography.x509.oid import NameOID
 
 # ---- 1. Port Scanner ----
 
@@ -26,6 +42,7 @@ class PortScanner:
         """Initialize with target host (IP or domain)"""
         self.target_host = target_host
         self.open_ports = []
+        self.services = {}
         
         # Try to resolve hostname to IP if a domain is provided
         try:
@@ -54,62 +71,1276 @@ class PortScanner:
         except Exception:
             return False
     
-    def scan_port_range(self, start_port, end_port, timeout=1):
-        """Scan a range of ports and store open ones"""
+    def scan_port_range(self, start_port, end_port, timeout=1, concurrency=500,
+                        rate=None, adaptive=True, grab_banners=False, grabber=None):
+        """
+        Scan a range of ports concurrently and store open ones
+        
+        Args:
+            timeout (float): Initial (and maximum) connect timeout in seconds
+            concurrency (int): Maximum connection attempts in flight
+            rate (float): Maximum connection attempts per second (None = unlimited)
+            adaptive (bool): Shrink the timeout to the measured RTT
+            grab_banners (bool): Fingerprint the open ports afterwards
+            grabber (BannerGrabber): Grabber (and fingerprint cache) to use
+        """
         print(f"Scanning ports {start_port}-{end_port} on {self.target_host}...")
         start_time = datetime.now()
         
         self.open_ports = []
+        if self.target_ip is None:
+            return self.open_ports
         
-        for port in range(start_port, end_port + 1):
-            if self.scan_port(port, timeout):
-                self.open_ports.append(port)
+        def report(port, state, rtt):
+            # Results stream in as soon as each connection attempt finishes
+            if state == 'open':
                 service = self._get_common_service(port)
                 print(f"Port {port} is open - {service}")
         
+        engine = AsyncPortScanner(concurrency=concurrency, rate=rate,
+                                  timeout=timeout, adaptive=adaptive)
+        self.open_ports = engine.scan_ports(self.target_ip, range(start_port, end_port + 1),
+                                            on_result=report)
+        
         end_time = datetime.now()
         duration = end_time - start_time
         
         print(f"Scan completed in {duration.total_seconds():.2f} seconds")
         print(f"Found {len(self.open_ports)} open ports")
         
+        if grab_banners and self.open_ports:
+            self.fingerprint_services(grabber=grabber)
+        
         return self.open_ports
     
     def _get_common_service(self, port):
         """Return common service name for well-known ports"""
-        common_ports = {
-            20: "FTP (Data)",
-            21: "FTP (Control)",
-            22: "SSH",
-            23: "Telnet",
-            25: "SMTP",
-            53: "DNS",
-            80: "HTTP",
-            110: "POP3",
-            143: "IMAP",
-            443: "HTTPS",
-            465: "SMTPS",
-            587: "SMTP (Submission)",
-            993: "IMAPS",
-            995: "POP3S",
-            3306: "MySQL",
-            3389: "RDP",
-            5432: "PostgreSQL",
-            8080: "HTTP (Alt)",
-            8443: "HTTPS (Alt)"
+        return SERVICE_NAMES.get(port, "Unknown")
+    
+    def fingerprint_services(self, ports=None, grabber=None):
+        """
+        Grab banners from open ports and identify the services behind them
+        
+        Args:
+            ports (list): Ports to fingerprint (default: open ports of the last scan)
+            grabber (BannerGrabber): Grabber to use, e.g. one with a persistent cache
+        
+        Returns:
+            dict: {port: fingerprint}
+        """
+        if self.target_ip is None:
+            return {}
+        grabber = grabber or BannerGrabber()
+        hostname = None if self.target_host == self.target_ip else self.target_host
+        self.services = grabber.grab_ports(self.target_ip, self.open_ports if ports is None else ports,
+                                           hostname)
+        for port, fingerprint in sorted(self.services.items()):
+            banner = f" - {fingerprint['banner']}" if fingerprint.get('banner') else ""
+            print(f"Port {port}: {describe_fingerprint(fingerprint)}{banner}")
+        return self.services
+
+
+class RTTEstimator:
+    """
+    Adaptive connect timeout from measured round-trip times.
+    
+    RFC 6298 smoothing (as used by nmap): timeout = srtt + 4 * rttvar,
+    clamped to [min_timeout, max_timeout]. Until the first answer the
+    initial timeout is used.
+    """
+    
+    def __init__(self, initial_timeout=1.0, min_timeout=0.05, max_timeout=None):
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout or initial_timeout
+        self.srtt = None
+        self.rttvar = None
+    
+    def update(self, rtt):
+        """Feed one measured round-trip time"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+    
+    def timeout(self):
+        """Current timeout in seconds"""
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+
+class RateLimiter:
+    """Token bucket limiting how many connection attempts start per second"""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate / 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a token is available"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncPortScanner:
+    """
+    Concurrent TCP connect scanner: non-blocking connect_ex() driven by the
+    asyncio event loop (writability = connect finished).
+    
+    Each port ends up 'open' (connected), 'closed' (RST) or 'filtered'
+    (no answer within the timeout, after retries). Open and closed answers
+    both feed the RTT estimator, so on a filtered host the timeout quickly
+    shrinks from the initial value to a few times the measured RTT.
+    """
+    
+    def __init__(self, concurrency=500, rate=None, timeout=1.0, adaptive=True, retries=1):
+        """
+        Initialize engine
+        
+        Args:
+            concurrency (int): Maximum connection attempts in flight
+            rate (float): Maximum connection attempts per second per host (None = unlimited)
+            timeout (float): Initial and maximum connect timeout in seconds
+            adaptive (bool): Adapt the timeout to measured RTTs
+            retries (int): Extra attempts for ports that timed out
+        """
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.retries = retries
+        self.estimator = RTTEstimator(initial_timeout=timeout)
+    
+    async def probe(self, ip, port, timeout):
+        """Try one non-blocking TCP connect; return (state, rtt)"""
+        loop = asyncio.get_running_loop()
+        family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        start = time.monotonic()
+        try:
+            err = sock.connect_ex((ip, port))
+            if err in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                # Wait for writability (connect finished) or the timer, whichever is first
+                done = loop.create_future()
+                
+                def finish(writable):
+                    if not done.done():
+                        done.set_result(writable)
+                
+                loop.add_writer(sock.fileno(), finish, True)
+                timer = loop.call_later(timeout, finish, False)
+                try:
+                    writable = await done
+                finally:
+                    timer.cancel()
+                    loop.remove_writer(sock.fileno())
+                if not writable:
+                    return 'filtered', None
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            
+            if err == 0:
+                return 'open', time.monotonic() - start
+            if err == errno.ECONNREFUSED:
+                return 'closed', time.monotonic() - start
+            return 'filtered', None
+        finally:
+            sock.close()
+    
+    async def scan(self, ip, ports):
+        """Async generator yielding (port, state, rtt) in completion order"""
+        ports = iter(ports)
+        results = asyncio.Queue()
+        limiter = RateLimiter(self.rate) if self.rate else None
+        
+        async def worker():
+            for port in ports:
+                for attempt in range(self.retries + 1):
+                    if limiter:
+                        await limiter.acquire()
+                    timeout = self.estimator.timeout() if self.adaptive else self.timeout
+                    state, rtt = await self.probe(ip, port, timeout)
+                    if rtt is not None:
+                        self.estimator.update(rtt)
+                    if state != 'filtered':
+                        break
+                await results.put((port, state, rtt))
+        
+        async def run_workers():
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                await results.put(None)  # End-of-scan marker
+        
+        runner = asyncio.ensure_future(run_workers())
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                yield item
+            runner.result()  # Re-raise worker errors
+        finally:
+            runner.cancel()
+    
+    def scan_ports(self, ip, ports, on_result=None):
+        """Scan synchronously; on_result(port, state, rtt) sees every result as it arrives"""
+        async def run():
+            open_ports = []
+            async for port, state, rtt in self.scan(ip, ports):
+                if on_result:
+                    on_result(port, state, rtt)
+                if state == 'open':
+                    open_ports.append(port)
+            return sorted(open_ports)
+        
+        return asyncio.run(run())
+
+
+# Most frequently open TCP ports (after nmap-services), most common first
+TOP_PORTS = [
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080,
+    1723, 111, 995, 993, 5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81,
+    6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554, 26, 1433,
+    49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153,
+    8081, 2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357,
+    427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028,
+    873, 1755, 2717, 4899, 9100, 119, 37
+]
+
+
+def parse_port_spec(spec):
+    """
+    Parse a port specification into an ordered list without duplicates
+    
+    Examples: "22,80,443", "1-1024", "top100", "top20,8000-8100"
+    """
+    ports = []
+    for part in str(spec).split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part.startswith('top'):
+            ports.extend(TOP_PORTS[:int(part[3:].lstrip(':-') or len(TOP_PORTS))])
+        elif '-' in part:
+            low, high = (int(p) for p in part.split('-', 1))
+            ports.extend(range(low, high + 1))
+        else:
+            ports.append(int(part))
+    
+    seen = set()
+    ordered = []
+    for port in ports:
+        if not 1 <= port <= 65535:
+            raise ValueError(f"Invalid port: {port}")
+        if port not in seen:
+            seen.add(port)
+            ordered.append(port)
+    return ordered
+
+
+def expand_targets(targets):
+    """Lazily expand hostnames, IPs and CIDR blocks into individual targets"""
+    for target in targets:
+        target = target.strip()
+        if not target:
+            continue
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            yield target  # Hostname, resolved later
+            continue
+        if network.num_addresses == 1:
+            yield str(network.network_address)
+        else:
+            for ip in network.hosts():
+                yield str(ip)
+
+
+class DNSCache:
+    """Concurrent hostname resolution with a TTL cache"""
+    
+    def __init__(self, ttl=300, concurrency=50):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.cache = {}
+    
+    async def resolve(self, host, semaphore=None):
+        """
+        Return the first address for host, or None if it can't be resolved
+        
+        Args:
+            semaphore (asyncio.Semaphore): Bounds lookups in flight (None = unbounded)
+        """
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+        
+        cached = self.cache.get(host)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        
+        if semaphore is None:
+            ip = await self._lookup(host)
+        else:
+            async with semaphore:
+                ip = await self._lookup(host)
+        self.cache[host] = (ip, time.monotonic() + self.ttl)
+        return ip
+    
+    async def _lookup(self, host):
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            return infos[0][4][0]
+        except (socket.gaierror, OSError, IndexError):
+            return None
+    
+    async def resolve_all(self, hosts):
+        """Resolve many names at once; returns {host: ip or None}"""
+        # One semaphore per call: each scan may run under its own event loop
+        semaphore = asyncio.Semaphore(self.concurrency)
+        ips = await asyncio.gather(*(self.resolve(host, semaphore) for host in hosts))
+        return dict(zip(hosts, ips))
+
+
+class ScanScheduler:
+    """
+    Scan many hosts and ports while spreading load across targets.
+    
+    Targets are taken in groups; inside a group probes are interleaved
+    port-major (port 1 on every host, then port 2 on every host, ...), so
+    consecutive probes hit different hosts. Global limits (concurrency,
+    rate) bound total throughput; per-host limits (host_concurrency,
+    host_rate) keep any single target from being hammered. Each host gets
+    its own adaptive timeout.
+    """
+    
+    def __init__(self, concurrency=500, rate=None, host_concurrency=10, host_rate=None,
+                 timeout=1.0, retries=1, group_size=256, dns_cache=None):
+        """
+        Initialize scheduler
+        
+        Args:
+            concurrency (int): Connection attempts in flight across all hosts
+            rate (float): Connection attempts per second across all hosts
+            host_concurrency (int): Connection attempts in flight per host
+            host_rate (float): Connection attempts per second per host
+            timeout (float): Initial and maximum connect timeout
+            retries (int): Extra attempts for ports that timed out
+            group_size (int): Hosts scanned together (bounds memory)
+            dns_cache (DNSCache): Shared resolver cache
+        """
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.host_concurrency = max(1, host_concurrency)
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.retries = retries
+        self.group_size = max(1, group_size)
+        self.dns_cache = dns_cache or DNSCache()
+        self.engine = AsyncPortScanner(timeout=timeout, retries=retries)
+    
+    def scan(self, targets, ports, on_result=None):
+        """
+        Scan targets (hostnames, IPs, CIDRs) on ports (list or spec string)
+        
+        Args:
+            on_result (callable): Called with (target, ip, port, state, rtt)
+        
+        Returns:
+            dict: {target: sorted list of open ports}
+        """
+        if isinstance(ports, str):
+            ports = parse_port_spec(ports)
+        return asyncio.run(self._scan(expand_targets(targets), list(ports), on_result))
+    
+    async def _scan(self, targets, ports, on_result):
+        open_ports = {}
+        global_limiter = RateLimiter(self.rate) if self.rate else None
+        
+        while True:
+            group = list(itertools.islice(targets, self.group_size))
+            if not group:
+                break
+            
+            resolved = await self.dns_cache.resolve_all(group)
+            hosts = {}
+            for target in group:
+                ip = resolved.get(target)
+                if ip is None:
+                    print(f"Could not resolve hostname: {target}")
+                    continue
+                hosts[target] = {
+                    'ip': ip,
+                    'semaphore': asyncio.Semaphore(self.host_concurrency),
+                    'limiter': RateLimiter(self.host_rate) if self.host_rate else None,
+                    'estimator': RTTEstimator(initial_timeout=self.timeout),
+                }
+                open_ports.setdefault(target, [])
+            
+            # Port-major order interleaves probes across the hosts of the group
+            probes = ((target, port) for port in ports for target in hosts)
+            
+            async def worker():
+                for target, port in probes:
+                    host = hosts[target]
+                    async with host['semaphore']:
+                        for _ in range(self.retries + 1):
+                            if global_limiter:
+                                await global_limiter.acquire()
+                            if host['limiter']:
+                                await host['limiter'].acquire()
+                            state, rtt = await self.engine.probe(
+                                host['ip'], port, host['estimator'].timeout())
+                            if rtt is not None:
+                                host['estimator'].update(rtt)
+                            if state != 'filtered':
+                                break
+                    if state == 'open':
+                        open_ports[target].append(port)
+                    if on_result:
+                        on_result(target, host['ip'], port, state, rtt)
+            
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        
+        return {target: sorted(found) for target, found in open_ports.items()}
+
+
+# Fallback names when a service can't be fingerprinted
+SERVICE_NAMES = {
+    20: "FTP (Data)",
+    21: "FTP (Control)",
+    22: "SSH",
+    23: "Telnet",
+    25: "SMTP",
+    53: "DNS",
+    80: "HTTP",
+    110: "POP3",
+    143: "IMAP",
+    443: "HTTPS",
+    465: "SMTPS",
+    587: "SMTP (Submission)",
+    993: "IMAPS",
+    995: "POP3S",
+    3306: "MySQL",
+    3389: "RDP",
+    5432: "PostgreSQL",
+    8080: "HTTP (Alt)",
+    8443: "HTTPS (Alt)"
+}
+
+# Ports where the client has to speak first; everything else gets a
+# passive read first, since SSH/SMTP/FTP/POP3/IMAP servers greet on connect
+HTTP_PORTS = {80, 81, 3000, 5000, 8000, 8008, 8080, 8081, 8888}
+TLS_PORTS = {443, 465, 636, 853, 990, 993, 995, 8443}
+
+HTTP_PROBE = b"HEAD / HTTP/1.0\r\nUser-Agent: PortScanner\r\n\r\n"
+
+# Compiled signature table: (service, detect, details). `detect` decides the
+# protocol; the optional `details` pattern pulls product/version out of it
+SERVICE_SIGNATURES = [
+    ('ssh', re.compile(rb'^SSH-\d+\.\d+-'),
+     re.compile(rb'^SSH-\d+\.\d+-(?P<product>[^_\s-]+)(?:[_-](?P<version>[^\s]+))?')),
+    ('http', re.compile(rb'^HTTP/\d(?:\.\d)? \d{3}'),
+     re.compile(rb'(?im)^server:[ \t]*(?P<product>[^/\r\n ]+)(?:/(?P<version>[^\s]+))?')),
+    ('smtp', re.compile(rb'(?i)^220[ -][^\r\n]*\bE?SMTP\b'),
+     re.compile(rb'(?i)^220[ -]\S+ E?SMTP[ \t]+(?P<product>[A-Za-z][\w.-]*)')),
+    ('ftp', re.compile(rb'(?i)^220[ -][^\r\n]*ftp'),
+     re.compile(rb'(?i)(?P<product>vsftpd|proftpd|pure-ftpd|filezilla server)[ \t]*(?P<version>\d[\w.]*)?')),
+    ('pop3', re.compile(rb'^\+OK'), None),
+    ('imap', re.compile(rb'^\* OK'), None),
+    ('mysql', re.compile(rb'(?s)^.{3}\x00\x0a\d+\.\d+'),
+     re.compile(rb'(?s)^.{3}\x00\x0a(?P<version>\d[\w.-]*)\x00')),
+]
+
+
+def match_banner(data):
+    """
+    Match a service response against SERVICE_SIGNATURES
+    
+    Returns:
+        dict: {'service', 'product', 'version'} or None if nothing matched
+    """
+    for service, detect, details in SERVICE_SIGNATURES:
+        if not detect.search(data):
+            continue
+        match = details.search(data) if details else None
+        fields = match.groupdict() if match else {}
+        product = fields.get('product')
+        version = fields.get('version')
+        if service == 'mysql' and version:
+            product = b'MySQL'
+        return {
+            'service': service,
+            'product': product.decode('ascii', 'replace') if product else None,
+            'version': version.decode('ascii', 'replace') if version else None,
         }
+    return None
+
+
+class FingerprintCache:
+    """
+    Service fingerprints per (ip, port) with a TTL.
+    
+    Within the TTL a service is assumed unchanged and is not probed again.
+    With a path the cache is persisted as JSON, so it also survives across
+    scanner runs.
+    """
+    
+    def __init__(self, ttl=3600, path=None):
+        self.ttl = ttl
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+    
+    def get(self, ip, port):
+        """Return the cached fingerprint, or None if missing or expired"""
+        entry = self.entries.get((ip, port))
+        if entry and entry[1] > time.time():
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+    
+    def put(self, ip, port, fingerprint):
+        self.entries[(ip, port)] = (fingerprint, time.time() + self.ttl)
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for item in saved:
+            if item['expires'] > now:
+                self.entries[(item['ip'], item['port'])] = (item['fingerprint'], item['expires'])
+    
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        saved = [{'ip': ip, 'port': port, 'fingerprint': fingerprint, 'expires': expires}
+                 for (ip, port), (fingerprint, expires) in self.entries.items() if expires > now]
+        with open(self.path, 'w') as f:
+            json.dump(saved, f)
+
+
+class BannerGrabber:
+    """
+    Identify services on open ports from what they say.
+    
+    Probe order per port: a TLS handshake on TLS ports (then HTTP inside the
+    tunnel), an HTTP request on HTTP ports, and otherwise a passive read for
+    server-first greetings (SSH, SMTP, FTP, ...) followed by an HTTP request
+    and finally TLS if the service stayed silent.
+    """
+    
+    def __init__(self, timeout=2.0, read_timeout=1.0, concurrency=50, cache=None,
+                 max_banner=4096):
+        """
+        Initialize grabber
+        
+        Args:
+            timeout (float): Connect and TLS handshake timeout
+            read_timeout (float): How long to wait for a response
+            concurrency (int): Ports probed at the same time
+            cache (FingerprintCache): Fingerprints reused across scans
+            max_banner (int): Bytes read from each response
+        """
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.concurrency = max(1, concurrency)
+        self.cache = cache if cache is not None else FingerprintCache()
+        self.max_banner = max_banner
+        self.probes_sent = 0
+        
+        # One context for every handshake; we only want to talk, not verify
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+    
+    async def _exchange(self, ip, port, payload=None, use_tls=False, hostname=None):
+        """Connect, optionally send payload, and return (response bytes, ssl object)"""
+        self.probes_sent += 1
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port, ssl=self.ssl_context if use_tls else None,
+                                        server_hostname=hostname if use_tls else None),
+                self.timeout)
+        except (OSError, ssl.SSLError, asyncio.TimeoutError):
+            return None, None
+        
+        data = b''
+        ssl_object = writer.get_extra_info('ssl_object')
+        try:
+            if payload:
+                writer.write(payload)
+                await writer.drain()
+            data = await asyncio.wait_for(reader.read(self.max_banner), self.read_timeout)
+        except (OSError, ssl.SSLError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+        return data, ssl_object
+    
+    async def _probe_tls(self, ip, port, hostname):
+        data, ssl_object = await self._exchange(ip, port, HTTP_PROBE, use_tls=True,
+                                                hostname=hostname)
+        if ssl_object is None:
+            return None
+        fingerprint = match_banner(data) if data else None
+        if fingerprint is None:
+            fingerprint = {'service': 'tls', 'product': None, 'version': None}
+        elif fingerprint['service'] == 'http':
+            fingerprint['service'] = 'https'
+        fingerprint['tls'] = {'version': ssl_object.version(), 'cipher': ssl_object.cipher()[0]}
+        fingerprint['banner'] = self._banner_text(data)
+        return fingerprint
+    
+    def _banner_text(self, data):
+        """First line of the response, for display"""
+        if not data:
+            return ''
+        return data.split(b'\n', 1)[0].strip().decode('ascii', 'replace')[:200]
+    
+    async def grab(self, ip, port, hostname=None):
+        """Fingerprint one open port (cached per (ip, port))"""
+        cached = self.cache.get(ip, port)
+        if cached is not None:
+            return cached
         
-        return common_ports.get(port, "Unknown")
+        fingerprint = None
+        if port in TLS_PORTS:
+            fingerprint = await self._probe_tls(ip, port, hostname)
+        
+        if fingerprint is None:
+            payloads = [HTTP_PROBE] if port in HTTP_PORTS else [None, HTTP_PROBE]
+            for payload in payloads:
+                data, _ = await self._exchange(ip, port, payload)
+                if data is None:
+                    break  # Connection refused or timed out - don't keep trying
+                if data:
+                    fingerprint = match_banner(data) or {
+                        'service': 'unknown', 'product': None, 'version': None}
+                    fingerprint['banner'] = self._banner_text(data)
+                    # A TLS alert record means we spoke plaintext to a TLS service
+                    if data[:1] == b'\x15' and port not in TLS_PORTS:
+                        fingerprint = await self._probe_tls(ip, port, hostname) or fingerprint
+                    break
+            else:
+                if port not in TLS_PORTS:
+                    fingerprint = await self._probe_tls(ip, port, hostname)
+        
+        if fingerprint is None:
+            fingerprint = {'service': 'unknown', 'product': None, 'version': None, 'banner': ''}
+        fingerprint['name'] = SERVICE_NAMES.get(port, "Unknown")
+        self.cache.put(ip, port, fingerprint)
+        return fingerprint
+    
+    async def grab_many(self, ip, ports, hostname=None):
+        """Fingerprint several open ports concurrently; returns {port: fingerprint}"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def one(port):
+            async with semaphore:
+                return port, await self.grab(ip, port, hostname)
+        
+        return dict(await asyncio.gather(*(one(port) for port in ports)))
+    
+    def grab_ports(self, ip, ports, hostname=None):
+        """Synchronous wrapper around grab_many()"""
+        fingerprints = asyncio.run(self.grab_many(ip, ports, hostname))
+        self.cache.save()
+        return fingerprints
+
+
+def describe_fingerprint(fingerprint):
+    """One-line description such as 'ssh (OpenSSH 8.9p1)'"""
+    details = ' '.join(p for p in (fingerprint.get('product'), fingerprint.get('version')) if p)
+    if fingerprint['service'] == 'unknown':
+        return fingerprint.get('name', "Unknown")
+    return f"{fingerprint['service']} ({details})" if details else fingerprint['service']
 
 
 # ---- 2. Packet Sniffer ----
 
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+VLAN_ETHERTYPES = (0x8100, 0x88A8)
+
+# pcap link-layer header types
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+
+PACKET_OUTGOING = 4
+ARPHRD_LOOPBACK = 772
+SO_ATTACH_FILTER = 26
+
+IP_PROTOCOLS = {1: 'ICMP', 6: 'TCP', 17: 'UDP', 58: 'ICMPv6'}
+# Protocol filters: name -> (IPv4 protocol, IPv6 next header); None = any
+PROTOCOL_FILTERS = {
+    'ip': (None, False),
+    'ip6': (False, None),
+    'tcp': (6, 6),
+    'udp': (17, 17),
+    'icmp': (1, 58),
+}
+# IPv6 extension headers that sit between the fixed header and the payload
+IPV6_EXTENSION_HEADERS = (0, 43, 44, 60)
+
+_U16 = struct.Struct('!H')
+_IPV4_HEADER = struct.Struct('!BxH2xHxB2x4s4s')  # ver/ihl, length, frag, proto, src, dst
+_IPV6_HEADER = struct.Struct('!4xHBx16s16s')     # payload length, next header, src, dst
+_PORTS = struct.Struct('!HH')
+
+
+def parse_frame(frame, linktype=LINKTYPE_ETHERNET):
+    """
+    Parse link, IP and TCP/UDP headers with struct.unpack_from
+    
+    Works directly on bytes or a memoryview of a receive buffer, so no
+    per-packet copy of the frame is made.
+    
+    Returns:
+        tuple: (protocol, src, dst, src_port, dst_port, tcp_flags), with
+        addresses as packed bytes; None for non-IP or truncated frames
+    """
+    try:
+        if linktype == LINKTYPE_ETHERNET:
+            (ethertype,) = _U16.unpack_from(frame, 12)
+            offset = 14
+            while ethertype in VLAN_ETHERTYPES:
+                (ethertype,) = _U16.unpack_from(frame, offset + 2)
+                offset += 4
+        elif linktype == LINKTYPE_LINUX_SLL:
+            (ethertype,) = _U16.unpack_from(frame, 14)
+            offset = 16
+        elif linktype == LINKTYPE_RAW:
+            ethertype = ETH_P_IP if frame[0] >> 4 == 4 else ETH_P_IPV6
+            offset = 0
+        else:
+            return None
+        
+        if ethertype == ETH_P_IP:
+            ver_ihl, _, frag, proto, src, dst = _IPV4_HEADER.unpack_from(frame, offset)
+            if frag & 0x1FFF:
+                return proto, src, dst, 0, 0, 0  # Later fragments carry no ports
+            l4 = offset + (ver_ihl & 0x0F) * 4
+        elif ethertype == ETH_P_IPV6:
+            _, proto, src, dst = _IPV6_HEADER.unpack_from(frame, offset)
+            l4 = offset + 40
+            while proto in IPV6_EXTENSION_HEADERS:
+                if proto == 44:
+                    (frag,) = _U16.unpack_from(frame, l4 + 2)
+                    proto = frame[l4]
+                    if frag & 0xFFF8:
+                        return proto, src, dst, 0, 0, 0
+                    l4 += 8
+                else:
+                    proto, l4 = frame[l4], l4 + (frame[l4 + 1] + 1) * 8
+        else:
+            return None
+        
+        if proto == 6:
+            sport, dport = _PORTS.unpack_from(frame, l4)
+            return proto, src, dst, sport, dport, frame[l4 + 13]
+        if proto == 17:
+            sport, dport = _PORTS.unpack_from(frame, l4)
+            return proto, src, dst, sport, dport, 0
+        return proto, src, dst, 0, 0, 0
+    except (struct.error, IndexError):
+        return None
+
+
+def format_address(packed):
+    """Packed IPv4/IPv6 address -> text"""
+    return socket.inet_ntop(socket.AF_INET if len(packed) == 4 else socket.AF_INET6, packed)
+
+
+def tcp_flags_text(flags):
+    """TCP flag bits as scapy-style letters, e.g. 0x12 -> 'SA'"""
+    return ''.join(letter for bit, letter in zip(range(8), 'FSRPAUEC') if flags & (1 << bit))
+
+
+class FlowTable:
+    """
+    5-tuple flow aggregation (NetFlow style).
+    
+    A flow is one direction of a conversation: (protocol, src, src port,
+    dst, dst port). Each entry holds [first_seen, last_seen, packets,
+    bytes, OR of TCP flags]. Idle flows are expired and the table never
+    grows beyond max_flows (the oldest flows are exported early).
+    """
+    
+    def __init__(self, idle_timeout=60.0, max_flows=100000):
+        self.idle_timeout = idle_timeout
+        self.max_flows = max_flows
+        self.flows = {}
+        self.exported = []
+    
+    def add(self, key, timestamp, length, flags=0):
+        flow = self.flows.get(key)
+        if flow is None:
+            if len(self.flows) >= self.max_flows:
+                self._evict()
+            self.flows[key] = [timestamp, timestamp, 1, length, flags]
+        else:
+            flow[1] = timestamp
+            flow[2] += 1
+            flow[3] += length
+            flow[4] |= flags
+    
+    def _evict(self):
+        # Dicts keep insertion order: the first entries are the oldest flows
+        for key in list(itertools.islice(self.flows, max(1, self.max_flows // 10))):
+            self.exported.append((key, self.flows.pop(key)))
+    
+    def expire(self, now):
+        """Move flows idle for longer than idle_timeout to the export list"""
+        idle = [key for key, flow in self.flows.items() if now - flow[1] > self.idle_timeout]
+        for key in idle:
+            self.exported.append((key, self.flows.pop(key)))
+        return len(idle)
+    
+    def drain_exported(self):
+        """Return and forget flows that were expired or evicted"""
+        exported, self.exported = self.exported, []
+        return exported
+    
+    def top(self, n=10):
+        """The n active flows with the most bytes"""
+        return heapq.nlargest(n, self.flows.items(), key=lambda item: item[1][3])
+
+
+def flow_record(key, flow):
+    """Flow table entry -> JSON-friendly dict"""
+    proto, src, sport, dst, dport = key
+    first, last, packets, size, flags = flow
+    record = {
+        'protocol': IP_PROTOCOLS.get(proto, str(proto)),
+        'src': format_address(src),
+        'src_port': sport,
+        'dst': format_address(dst),
+        'dst_port': dport,
+        'first_seen': first,
+        'last_seen': last,
+        'packets': packets,
+        'bytes': size,
+    }
+    if proto == 6:
+        record['tcp_flags'] = tcp_flags_text(flags)
+    return record
+
+
+def build_bpf_filter(protocol):
+    """
+    Classic BPF program accepting Ethernet frames of one protocol
+    
+    Attached to the capture socket, it drops uninteresting frames in the
+    kernel before they are copied to user space.
+    
+    Returns:
+        list: (code, jt, jf, k) instructions, or None to accept everything
+    """
+    if protocol is None:
+        return None
+    ipv4_proto, ipv6_proto = PROTOCOL_FILTERS[protocol]
+    ld_h, ld_b, jeq, ret = 0x28, 0x30, 0x15, 0x06
+    accept, drop = (ret, 0, 0, 0x40000), (ret, 0, 0, 0)
+    
+    if protocol in ('ip', 'ip6'):
+        ethertype = ETH_P_IP if protocol == 'ip' else ETH_P_IPV6
+        return [(ld_h, 0, 0, 12), (jeq, 0, 1, ethertype), accept, drop]
+    return [
+        (ld_h, 0, 0, 12),
+        (jeq, 0, 2, ETH_P_IP),       # IPv4 -> 2, else -> 4
+        (ld_b, 0, 0, 23),            # IPv4 protocol field
+        (jeq, 3, 4, ipv4_proto),     # -> accept / drop
+        (jeq, 0, 3, ETH_P_IPV6),     # IPv6 -> 5, else drop
+        (ld_b, 0, 0, 20),            # IPv6 next header (no extension headers)
+        (jeq, 0, 1, ipv6_proto),
+        accept,
+        drop,
+    ]
+
+
+def attach_bpf_filter(sock, program):
+    """Attach a classic BPF program (SO_ATTACH_FILTER, Linux only)"""
+    code = b''.join(struct.pack('HBBI', *instruction) for instruction in program)
+    buffer = ctypes.create_string_buffer(code)
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER,
+                    struct.pack('HL', len(program), ctypes.addressof(buffer)))
+
+
+def write_pcap(path, frames, linktype=LINKTYPE_ETHERNET, snaplen=65535):
+    """Write (timestamp, frame) pairs to a classic pcap file; returns the count"""
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xA1B2C3D4, 2, 4, 0, 0, snaplen, linktype))
+        for timestamp, frame in frames:
+            seconds = int(timestamp)
+            data = bytes(frame[:snaplen])
+            f.write(struct.pack('<IIII', seconds, int((timestamp - seconds) * 1e6),
+                                len(data), len(frame)))
+            f.write(data)
+            count += 1
+    return count
+
+
+# pcap magic numbers -> timestamp resolution
+PCAP_MAGIC = {0xA1B2C3D4: 1e-6, 0xA1B23C4D: 1e-9}
+PCAPNG_SECTION_HEADER = b'\x0a\x0d\x0d\x0a'
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_INTERFACE = 1
+PCAPNG_PACKET = 2            # Obsolete Packet Block
+PCAPNG_SIMPLE_PACKET = 3
+PCAPNG_ENHANCED_PACKET = 6
+PCAPNG_OPTION_TSRESOL = 9
+
+
+class PcapReader:
+    """
+    Stream records from a pcap or pcapng file without loading it.
+    
+    With use_mmap=True the file is memory-mapped and every frame is a
+    memoryview slice of the mapping: nothing is copied and the kernel pages
+    the file in (and out) as the reader moves through it. Otherwise records
+    are read through a buffered file object.
+    
+    pcapng files may mix link types across interfaces; packets from
+    interfaces whose link type differs from the first one are skipped and
+    counted in `skipped`.
+    """
+    
+    def __init__(self, path, use_mmap=False):
+        self.path = path
+        self.use_mmap = use_mmap
+        self.skipped = 0
+        self.file = open(path, 'rb')
+        self.mmap = None
+        try:
+            self._read_header()
+            if use_mmap:
+                self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self.mmap, 'madvise'):
+                    self.mmap.madvise(mmap.MADV_SEQUENTIAL)
+        except Exception:
+            self.file.close()
+            raise
+    
+    def _read_header(self):
+        header = self.file.read(24)
+        if header[:4] == PCAPNG_SECTION_HEADER:
+            self.format = 'pcapng'
+            self.file.seek(0)
+            for endian, block_type, body in self._pcapng_blocks(self.file.read):
+                if block_type == PCAPNG_INTERFACE:
+                    self.linktype = struct.unpack_from(endian + 'H', body)[0]
+                    return
+            raise ValueError(f"pcapng file has no interface description: {self.path}")
+        
+        if len(header) == 24:
+            for endian in '<>':
+                (magic,) = struct.unpack(endian + 'I', header[:4])
+                if magic in PCAP_MAGIC:
+                    self.format = 'pcap'
+                    self.record_header = struct.Struct(endian + 'IIII')
+                    self.resolution = PCAP_MAGIC[magic]
+                    self.linktype = struct.unpack(endian + 'I', header[20:24])[0] & 0xFFFF
+                    return
+        raise ValueError(f"Not a pcap or pcapng file: {self.path}")
+    
+    def _reader(self):
+        """read(size) from the start of the file; mmap reads return memoryviews"""
+        if self.mmap is None:
+            self.file.seek(0)
+            return self.file.read
+        view = memoryview(self.mmap)
+        position = 0
+        
+        def read(size):
+            nonlocal position
+            chunk = view[position:position + size]
+            position += len(chunk)
+            return chunk
+        
+        return read
+    
+    def __iter__(self):
+        """Yield (timestamp, frame, original length)"""
+        read = self._reader()
+        if self.format == 'pcapng':
+            return self._iter_pcapng(read)
+        return self._iter_pcap(read)
+    
+    def _iter_pcap(self, read):
+        read(24)
+        unpack = self.record_header.unpack
+        resolution = self.resolution
+        while True:
+            header = read(16)
+            if len(header) < 16:
+                return
+            seconds, fraction, captured, original = unpack(header)
+            frame = read(captured)
+            if len(frame) < captured:
+                return  # Truncated file
+            yield seconds + fraction * resolution, frame, original
+    
+    def _pcapng_blocks(self, read):
+        """Yield (endian, block type, body) for every pcapng block"""
+        endian = None
+        while True:
+            header = read(8)
+            if len(header) < 8:
+                return
+            if bytes(header[:4]) == PCAPNG_SECTION_HEADER:
+                # Each section declares its own byte order
+                byte_order = read(4)
+                endian = '<' if struct.unpack('<I', byte_order)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+                (length,) = struct.unpack(endian + 'I', header[4:])
+                read(length - 12)
+                yield endian, None, None
+                continue
+            if endian is None:
+                raise ValueError(f"pcapng file does not start with a section header: {self.path}")
+            block_type, length = struct.unpack(endian + 'II', header)
+            if length < 12:
+                return  # Corrupt block
+            body = read(length - 8)
+            if len(body) < length - 8:
+                return
+            yield endian, block_type, body[:-4]
+    
+    def _iter_pcapng(self, read):
+        interfaces = []
+        last_timestamp = 0.0
+        for endian, block_type, body in self._pcapng_blocks(read):
+            if block_type is None:
+                interfaces = []  # New section, new interface list
+                continue
+            if block_type == PCAPNG_ENHANCED_PACKET:
+                interface, high, low, captured, original = struct.unpack_from(endian + 'IIIII', body)
+                frame = body[20:20 + captured]
+            elif block_type == PCAPNG_SIMPLE_PACKET:
+                (original,) = struct.unpack_from(endian + 'I', body)
+                frame = body[4:4 + original]
+                interface, high, low = 0, None, None
+            elif block_type == PCAPNG_PACKET:
+                interface, _, high, low, captured, original = struct.unpack_from(endian + 'HHIIII', body)
+                frame = body[20:20 + captured]
+            elif block_type == PCAPNG_INTERFACE:
+                interfaces.append((struct.unpack_from(endian + 'H', body)[0],
+                                   self._interface_resolution(body[8:], endian)))
+                continue
+            else:
+                continue
+            
+            if interface >= len(interfaces) or interfaces[interface][0] != self.linktype:
+                self.skipped += 1
+                continue
+            if high is not None:
+                # Simple Packet Blocks carry no timestamp
+                last_timestamp = ((high << 32) | low) * interfaces[interface][1]
+            yield last_timestamp, frame, original
+    
+    def _interface_resolution(self, options, endian):
+        """Timestamp resolution from the if_tsresol option (default microseconds)"""
+        offset = 0
+        while offset + 4 <= len(options):
+            code, length = struct.unpack_from(endian + 'HH', options, offset)
+            if code == 0:
+                break
+            if code == PCAPNG_OPTION_TSRESOL and length >= 1:
+                value = options[offset + 4]
+                return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+            offset += 4 + (length + 3) // 4 * 4
+        return 1e-6
+    
+    def close(self):
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                pass  # A caller still holds a frame; the mapping goes with it
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Header fields a capture filter sees, in CaptureFilter.__call__ order
+FILTER_FIELDS = {'proto': 0, 'src': 1, 'dst': 2, 'sport': 3, 'dport': 4}
+
+# Capture filter keywords -> (packet test, kernel BPF protocol hint)
+FILTER_PROTOCOLS = {
+    'ip': (lambda packet: len(packet[1]) == 4, 'ip'),
+    'ip6': (lambda packet: len(packet[1]) == 16, 'ip6'),
+    'tcp': (lambda packet: packet[0] == 6, 'tcp'),
+    'udp': (lambda packet: packet[0] == 17, 'udp'),
+    'icmp': (lambda packet: packet[0] == 1, 'icmp'),
+    'icmp6': (lambda packet: packet[0] == 58, 'icmp'),
+}
+FILTER_TOKEN = re.compile(r'\(|\)|&&|\|\||!|[^\s()!]+')
+
+
+def _any_of(tests):
+    if len(tests) == 1:
+        return tests[0]
+    return lambda packet: any(test(packet) for test in tests)
+
+
+def _all_of(tests):
+    if len(tests) == 1:
+        return tests[0]
+    return lambda packet: all(test(packet) for test in tests)
+
+
+class CaptureFilter:
+    """
+    BPF-like capture filter compiled to a Python function.
+    
+    Supports the common tcpdump primitives: ip, ip6, tcp, udp, icmp, icmp6,
+    proto N, [src|dst] host ADDR, [src|dst] net CIDR, [src|dst] port N,
+    [src|dst] portrange A-B, combined with and/&&, or/||, not/! and
+    parentheses. The expression is parsed once into nested closures over
+    the header fields, so matching a packet never re-reads the expression.
+    
+    `protocol` is a protocol every matching packet must have (or None); it
+    can be pushed down into a kernel BPF program for live captures.
+    """
+    
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens = FILTER_TOKEN.findall(expression.lower())
+        self.position = 0
+        if not self.tokens:
+            raise ValueError("Empty filter expression")
+        self.match, self.protocol = self._parse_or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.position]}' in filter: {expression}")
+    
+    def __call__(self, proto, src, dst, sport, dport):
+        return self.match((proto, src, dst, sport, dport))
+    
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+    
+    def _next(self, what="a value"):
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Filter ends where {what} was expected: {self.expression}")
+        self.position += 1
+        return token
+    
+    def _parse_or(self):
+        test, hint = self._parse_and()
+        tests = [test]
+        while self._peek() in ('or', '||'):
+            self.position += 1
+            tests.append(self._parse_and()[0])
+            hint = None
+        return _any_of(tests), hint
+    
+    def _parse_and(self):
+        test, hint = self._parse_not()
+        tests = [test]
+        while self._peek() in ('and', '&&'):
+            self.position += 1
+            part, part_hint = self._parse_not()
+            tests.append(part)
+            hint = hint or part_hint
+        return _all_of(tests), hint
+    
+    def _parse_not(self):
+        token = self._peek()
+        if token in ('not', '!'):
+            self.position += 1
+            test = self._parse_not()[0]
+            return (lambda packet: not test(packet)), None
+        if token == '(':
+            self.position += 1
+            result = self._parse_or()
+            if self._next("')'") != ')':
+                raise ValueError(f"Missing ')' in filter: {self.expression}")
+            return result
+        return self._parse_primitive()
+    
+    def _parse_primitive(self):
+        token = self._next("a primitive")
+        if token in FILTER_PROTOCOLS:
+            return FILTER_PROTOCOLS[token]
+        if token == 'proto':
+            number = int(self._next('a protocol number'))
+            return (lambda packet: packet[0] == number), None
+        
+        direction = None
+        if token in ('src', 'dst'):
+            direction, token = token, self._next("host, net, port or portrange")
+        fields = {'host': ('src', 'dst'), 'net': ('src', 'dst'),
+                  'port': ('sport', 'dport'), 'portrange': ('sport', 'dport')}
+        if token not in fields:
+            raise ValueError(f"Unknown filter primitive '{token}': {self.expression}")
+        value = self._next(f"a {token}")
+        source, destination = fields[token]
+        names = {'src': [source], 'dst': [destination], None: [source, destination]}[direction]
+        indexes = [FILTER_FIELDS[name] for name in names]
+        
+        if token == 'host':
+            packed = socket.inet_pton(socket.AF_INET6 if ':' in value else socket.AF_INET, value)
+            tests = [lambda packet, i=i: packet[i] == packed for i in indexes]
+        elif token == 'net':
+            network = ipaddress.ip_network(value, strict=False)
+            size = 4 if network.version == 4 else 16
+            mask, base = int(network.netmask), int(network.network_address)
+            tests = [lambda packet, i=i: (len(packet[i]) == size and
+                                          int.from_bytes(packet[i], 'big') & mask == base)
+                     for i in indexes]
+        else:
+            low, _, high = value.partition('-') if token == 'portrange' else (value, '', value)
+            low, high = int(low), int(high)
+            if not 0 <= low <= high <= 65535:
+                raise ValueError(f"Invalid {token} '{value}' in filter: {self.expression}")
+            ports = _any_of([lambda packet, i=i: low <= packet[i] <= high for i in indexes])
+            # Like BPF, port primitives only match TCP and UDP
+            tests = [lambda packet: packet[0] in (6, 17) and ports(packet)]
+        return _any_of(tests), None
+
+
 class PacketSniffer:
-    """Basic packet sniffer using Scapy"""
+    """Basic packet sniffer using Scapy, plus a raw-socket flow capture pipeline"""
     
     def __init__(self):
         self.packet_count = 0
         self.captured_packets = []
+        self.flows = None
     
     def start_capture(self, interface=None, packet_count=10, 
                       filter_str="ip", save_packets=True):
@@ -175,6 +1406,183 @@ class PacketSniffer:
                       f"{src_ip} -> {dst_ip} [{proto_name}]")
         else:
             print(f"Packet {self.packet_count}: (Non-IP packet)")
+    
+    def capture_flows(self, interface=None, filter_str=None, duration=10, packet_count=None,
+                      summary_interval=5, output_file=None, top=10, idle_timeout=60.0):
+        """
+        Capture raw frames from an AF_PACKET socket into 5-tuple flow records
+        
+        Unlike start_capture(), nothing is dissected by scapy or stored:
+        headers are parsed in place and only per-flow counters are kept.
+        Requires Linux and root (CAP_NET_RAW).
+        
+        Args:
+            interface (str): Interface to bind to (None = all)
+            filter_str (str): BPF-like filter (see CaptureFilter); its protocol part
+                is also applied in the kernel
+            duration (float): Stop after this many seconds (None = no limit)
+            packet_count (int): Stop after this many frames (None = no limit)
+            summary_interval (float): Seconds between flow summaries
+            output_file (str): Append summaries as JSON lines instead of printing
+            top (int): Flows listed per summary
+        
+        Returns:
+            dict: Capture statistics
+        """
+        capture_filter = CaptureFilter(filter_str) if filter_str else None
+        try:
+            sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        except (AttributeError, PermissionError, OSError) as e:
+            print(f"Error opening packet socket: {e}")
+            print("Note: Raw capture needs Linux and root/CAP_NET_RAW privileges")
+            return None
+        
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            program = build_bpf_filter(capture_filter.protocol if capture_filter else None)
+            if program:
+                attach_bpf_filter(sock, program)
+            if interface:
+                sock.bind((interface, 0))
+            print(f"Capturing flows on {interface or 'all interfaces'} "
+                  f"(filter: {filter_str or 'none'})")
+            frames = self._live_frames(sock, duration, packet_count)
+            return self._run_pipeline(frames, LINKTYPE_ETHERNET, capture_filter, summary_interval,
+                                      output_file, top, idle_timeout)
+        finally:
+            sock.close()
+    
+    def replay_pcap(self, pcap_file, filter_str=None, summary_interval=5, output_file=None,
+                    top=10, idle_timeout=60.0, use_mmap=False):
+        """
+        Analyze a pcap/pcapng file with the same parse/flow pipeline as live capture
+        
+        The file is streamed, so multi-GB captures need no more memory than
+        the flow table, and no privileges are required. Summaries follow the
+        packet timestamps, so replays are repeatable and can be used to
+        benchmark the pipeline offline.
+        
+        Args:
+            filter_str (str): BPF-like filter (see CaptureFilter)
+            use_mmap (bool): Memory-map the file instead of buffered reads
+        
+        Returns:
+            dict: Statistics including packets_per_sec
+        """
+        capture_filter = CaptureFilter(filter_str) if filter_str else None
+        with PcapReader(pcap_file, use_mmap=use_mmap) as reader:
+            print(f"Analyzing {pcap_file} ({reader.format}, filter: {filter_str or 'none'})")
+            stats = self._run_pipeline(reader, reader.linktype, capture_filter, summary_interval,
+                                       output_file, top, idle_timeout)
+            stats['skipped'] = reader.skipped
+            return stats
+    
+    def _live_frames(self, sock, duration, packet_count):
+        """
+        Yield (timestamp, frame view, length) from one reused receive buffer
+        
+        An idle wake-up yields (timestamp, None, 0), so summaries and idle-flow
+        export keep running on a quiet interface.
+        """
+        buffer = bytearray(65536)
+        view = memoryview(buffer)
+        deadline = time.monotonic() + duration if duration else None
+        sock.settimeout(0.5)
+        received = 0
+        while packet_count is None or received < packet_count:
+            if deadline and time.monotonic() >= deadline:
+                return
+            try:
+                size, address = sock.recvfrom_into(buffer)
+            except socket.timeout:
+                yield time.time(), None, 0
+                continue
+            # Loopback frames show up twice (sent and received); keep one copy
+            if address[2] == PACKET_OUTGOING and address[3] == ARPHRD_LOOPBACK:
+                continue
+            received += 1
+            yield time.time(), view[:size], size
+    
+    def _run_pipeline(self, frames, linktype, capture_filter, summary_interval, output_file,
+                      top, idle_timeout):
+        """Parse frames, aggregate flows and emit periodic summaries"""
+        self.flows = flows = FlowTable(idle_timeout=idle_timeout)
+        match = capture_filter
+        add = flows.add
+        stats = {'packets': 0, 'bytes': 0, 'non_ip': 0, 'filtered': 0, 'summaries': 0}
+        output = open(output_file, 'a') if output_file else None
+        next_summary = None
+        start = time.monotonic()
+        
+        try:
+            for timestamp, frame, length in frames:
+                # A None frame is an idle tick: nothing to parse, but the clock moved
+                if frame is not None:
+                    stats['packets'] += 1
+                    parsed = parse_frame(frame, linktype)
+                    if parsed is None:
+                        stats['non_ip'] += 1
+                    elif match is not None and not match(*parsed[:5]):
+                        stats['filtered'] += 1
+                    else:
+                        proto, src, dst, sport, dport, flags = parsed
+                        stats['bytes'] += length
+                        add((proto, src, sport, dst, dport), timestamp, length, flags)
+                
+                if next_summary is None:
+                    next_summary = timestamp + summary_interval
+                elif timestamp >= next_summary:
+                    self._emit_summary(timestamp, stats, top, output, start)
+                    next_summary = timestamp + summary_interval
+            
+            # Final summary at the last packet's time, then export whatever is still active
+            self._emit_summary(time.time() if next_summary is None else timestamp,
+                               stats, top, output, start)
+            if output:
+                for key, flow in list(flows.flows.items()):
+                    output.write(json.dumps({'type': 'flow', **flow_record(key, flow)}) + '\n')
+        finally:
+            if output:
+                output.close()
+        
+        stats['elapsed'] = time.monotonic() - start
+        stats['packets_per_sec'] = stats['packets'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        stats['flows'] = len(flows.flows)
+        print(f"Processed {stats['packets']} packets into {stats['flows']} active flows "
+              f"({stats['packets_per_sec']:,.0f} packets/sec)")
+        return stats
+    
+    def _emit_summary(self, now, stats, top, output, start):
+        """Write (or print) the busiest flows and export idle ones"""
+        flows = self.flows
+        flows.expire(now)
+        exported = flows.drain_exported()
+        stats['summaries'] += 1
+        summary = {
+            'type': 'summary',
+            'time': now,
+            'packets': stats['packets'],
+            'bytes': stats['bytes'],
+            'active_flows': len(flows.flows),
+            'exported_flows': len(exported),
+            'packets_per_sec': round(stats['packets'] / max(time.monotonic() - start, 1e-9)),
+            'top_flows': [flow_record(key, flow) for key, flow in flows.top(top)],
+        }
+        if output:
+            for key, flow in exported:
+                output.write(json.dumps({'type': 'flow', **flow_record(key, flow)}) + '\n')
+            output.write(json.dumps(summary) + '\n')
+            output.flush()
+            return
+        
+        print(f"[{datetime.fromtimestamp(now).strftime('%H:%M:%S')}] "
+              f"{summary['packets']} packets, {summary['bytes']} bytes, "
+              f"{summary['active_flows']} active flows "
+              f"({summary['packets_per_sec']:,} packets/sec processed)")
+        for record in summary['top_flows']:
+            print(f"  {record['protocol']:<6} {record['src']}:{record['src_port']} -> "
+                  f"{record['dst']}:{record['dst_port']}  "
+                  f"{record['packets']} pkts {record['bytes']} bytes")
 
 
 # ---- 3. SSL/TLS Certificate Verification ----
@@ -182,15 +1590,25 @@ class PacketSniffer:
 class TLSVerifier:
     """Verify and display information about SSL/TLS certificates"""
     
+    def __init__(self, timeout=10.0, cafile=None):
+        """
+        Args:
+            timeout (float): Connect and handshake timeout in seconds
+            cafile (str): Extra trust anchors (PEM) on top of the system store
+        """
+        self.timeout = timeout
+        # Building a context loads the whole CA store, so it is done once
+        self.context = ssl.create_default_context()
+        if cafile:
+            self.context.load_verify_locations(cafile)
+    
     def verify_cert(self, hostname, port=443):
         """Connect to a server and verify its TLS certificate"""
-        context = ssl.create_default_context()
-        
         try:
             print(f"Connecting to {hostname}:{port} with TLS...")
             
-            with socket.create_connection((hostname, port)) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+            with socket.create_connection((hostname, port), timeout=self.timeout) as sock:
+                with self.context.wrap_socket(sock, server_hostname=hostname) as ssock:
                     # Get the certificate
                     cert = ssock.getpeercert()
                     
@@ -251,14 +1669,865 @@ class TLSVerifier:
                 print(f"  {name_type}: {name}")
 
 
+# Columns of the certificate inventory (CSV order)
+INVENTORY_FIELDS = [
+    'host', 'port', 'status', 'error', 'subject', 'issuer', 'issuer_org',
+    'not_before', 'not_after', 'days_left', 'expired', 'san', 'tls_version',
+    'cipher', 'session_reused', 'handshake_ms',
+]
+
+
+def certificate_fields(cert=None, der=None):
+    """
+    Inventory fields from a certificate
+    
+    Args:
+        cert (dict): ssl getpeercert() output (only available once verified)
+        der (bytes): DER certificate, parsed with cryptography (unverified peers)
+    """
+    if cert:
+        subject = dict(x[0] for x in cert.get('subject', []))
+        issuer = dict(x[0] for x in cert.get('issuer', []))
+        return {
+            'subject': subject.get('commonName'),
+            'issuer': issuer.get('commonName'),
+            'issuer_org': issuer.get('organizationName'),
+            'not_before': datetime.fromtimestamp(ssl.cert_time_to_seconds(cert['notBefore']),
+                                                 timezone.utc),
+            'not_after': datetime.fromtimestamp(ssl.cert_time_to_seconds(cert['notAfter']),
+                                                timezone.utc),
+            'san': [value for _, value in cert.get('subjectAltName', [])],
+        }
+    
+    certificate = x509.load_der_x509_certificate(der)
+    
+    def first(name, oid):
+        values = name.get_attributes_for_oid(oid)
+        return values[0].value if values else None
+    
+    try:
+        alt_names = certificate.extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+        san = ([str(n) for n in alt_names.get_values_for_type(x509.DNSName)] +
+               [str(n) for n in alt_names.get_values_for_type(x509.IPAddress)])
+    except x509.ExtensionNotFound:
+        san = []
+    return {
+        'subject': first(certificate.subject, NameOID.COMMON_NAME),
+        'issuer': first(certificate.issuer, NameOID.COMMON_NAME),
+        'issuer_org': first(certificate.issuer, NameOID.ORGANIZATION_NAME),
+        'not_before': certificate.not_valid_before_utc,
+        'not_after': certificate.not_valid_after_utc,
+        'san': san,
+    }
+
+
+def parse_endpoints(lines, default_port=443):
+    """
+    Parse 'host', 'host:port' and '[ipv6]:port' lines into (host, port) pairs
+    
+    Blank lines and '#' comments are skipped; duplicates are dropped.
+    """
+    endpoints = []
+    seen = set()
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith('['):
+            host, _, rest = line[1:].partition(']')
+            port = int(rest.lstrip(':') or default_port)
+        elif line.count(':') == 1:
+            host, port = line.split(':')
+            port = int(port)
+        else:
+            host, port = line, default_port  # Hostname or bare IPv6 address
+        if (host, port) not in seen:
+            seen.add((host, port))
+            endpoints.append((host, port))
+    return endpoints
+
+
+class CertificateScanner(TLSVerifier):
+    """
+    Bulk TLS certificate inventory.
+    
+    Handshakes run concurrently on the asyncio event loop through ssl
+    MemoryBIOs, all with the verifier's one SSLContext, and each endpoint
+    is bounded by the timeout. If verification fails the certificate is
+    fetched again without verification, so expired or self-signed
+    certificates still show up with their dates. With resume_sessions the
+    TLS session of every endpoint is kept and offered on the next scan.
+    """
+    
+    def __init__(self, concurrency=100, timeout=5.0, cafile=None, resume_sessions=False,
+                 warning_days=30):
+        """
+        Initialize scanner
+        
+        Args:
+            concurrency (int): Handshakes in flight
+            timeout (float): Seconds allowed per endpoint (connect + handshake)
+            cafile (str): Extra trust anchors (PEM), e.g. an internal CA
+            resume_sessions (bool): Reuse TLS sessions on repeated scans
+            warning_days (int): Certificates expiring sooner are reported
+        """
+        super().__init__(timeout=timeout, cafile=cafile)
+        self.concurrency = max(1, concurrency)
+        self.resume_sessions = resume_sessions
+        self.warning_days = warning_days
+        self.sessions = {}
+        self.records = []
+        
+        self.unverified_context = ssl.create_default_context()
+        self.unverified_context.check_hostname = False
+        self.unverified_context.verify_mode = ssl.CERT_NONE
+    
+    async def _handshake(self, host, port, context, session=None):
+        """Connect and complete a TLS handshake; returns the SSLObject"""
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            incoming, outgoing = ssl.MemoryBIO(), ssl.MemoryBIO()
+            tls = context.wrap_bio(incoming, outgoing, server_hostname=host, session=session)
+            while True:
+                try:
+                    tls.do_handshake()
+                    done = True
+                except ssl.SSLWantReadError:
+                    done = False
+                pending = outgoing.read()
+                if pending:
+                    writer.write(pending)
+                    await writer.drain()
+                if done:
+                    break
+                data = await reader.read(16384)
+                if not data:
+                    raise ConnectionResetError("Connection closed during TLS handshake")
+                incoming.write(data)
+            
+            # TLS 1.3 tickets arrive after the handshake; read them if we want to resume
+            if self.resume_sessions and tls.version() == 'TLSv1.3' and context is self.context:
+                try:
+                    incoming.write(await asyncio.wait_for(reader.read(16384),
+                                                          min(0.2, self.timeout)))
+                    tls.read()
+                except (ssl.SSLWantReadError, ssl.SSLError, asyncio.TimeoutError):
+                    pass
+            return tls
+        finally:
+            writer.close()
+    
+    async def scan_endpoint(self, host, port=443):
+        """Handshake with one endpoint and return its inventory record"""
+        record = dict.fromkeys(INVENTORY_FIELDS)
+        record.update(host=host, port=port, san=[])
+        start = time.monotonic()
+        try:
+            session = self.sessions.get((host, port)) if self.resume_sessions else None
+            try:
+                tls = await asyncio.wait_for(
+                    self._handshake(host, port, self.context, session), self.timeout)
+                record['status'] = 'valid'
+                record.update(certificate_fields(cert=tls.getpeercert()))
+                record['session_reused'] = tls.session_reused
+                if self.resume_sessions and tls.session is not None:
+                    self.sessions[(host, port)] = tls.session
+            except ssl.SSLCertVerificationError as e:
+                record['status'] = 'invalid'
+                record['error'] = e.verify_message or str(e)
+                tls = await asyncio.wait_for(
+                    self._handshake(host, port, self.unverified_context), self.timeout)
+                record.update(certificate_fields(der=tls.getpeercert(binary_form=True)))
+            record['handshake_ms'] = round((time.monotonic() - start) * 1000, 1)
+            record['tls_version'] = tls.version()
+            record['cipher'] = tls.cipher()[0]
+        except asyncio.TimeoutError:
+            record['status'] = 'error'
+            record['error'] = f"Timed out after {self.timeout}s"
+        except (OSError, ssl.SSLError, ValueError) as e:
+            record['status'] = 'error'
+            record['error'] = str(e) or type(e).__name__
+        
+        if record['not_after'] is not None:
+            remaining = record['not_after'] - datetime.now(timezone.utc)
+            record['days_left'] = remaining.days
+            record['expired'] = remaining.total_seconds() < 0
+            record['not_before'] = record['not_before'].isoformat()
+            record['not_after'] = record['not_after'].isoformat()
+        return record
+    
+    async def scan_all(self, endpoints, on_result=None):
+        """Scan (host, port) pairs concurrently; records come back in input order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def one(host, port):
+            async with semaphore:
+                record = await self.scan_endpoint(host, port)
+            if on_result:
+                on_result(record)
+            return record
+        
+        return await asyncio.gather(*(one(host, port) for host, port in endpoints))
+    
+    def scan(self, endpoints, on_result=None):
+        """
+        Build the certificate inventory for many endpoints
+        
+        Args:
+            endpoints (list): (host, port) pairs or 'host:port' strings
+            on_result (callable): Called with each record as it completes
+        
+        Returns:
+            list: Inventory records (see INVENTORY_FIELDS)
+        """
+        if endpoints and isinstance(endpoints[0], str):
+            endpoints = parse_endpoints(endpoints)
+        start = time.monotonic()
+        self.records = asyncio.run(self.scan_all(endpoints, on_result))
+        
+        counts = {status: sum(1 for r in self.records if r['status'] == status)
+                  for status in ('valid', 'invalid', 'error')}
+        expiring = self.expiring()
+        print(f"Scanned {len(self.records)} endpoints in {time.monotonic() - start:.2f}s: "
+              f"{counts['valid']} valid, {counts['invalid']} invalid, {counts['error']} errors, "
+              f"{len(expiring)} expiring within {self.warning_days} days")
+        return self.records
+    
+    def expiring(self, days=None):
+        """Records whose certificate expires within `days` (or has expired)"""
+        days = self.warning_days if days is None else days
+        return sorted((r for r in self.records if r['days_left'] is not None and r['days_left'] < days),
+                      key=lambda r: r['days_left'])
+    
+    def save_inventory(self, output_file, output_format='json'):
+        """Write the inventory as JSON or CSV"""
+        if output_format == 'csv':
+            with open(output_file, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=INVENTORY_FIELDS)
+                writer.writeheader()
+                for record in self.records:
+                    writer.writerow({**record, 'san': ';'.join(record['san'])})
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(self.records, f, indent=2)
+        print(f"Inventory of {len(self.records)} endpoints saved to {output_file}")
+
+
 # ---- 4. Firewall Rule Demonstrator ----
 
+PROTOCOL_NUMBERS = {
+    'icmp': 1, 'igmp': 2, 'tcp': 6, 'udp': 17, 'gre': 47, 'esp': 50, 'ah': 51,
+    'icmpv6': 58, 'ipv6-icmp': 58, 'sctp': 132,
+}
+# Targets that end rule evaluation
+TERMINAL_TARGETS = {'ACCEPT', 'DROP', 'REJECT'}
+NFT_VERDICTS = {'accept': 'ACCEPT', 'drop': 'DROP', 'reject': 'REJECT', 'return': 'RETURN'}
+NFT_TABLE_FAMILIES = {'ip': 4, 'ip6': 6, 'inet': None, 'bridge': None, 'netdev': None}
+
+# IPv4 and IPv6 addresses share one integer space: IPv6 starts above 2**32
+IPV6_BASE = 1 << 32
+FAMILY_SIZES = {4: 1 << 32, 6: 1 << 128}
+NFT_TOKEN = re.compile(r'\{[^}]*\}|"[^"]*"|\S+')
+
+
+def address_interval(text):
+    """'10.0.0.0/8', '2001:db8::1' or 'a-b' -> (low, high, family) in the shared space"""
+    text = text.strip().strip('"')
+    if '-' in text:
+        first, last = (ipaddress.ip_address(part) for part in text.split('-', 1))
+    else:
+        network = ipaddress.ip_network(text, strict=False)
+        first, last = network.network_address, network.broadcast_address
+    base = IPV6_BASE if first.version == 6 else 0
+    return int(first) + base, int(last) + base, first.version
+
+
+def encode_address(address):
+    """Packet address -> integer in the shared IPv4/IPv6 space, plus its family"""
+    ip = ipaddress.ip_address(address)
+    return int(ip) + (IPV6_BASE if ip.version == 6 else 0), ip.version
+
+
+def port_interval(text, separator=':'):
+    """'22', '1024:65535', ':1023' (iptables) or '8000-8100' (nft) -> (low, high)"""
+    text = text.strip()
+    if separator in text:
+        low, high = text.split(separator, 1)
+        return int(low or 0), int(high or 65535)
+    return int(text), int(text)
+
+
+def in_intervals(value, intervals):
+    for low, high in intervals:
+        if low <= value <= high:
+            return True
+    return False
+
+
+def interface_matches(pattern, name):
+    """iptables interface match; a trailing '+' is a prefix wildcard"""
+    if name is None:
+        return False
+    if pattern.endswith('+'):
+        return name.startswith(pattern[:-1])
+    return name == pattern
+
+
+class FirewallRule:
+    """
+    One parsed rule. Every match field is None (any) or a list of inclusive
+    (low, high) intervals, each with a negation flag. Matches the engine
+    doesn't model (conntrack state, rate limits, marks, named sets...) are
+    kept in `extras`; such rules are conditional and never match a bare
+    5-tuple.
+    """
+    
+    FIELDS = ('proto', 'src', 'dst', 'sport', 'dport')
+    
+    def __init__(self, table, chain, position, text='', line=None):
+        self.table = table
+        self.chain = chain
+        self.position = position
+        self.text = text
+        self.line = line
+        self.family = None
+        self.proto = self.src = self.dst = self.sport = self.dport = None
+        self.negated = set()
+        self.iif = self.oif = None
+        self.target = None
+        self.goto = False
+        self.extras = []
+        self.comment = None
+    
+    def add(self, field, intervals, negate=False):
+        current = getattr(self, field)
+        setattr(self, field, (current or []) + list(intervals))
+        if negate:
+            self.negated.add(field)
+    
+    def set_family(self, family):
+        if family is not None:
+            self.family = family
+    
+    @property
+    def conditional(self):
+        return bool(self.extras)
+    
+    def matches(self, packet):
+        """packet: (family, proto, src, dst, sport, dport, iif, oif)"""
+        if self.extras:
+            return False
+        family, proto, src, dst, sport, dport, iif, oif = packet
+        if self.family is not None and family != self.family:
+            return False
+        negated = self.negated
+        for intervals, value, field in ((self.proto, proto, 'proto'), (self.src, src, 'src'),
+                                        (self.dst, dst, 'dst'), (self.sport, sport, 'sport'),
+                                        (self.dport, dport, 'dport')):
+            if intervals is not None and in_intervals(value, intervals) == (field in negated):
+                return False
+        if self.iif is not None and interface_matches(self.iif, iif) == ('iif' in negated):
+            return False
+        if self.oif is not None and interface_matches(self.oif, oif) == ('oif' in negated):
+            return False
+        return True
+    
+    def covers(self, other):
+        """True if every packet matching `other` also matches this rule"""
+        if self.extras or self.negated:
+            return False  # Conservative: conditional and negated rules never cover
+        if self.family is not None and other.family != self.family:
+            return False
+        for field in self.FIELDS:
+            mine, theirs = getattr(self, field), getattr(other, field)
+            if mine is None:
+                continue
+            if theirs is None or field in other.negated:
+                return False
+            for low, high in theirs:
+                if not any(l <= low and high <= h for l, h in mine):
+                    return False
+        for field in ('iif', 'oif'):
+            mine, theirs = getattr(self, field), getattr(other, field)
+            if mine is not None and (theirs is None or field in other.negated or
+                                     not interface_matches(mine, theirs.rstrip('+'))):
+                return False
+        return True
+    
+    def selectivity(self, field):
+        """Fraction of the field's value space this rule matches"""
+        intervals = getattr(self, field)
+        if intervals is None or field in self.negated:
+            return 1.0
+        covered = sum(high - low + 1 for low, high in intervals)
+        if field == 'proto':
+            return covered / 256
+        if field in ('sport', 'dport'):
+            return covered / 65536
+        size = FAMILY_SIZES[6] if intervals[0][0] >= IPV6_BASE else FAMILY_SIZES[4]
+        return covered / size
+    
+    def __repr__(self):
+        return f"<FirewallRule {self.table}/{self.chain}#{self.position} {self.text}>"
+
+
+class IntervalIndex:
+    """
+    Static segment tree answering "which intervals contain this value".
+    
+    The distinct interval end points split the value space into elementary
+    segments; each interval is stored in the O(log n) tree nodes that
+    exactly cover its segments. A stabbing query is one bisect plus a walk
+    from the segment's leaf to the root: O(log n + k) for k results.
+    """
+    
+    def __init__(self, items):
+        """items: iterable of (low, high, rule id) with inclusive bounds"""
+        items = list(items)
+        self.points = sorted({low for low, _, _ in items} | {high + 1 for _, high, _ in items})
+        self.size = 1 << max(1, len(self.points).bit_length())
+        self.nodes = {}
+        points = self.points
+        for low, high, rule_id in items:
+            left = bisect.bisect_left(points, low) + self.size
+            right = bisect.bisect_left(points, high + 1) + self.size
+            while left < right:
+                if left & 1:
+                    self.nodes.setdefault(left, []).append(rule_id)
+                    left += 1
+                if right & 1:
+                    right -= 1
+                    self.nodes.setdefault(right, []).append(rule_id)
+                left >>= 1
+                right >>= 1
+    
+    def stab(self, value):
+        """Rule ids whose interval contains value"""
+        segment = bisect.bisect_right(self.points, value) - 1
+        if segment < 0 or segment >= len(self.points) - 1:
+            return []
+        found = []
+        node = segment + self.size
+        nodes = self.nodes
+        while node:
+            rule_ids = nodes.get(node)
+            if rule_ids:
+                found.extend(rule_ids)
+            node >>= 1
+        return found
+
+
+class ChainIndex:
+    """
+    Candidate index for one chain.
+    
+    Each rule is indexed on its most selective field (protocol, source,
+    destination or a port); rules that restrict nothing much go to a short
+    always-checked list. A lookup stabs every field index with the packet's
+    value and verifies only the candidates, in rule order.
+    """
+    
+    WILDCARD_SELECTIVITY = 0.5
+    
+    def __init__(self, rules):
+        self.rules = rules
+        items = {field: [] for field in FirewallRule.FIELDS}
+        self.wildcard = []
+        for rule_id, rule in enumerate(rules):
+            field = min(FirewallRule.FIELDS, key=rule.selectivity)
+            if rule.selectivity(field) > self.WILDCARD_SELECTIVITY:
+                self.wildcard.append(rule_id)
+                continue
+            for low, high in getattr(rule, field):
+                items[field].append((low, high, rule_id))
+        self.indexes = [(FirewallRule.FIELDS.index(field) + 1, IntervalIndex(entries))
+                        for field, entries in items.items() if entries]
+    
+    def candidates(self, packet):
+        """Rule ids that might match packet, in rule order"""
+        found = set(self.wildcard)
+        for position, index in self.indexes:
+            found.update(index.stab(packet[position]))
+        return sorted(found)
+
+
+class FirewallRuleset:
+    """
+    Rules parsed from iptables-save or `nft list ruleset` output.
+    
+    Answers "what happens to this packet" by walking the chain like the
+    kernel does (first match wins, jumps into user chains, RETURN, chain
+    policies), using a ChainIndex per chain instead of testing every rule.
+    """
+    
+    def __init__(self):
+        self.chains = {}     # (table, chain) -> list of FirewallRule
+        self.policies = {}   # (table, chain) -> policy for built-in chains
+        self.indexes = {}
+    
+    @property
+    def rule_count(self):
+        return sum(len(rules) for rules in self.chains.values())
+    
+    def _chain(self, table, chain, policy=None):
+        self.chains.setdefault((table, chain), [])
+        if policy:
+            self.policies[(table, chain)] = policy.upper()
+        self.indexes.pop((table, chain), None)
+        return self.chains[(table, chain)]
+    
+    def _append(self, rule):
+        rules = self._chain(rule.table, rule.chain)
+        rule.position = len(rules)
+        rules.append(rule)
+    
+    # -- iptables-save --
+    
+    def parse_iptables_save(self, text, family=4):
+        """Parse iptables-save (family=4) or ip6tables-save (family=6) output"""
+        table = 'filter'
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#') or line == 'COMMIT':
+                continue
+            if line.startswith('*'):
+                table = line[1:]
+            elif line.startswith(':'):
+                name, policy = (line[1:].split() + ['-'])[:2]
+                self._chain(table, name, None if policy == '-' else policy)
+            elif line.startswith('-A '):
+                tokens = shlex.split(line) if '"' in line or "'" in line else line.split()
+                try:
+                    self._append(self._parse_iptables_rule(table, tokens, family, line, number))
+                except (ValueError, IndexError) as e:
+                    print(f"Skipping line {number}: {e}")
+        return self
+    
+    def _parse_iptables_rule(self, table, tokens, family, text, number):
+        rule = FirewallRule(table, tokens[1], 0, text, number)
+        rule.set_family(family)
+        negate = False
+        in_target = False
+        i = 2
+        while i < len(tokens):
+            option = tokens[i]
+            i += 1
+            if option == '!':
+                negate = True
+                continue
+            if option.startswith('-'):
+                value = tokens[i] if i < len(tokens) else None
+            
+            if option in ('-s', '--source', '--src', '-d', '--destination', '--dst',
+                          '--src-range', '--dst-range'):
+                field = 'src' if option.startswith(('-s', '--s')) else 'dst'
+                intervals = []
+                for part in value.split(','):
+                    low, high, version = address_interval(part)
+                    rule.set_family(version)
+                    if high - low + 1 < FAMILY_SIZES[version]:
+                        intervals.append((low, high))
+                if intervals:
+                    rule.add(field, intervals, negate)
+                i += 1
+            elif option in ('-p', '--protocol'):
+                if value.lower() != 'all':
+                    proto = PROTOCOL_NUMBERS.get(value.lower()) or int(value)
+                    rule.add('proto', [(proto, proto)], negate)
+                i += 1
+            elif option in ('--dport', '--destination-port', '--sport', '--source-port',
+                            '--dports', '--destination-ports', '--sports', '--source-ports'):
+                field = 'sport' if option.startswith(('--sport', '--source')) else 'dport'
+                rule.add(field, [port_interval(part) for part in value.split(',')], negate)
+                i += 1
+            elif option in ('-i', '--in-interface', '-o', '--out-interface'):
+                field = 'iif' if option.startswith(('-i', '--in')) else 'oif'
+                setattr(rule, field, value)
+                if negate:
+                    rule.negated.add(field)
+                i += 1
+            elif option in ('-j', '--jump', '-g', '--goto'):
+                rule.target = value
+                rule.goto = option in ('-g', '--goto')
+                in_target = True
+                i += 1
+            elif option in ('-m', '--match'):
+                i += 1  # The match module itself changes nothing; its options do
+            elif option == '--comment':
+                rule.comment = value
+                i += 1
+            elif not in_target:
+                # Unmodelled match: keep it (and its arguments) verbatim
+                extra = [('! ' if negate else '') + option]
+                while i < len(tokens) and not tokens[i].startswith('-') and tokens[i] != '!':
+                    extra.append(tokens[i])
+                    i += 1
+                rule.extras.append(' '.join(extra))
+            negate = False
+        return rule
+    
+    # -- nftables --
+    
+    def parse_nftables(self, text):
+        """Parse `nft list ruleset` output"""
+        table = chain = None
+        table_family = None
+        skip_depth = 0
+        for number, raw in enumerate(text.splitlines(), 1):
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+            if skip_depth:
+                skip_depth += line.count('{') - line.count('}')
+                continue
+            words = line.split()
+            if words[0] == 'table':
+                # 'table filter {' without a family is an ip (IPv4) table. Tables are
+                # keyed '<family> <name>': 'ip filter' and 'ip6 filter' are separate
+                family = words[1] if len(words) > 3 else 'ip'
+                table_family = NFT_TABLE_FAMILIES.get(family)
+                table = f"{family} {words[-2]}"
+            elif words[0] == 'chain' and table:
+                chain = words[1]
+                self._chain(table, chain)
+            elif words[0] in ('set', 'map', 'flowtable', 'counter', 'quota') and chain is None:
+                skip_depth = line.count('{') - line.count('}')
+            elif line == '}':
+                if chain is not None:
+                    chain = None
+                else:
+                    table = None
+            elif chain is not None and words[0] == 'type':
+                policy = re.search(r'policy (\w+)', line)
+                if policy:
+                    self.policies[(table, chain)] = NFT_VERDICTS.get(policy.group(1), policy.group(1).upper())
+            elif chain is not None:
+                try:
+                    self._append(self._parse_nft_rule(table, chain, table_family, line, number))
+                except (ValueError, IndexError) as e:
+                    print(f"Skipping line {number}: {e}")
+        return self
+    
+    def _parse_nft_rule(self, table, chain, family, text, number):
+        rule = FirewallRule(table, chain, 0, text, number)
+        rule.set_family(family)
+        tokens = NFT_TOKEN.findall(text)
+        
+        def values(token):
+            token = token.strip('{}')
+            return [v.strip().strip('"') for v in token.split(',') if v.strip()]
+        
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            negate = i < len(tokens) and tokens[i] == '!='
+            
+            if token in ('ip', 'ip6') and i < len(tokens) and tokens[i] in ('saddr', 'daddr'):
+                field = 'src' if tokens[i] == 'saddr' else 'dst'
+                i += 2 if tokens[i + 1] in ('!=', '==') else 1
+                rule.set_family(4 if token == 'ip' else 6)
+                if tokens[i].startswith('@'):
+                    # Named set: contents live outside the rule
+                    rule.extras.append(f"{token} {field} {tokens[i]}")
+                else:
+                    intervals = [address_interval(value)[:2] for value in values(tokens[i])]
+                    rule.add(field, intervals, tokens[i - 1] == '!=')
+                i += 1
+            elif token in ('tcp', 'udp', 'sctp', 'th') and i < len(tokens) and tokens[i] in ('sport', 'dport'):
+                field = tokens[i]
+                i += 2 if tokens[i + 1] in ('!=', '==') else 1
+                if token != 'th' and rule.proto is None:
+                    proto = PROTOCOL_NUMBERS[token]
+                    rule.add('proto', [(proto, proto)])
+                rule.add(field, [port_interval(v, '-') for v in values(tokens[i])],
+                         tokens[i - 1] == '!=')
+                i += 1
+            elif token in ('meta', 'ip', 'ip6') and i < len(tokens) and tokens[i] in ('l4proto', 'protocol', 'nexthdr'):
+                i += 2 if tokens[i + 1] in ('!=', '==') else 1
+                protos = [PROTOCOL_NUMBERS.get(v) or int(v) for v in values(tokens[i])]
+                rule.proto = None
+                rule.add('proto', [(p, p) for p in protos], tokens[i - 1] == '!=')
+                if token != 'meta':
+                    rule.set_family(4 if token == 'ip' else 6)
+                i += 1
+            elif token == 'meta' and i < len(tokens) and tokens[i] in ('iif', 'oif', 'iifname', 'oifname'):
+                continue  # 'meta iifname "lo"' == 'iifname "lo"'
+            elif token in ('iif', 'oif', 'iifname', 'oifname'):
+                if negate:
+                    i += 1
+                field = 'iif' if token.startswith('i') else 'oif'
+                setattr(rule, field, tokens[i].strip('"').replace('*', '+'))
+                if negate:
+                    rule.negated.add(field)
+                i += 1
+            elif token in NFT_VERDICTS:
+                rule.target = NFT_VERDICTS[token]
+                if token == 'reject':
+                    while i < len(tokens) and tokens[i] != 'comment':
+                        i += 1  # 'reject with icmpx type ...'
+            elif token in ('jump', 'goto'):
+                rule.target = tokens[i]
+                rule.goto = token == 'goto'
+                i += 1
+            elif token == 'counter':
+                while i + 1 < len(tokens) and tokens[i] in ('packets', 'bytes'):
+                    i += 2
+            elif token == 'comment':
+                rule.comment = tokens[i].strip('"')
+                i += 1
+            elif token == 'log':
+                while i < len(tokens) and tokens[i] in ('prefix', 'level', 'flags', 'group'):
+                    i += 2
+            else:
+                # Unmodelled expression (ct state, limit, mark, ...): keep the rest of it
+                extra = [token]
+                while (i < len(tokens) and tokens[i] not in NFT_VERDICTS
+                       and tokens[i] not in ('jump', 'goto', 'counter', 'log', 'comment')):
+                    extra.append(tokens[i])
+                    i += 1
+                rule.extras.append(' '.join(extra))
+        return rule
+    
+    # -- Evaluation --
+    
+    def _index(self, key):
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = ChainIndex(self.chains[key])
+        return index
+    
+    def resolve_chain(self, table, chain):
+        """Find a chain by name, falling back to a case-insensitive match (INPUT vs input)"""
+        if (table, chain) in self.chains:
+            return chain
+        for known_table, name in self.chains:
+            if known_table == table and name.lower() == chain.lower():
+                return name
+        raise KeyError(f"No chain {chain} in table {table}")
+    
+    def resolve_tables(self, table, chain, family):
+        """
+        (table, chain) pairs a packet of this family traverses
+        
+        An exact table key ('filter' from iptables, or 'inet filter') is used
+        as is. A bare nftables name like 'filter' means every table of that
+        name the packet's family hooks into: 'ip'/'ip6' first, then 'inet'.
+        """
+        if any(known_table == table for known_table, _ in self.chains):
+            return [(table, self.resolve_chain(table, chain))]
+        families = ('ip', 'inet') if family == 4 else ('ip6', 'inet')
+        found = []
+        for name in families:
+            try:
+                found.append((f"{name} {table}", self.resolve_chain(f"{name} {table}", chain)))
+            except KeyError:
+                continue
+        if not found:
+            raise KeyError(f"No chain {chain} in table {table}")
+        return found
+    
+    def make_packet(self, src, dst, protocol='tcp', sport=0, dport=0, in_interface=None,
+                    out_interface=None):
+        """Build the tuple lookup() expects"""
+        src, family = encode_address(src)
+        dst, _ = encode_address(dst)
+        proto = PROTOCOL_NUMBERS.get(str(protocol).lower())
+        if proto is None:
+            proto = int(protocol)
+        return (family, proto, src, dst, sport, dport, in_interface, out_interface)
+    
+    def lookup(self, packet, chain='INPUT', table='filter', linear=False):
+        """
+        Decide a packet's fate in a chain
+        
+        Args:
+            packet (tuple): From make_packet()
+            linear (bool): Test every rule in order instead of using the index
+        
+        Returns:
+            tuple: (verdict, deciding FirewallRule or None when the chain policy applied)
+        """
+        # Like the kernel, an accept only ends one table's chain; a drop anywhere is final
+        for table, chain in self.resolve_tables(table, chain, packet[0]):
+            verdict, rule = self._walk(packet, table, chain, linear, 0)
+            if verdict is None:
+                verdict = self.policies.get((table, chain), 'ACCEPT')
+            if verdict != 'ACCEPT':
+                break
+        return verdict, rule
+    
+    def _walk(self, packet, table, chain, linear, depth):
+        if depth > 32:
+            raise RecursionError(f"Chain jumps nested too deep at {chain}")
+        key = (table, chain)
+        rules = self.chains[key]
+        rule_ids = range(len(rules)) if linear else self._index(key).candidates(packet)
+        
+        for rule_id in rule_ids:
+            rule = rules[rule_id]
+            if not rule.matches(packet):
+                continue
+            target = rule.target
+            if target in TERMINAL_TARGETS:
+                return target, rule
+            if target == 'RETURN':
+                return None, None
+            if (table, target) in self.chains:
+                verdict, decided = self._walk(packet, table, target, linear, depth + 1)
+                if verdict is not None or rule.goto:
+                    return verdict, decided
+            # Non-terminating targets (LOG, MARK, ...) fall through to the next rule
+        return None, None
+    
+    # -- Analysis --
+    
+    def find_anomalies(self):
+        """
+        Rules that can never match because an earlier rule covers them
+        
+        'shadowed': the earlier rule has a different verdict (likely a bug);
+        'redundant': same verdict, the rule can be deleted.
+        Each rule's covering candidates come from the chain index (stabbed
+        at the rule's lowest corner), so this is not a pairwise comparison.
+        """
+        anomalies = []
+        for key, rules in self.chains.items():
+            index = self._index(key)
+            for rule in rules:
+                corner = (rule.family or 4,
+                          rule.proto[0][0] if rule.proto else 0,
+                          rule.src[0][0] if rule.src else 0,
+                          rule.dst[0][0] if rule.dst else 0,
+                          rule.sport[0][0] if rule.sport else 0,
+                          rule.dport[0][0] if rule.dport else 0,
+                          None, None)
+                for rule_id in index.candidates(corner):
+                    if rule_id >= rule.position:
+                        break
+                    earlier = rules[rule_id]
+                    if earlier.target not in TERMINAL_TARGETS or not earlier.covers(rule):
+                        continue
+                    anomalies.append({
+                        'type': 'redundant' if earlier.target == rule.target else 'shadowed',
+                        'table': key[0],
+                        'chain': key[1],
+                        'rule': rule.position,
+                        'rule_text': rule.text,
+                        'covered_by': earlier.position,
+                        'covered_by_text': earlier.text,
+                    })
+                    break
+        return anomalies
+
+
 class FirewallDemo:
     """Demonstrate firewall rule concepts (no actual rule modification)"""
     
     def __init__(self):
         self.os_type = platform.system().lower()
         self.rules = []
+        self.ruleset = None
     
     def get_firewall_status(self):
         """Get current firewall status (demonstration only)"""
@@ -378,6 +2647,69 @@ class FirewallDemo:
             print("")
             
         return f"Total rules: {len(self.rules)}"
+    
+    def load_ruleset(self, text=None, path=None, dump_format='auto'):
+        """
+        Load an iptables-save or nftables dump for analysis
+        
+        Args:
+            text (str): Dump contents
+            path (str): File to read instead (neither = read the live iptables-save output)
+            dump_format (str): 'iptables', 'ip6tables', 'nftables' or 'auto'
+        """
+        if text is None and path:
+            with open(path) as f:
+                text = f.read()
+        elif text is None:
+            try:
+                text = subprocess.check_output(["iptables-save"], stderr=subprocess.STDOUT,
+                                               universal_newlines=True)
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Could not read iptables-save output (may need sudo privileges): {e}")
+                return None
+        
+        if dump_format == 'auto':
+            nft = re.search(r'^\s*table\s', text, re.MULTILINE)
+            dump_format = 'nftables' if nft else 'iptables'
+        
+        start = time.monotonic()
+        self.ruleset = FirewallRuleset()
+        if dump_format == 'nftables':
+            self.ruleset.parse_nftables(text)
+        else:
+            self.ruleset.parse_iptables_save(text, family=6 if dump_format == 'ip6tables' else 4)
+        print(f"Loaded {self.ruleset.rule_count} rules in {len(self.ruleset.chains)} chains "
+              f"({dump_format}) in {time.monotonic() - start:.2f}s")
+        return self.ruleset
+    
+    def check_packet(self, src, dst, protocol='tcp', sport=0, dport=0, chain='INPUT',
+                     table='filter', in_interface=None, out_interface=None):
+        """Show which loaded rule decides a packet"""
+        if self.ruleset is None:
+            return "No ruleset loaded"
+        packet = self.ruleset.make_packet(src, dst, protocol, sport, dport,
+                                          in_interface, out_interface)
+        verdict, rule = self.ruleset.lookup(packet, chain, table)
+        reason = f"rule {rule.position} in {rule.chain}: {rule.text}" if rule else "chain policy"
+        print(f"{protocol.upper()} {src}:{sport} -> {dst}:{dport} => {verdict} ({reason})")
+        return verdict
+    
+    def analyze_ruleset(self, limit=10):
+        """Report shadowed and redundant rules in the loaded ruleset"""
+        if self.ruleset is None:
+            return []
+        start = time.monotonic()
+        anomalies = self.ruleset.find_anomalies()
+        shadowed = [a for a in anomalies if a['type'] == 'shadowed']
+        print(f"Analyzed {self.ruleset.rule_count} rules in {time.monotonic() - start:.2f}s: "
+              f"{len(shadowed)} shadowed, {len(anomalies) - len(shadowed)} redundant")
+        for anomaly in anomalies[:limit]:
+            print(f"  {anomaly['type'].upper()}: {anomaly['chain']} rule {anomaly['rule']} "
+                  f"({anomaly['rule_text']}) is covered by rule {anomaly['covered_by']} "
+                  f"({anomaly['covered_by_text']})")
+        if len(anomalies) > limit:
+            print(f"  ... and {len(anomalies) - limit} more")
+        return anomalies
 
 
 # ---- Demo ----
@@ -389,7 +2721,13 @@ def demonstrate_network_security():
     print("1. Port Scanner Demo")
     print("Note: We'll scan localhost for the demo")
     scanner = PortScanner("localhost")
-    scanner.scan_port_range(80, 100)  # Small range for demo
+    scanner.scan_port_range(80, 100, grab_banners=True)  # Small range for demo
+    
+    # Several targets at once: probes are interleaved across hosts
+    scheduler = ScanScheduler(host_concurrency=5, timeout=0.5)
+    results = scheduler.scan(["localhost", "127.0.0.0/30"], "top20")
+    for target, ports in results.items():
+        print(f"{target}: open ports {ports if ports else 'none'}")
     print("")
     
     # 2. Packet Sniffer (limited capture)
@@ -401,6 +2739,9 @@ def demonstrate_network_security():
         sniffer.start_capture(packet_count=3, filter_str="tcp")
     except Exception as e:
         print(f"Could not run packet capture: {e}")
+    
+    # Raw-socket capture aggregated into flows instead of printing every packet
+    sniffer.capture_flows(filter_str="tcp", duration=3, summary_interval=1, top=5)
     print("")
     
     # 3. TLS Certificate Verification
@@ -408,6 +2749,13 @@ def demonstrate_network_security():
     verifier = TLSVerifier()
     # Use a well-known HTTPS site
     verifier.verify_cert("www.python.org")
+    
+    # Many endpoints at once: expiry/issuer/SAN inventory
+    cert_scanner = CertificateScanner(concurrency=20, timeout=5.0)
+    cert_scanner.scan(["www.python.org", "pypi.org:443", "github.com"])
+    for record in cert_scanner.records:
+        print(f"{record['host']}:{record['port']} {record['status']} "
+              f"expires {record['not_after']} ({record['days_left']} days)")
     print("")
     
     # 4. Firewall Rules Demo
@@ -420,6 +2768,22 @@ def demonstrate_network_security():
     fw.demo_add_rule("Allow HTTP", 80, "tcp", "allow", "in")
     fw.demo_add_rule("Block Telnet", 23, "tcp", "deny", "in")
     fw.list_demo_rules()
+    
+    # Analyze a sample iptables-save dump (pass path= or no text for a real one)
+    sample_rules = "\n".join([
+        "*filter",
+        ":INPUT DROP [0:0]",
+        "-A INPUT -i lo -j ACCEPT",
+        "-A INPUT -s 10.0.0.0/8 -p tcp -m tcp --dport 22 -j ACCEPT",
+        "-A INPUT -s 10.2.3.4/32 -p tcp -m tcp --dport 22 -j DROP",
+        "-A INPUT -p tcp -m multiport --dports 80,443 -j ACCEPT",
+        "COMMIT",
+    ])
+    print("\nSample ruleset analysis:")
+    fw.load_ruleset(sample_rules)
+    fw.check_packet("10.2.3.4", "10.0.0.1", "tcp", 50000, 22)
+    fw.check_packet("203.0.113.9", "10.0.0.1", "tcp", 50000, 3389)
+    fw.analyze_ruleset()
 
 
 if __name__ == "__main__":
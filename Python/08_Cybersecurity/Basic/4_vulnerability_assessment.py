@@ -11,85 +11,550 @@ This script demonstrates basic vulnerability assessment concepts in Python:
 
 import re
 import os
+import sys
+import html
 import hashlib
+import csv
+import json
+import zlib
+import math
+import mmap
+import heapq
+import struct
+import tempfile
 import time
-import urllib.parse
+import threading
+import asyncio
+import itertools
+import posixpath
+import sqlite3
+import select
+import ctypes
+import ctypes.util
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
+import lxml.html
+from collections import deque, namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urljoin, urlsplit, urlunsplit, urlencode, parse_qsl
+from stat import S_ISREG
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from datetime import datetime
 
 # ---- 1. Web Vulnerability Scanner ----
 
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url, base=None):
+    """
+    Canonical form of a URL for deduplication
+    
+    Resolves the URL against base, lowercases scheme and host, drops the
+    default port, dot segments and fragment, and sorts the query string.
+    
+    Args:
+        url (str): Absolute or relative URL
+        base (str): Page the URL was found on
+        
+    Returns:
+        str: Normalized URL, or None for non-HTTP links (mailto:, javascript:, ...)
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    host = f"[{parts.hostname}]" if ':' in parts.hostname else parts.hostname
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    
+    path = parts.path or '/'
+    if '/.' in path:
+        trailing = path.endswith(('/', '/.', '/..'))
+        path = '/' + posixpath.normpath(path).lstrip('/')
+        if trailing and path != '/':
+            path += '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+# Headers describing the body itself; a 304 doesn't replace them
+BODY_HEADERS = {'content-length', 'content-encoding', 'transfer-encoding'}
+
+
+class ResponseCache:
+    """
+    GET responses keyed by URL, revalidated with ETag / Last-Modified.
+    
+    An entry keeps the response headers plus whatever the caller derived
+    from the body (links and forms from a crawl, signatures from a fuzzing
+    baseline) - not the body itself. Within one run a URL is fetched at
+    most once; in later runs a 304 lets callers reuse the stored results
+    without downloading or parsing the page again. With a path, entries
+    that have a validator are persisted as JSON.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.fresh = set()  # Keys fetched or revalidated during this run
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+    
+    def fetch(self, session, url, timeout=5, params=None, need=()):
+        """
+        GET url, reusing or revalidating a stored copy
+        
+        Args:
+            session (requests.Session): Session to send the request through
+            url (str): URL to fetch
+            timeout (float): Request timeout in seconds
+            params (dict): Query parameters
+            need (tuple): Keys of entry['data'] the caller wants reused
+            
+        Returns:
+            tuple: (entry, response) - response is None when the entry was
+            reused and already holds everything in need
+        """
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        with self.lock:
+            entry = self.entries.get(key)
+            usable = entry is not None and all(name in entry['data'] for name in need)
+            if usable and key in self.fresh:
+                self.hits += 1
+                return entry, None
+        
+        headers = {}
+        if usable and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if usable and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        response = session.get(url, params=params, headers=headers, timeout=timeout)
+        
+        with self.lock:
+            self.fresh.add(key)
+            if response.status_code == 304 and usable:
+                self.revalidated += 1
+                entry['headers'].update((name, value) for name, value in response.headers.items()
+                                        if name.lower() not in BODY_HEADERS)
+                entry['etag'] = response.headers.get('ETag', entry['etag'])
+                entry['last_modified'] = response.headers.get('Last-Modified', entry['last_modified'])
+                entry['checked'] = time.time()
+                return entry, None
+            
+            self.misses += 1
+            entry = {
+                'url': response.url,
+                'status': response.status_code,
+                'headers': dict(response.headers),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'no_store': 'no-store' in response.headers.get('Cache-Control', ''),
+                'checked': time.time(),
+                'data': {}
+            }
+            self.entries[key] = entry
+            return entry, response
+    
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+    
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            saved = {key: entry for key, entry in self.entries.items()
+                     if (entry['etag'] or entry['last_modified']) and not entry['no_store']}
+            with open(self.path, 'w') as f:
+                json.dump(saved, f)
+
+
+XSS_PAYLOADS = [
+    '<script>alert("XSS")</script>',
+    '"><script>alert("XSS")</script>',
+    '"><img src=x onerror=alert("XSS")>',
+    '"><svg/onload=alert("XSS")>'
+]
+
+SQLI_PAYLOADS = [
+    "' OR '1'='1",
+    "\" OR \"1\"=\"1",
+    "' OR '1'='1' --",
+    "'; DROP TABLE users; --"
+]
+
+# Database error messages leaking into a page (MySQL, PostgreSQL, MSSQL, Oracle, SQLite, generic drivers)
+SQL_ERROR_SIGNATURES = [
+    r"you have an error in your sql syntax",
+    r"warning: mysql_\w+",
+    r"unclosed quotation mark after the character string",
+    r"quoted string not properly terminated",
+    r"syntax error at or near",
+    r"pg_query\(\)",
+    r"ora-\d{5}",
+    r"microsoft ole db provider for",
+    r"odbc sql server driver",
+    r"sqlite3?\.operationalerror",
+    r"unrecognized token:",
+    r"near (?:\"|&quot;).{0,40}?(?:\"|&quot;): syntax error",  # Often HTML-escaped
+    r"sqlstate\[\w+\]",
+]
+
+FUZZ_KINDS = {'xss': XSS_PAYLOADS, 'sqli': SQLI_PAYLOADS}
+
+# Input types that take free text
+FUZZABLE_TYPES = {'text', 'password', 'search', 'email', 'url', 'tel', ''}
+
+# One pass over a response finds both raw payload reflections and SQL errors
+RESPONSE_SIGNATURES = re.compile(
+    f"(?P<xss>{'|'.join(re.escape(payload) for payload in XSS_PAYLOADS)})"
+    f"|(?P<sqli>{'|'.join(SQL_ERROR_SIGNATURES)})",
+    re.IGNORECASE)
+
+
+class RateLimiter:
+    """Token bucket limiting how many requests start per second"""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate / 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a token is available"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PayloadFuzzer:
+    """
+    Submit XSS and SQL injection payloads to form fields and look for proof.
+    
+    The form x field x payload matrix is generated lazily as "lanes", one per
+    (form, field, kind); lanes run concurrently but each sends its payloads
+    one at a time, so a lane stops at its first confirmed hit. A hit is a
+    payload reflected unescaped, or a SQL error signature that the form's
+    baseline response (benign values) didn't already contain.
+    """
+    
+    def __init__(self, session=None, concurrency=8, rate=None, timeout=5, cache=None):
+        """
+        Initialize fuzzer
+        
+        Args:
+            session (requests.Session): Pooled session to send requests through
+            concurrency (int): Requests in flight at once
+            rate (float): Maximum requests per second (None = unlimited)
+            timeout (float): Per-request timeout in seconds
+            cache (ResponseCache): Reuses baseline results of GET forms
+        """
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.timeout = timeout
+        self.requests_sent = 0
+        self.payloads_skipped = 0
+    
+    @staticmethod
+    def unique_forms(forms):
+        """The same form usually appears on many pages; fuzz each one once"""
+        unique = {}
+        for form in forms:
+            names = tuple(sorted(i['name'] for i in form['inputs'] if i['name']))
+            unique.setdefault((form['method'], form['action'], names), form)
+        return list(unique.values())
+    
+    @staticmethod
+    def fuzzable_fields(form):
+        return [i['name'] for i in form['inputs']
+                if i['name'] and (i['type'] or '').lower() in FUZZABLE_TYPES]
+    
+    def lanes(self, forms, kinds):
+        """Lazily yield (form, field, kind) combinations to fuzz"""
+        for form in forms:
+            for field in self.fuzzable_fields(form):
+                for kind in kinds:
+                    yield form, field, kind
+    
+    @staticmethod
+    def form_data(form, field=None, payload=None):
+        """Values to submit: payload in field, benign values elsewhere"""
+        data = {}
+        for input_field in form['inputs']:
+            if not input_field['name']:
+                continue
+            if input_field['name'] == field:
+                data[field] = payload
+            elif input_field['value'] or (input_field['type'] or '').lower() not in FUZZABLE_TYPES:
+                data[input_field['name']] = input_field['value']
+            else:
+                data[input_field['name']] = 'test'
+        return data
+    
+    def submit(self, form, field=None, payload=None):
+        """Send the form with payload in field; returns the response body"""
+        data = self.form_data(form, field, payload)
+        try:
+            if form['method'] == 'post':
+                response = self.session.post(form['action'], data=data, timeout=self.timeout)
+            else:
+                response = self.session.get(form['action'], params=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error requesting {form['action']}: {e}")
+            return None
+        return response.text
+    
+    def baseline(self, form):
+        """Signatures in the form's response to benign input"""
+        if self.cache is None or form['method'] == 'post':
+            return self.signatures(self.submit(form))
+        try:
+            entry, response = self.cache.fetch(self.session, form['action'], self.timeout,
+                                               params=self.form_data(form), need=('signatures',))
+        except requests.RequestException as e:
+            print(f"Error requesting {form['action']}: {e}")
+            return set()
+        if response is not None:
+            entry['data']['signatures'] = sorted(self.signatures(response.text))
+        return {tuple(signature) for signature in entry['data']['signatures']}
+    
+    @staticmethod
+    def signatures(text):
+        """(kind, matched text) pairs found in a response"""
+        if not text:
+            return set()
+        return {(match.lastgroup, match.group().lower()) for match in RESPONSE_SIGNATURES.finditer(text)}
+    
+    def _probe(self, form, field, kind, payload, baseline):
+        """Send one payload and return the evidence confirming it, if any"""
+        for found_kind, evidence in self.signatures(self.submit(form, field, payload)) - baseline:
+            if found_kind != kind:
+                continue
+            if kind == 'xss' and evidence != payload.lower():
+                continue  # Another payload, e.g. stored by an earlier request
+            return evidence
+        return None
+    
+    def run(self, forms, kinds=('xss', 'sqli')):
+        """
+        Fuzz every text field of every form
+        
+        Args:
+            forms (list): Form dicts as collected by WebVulnScanner.crawl
+            kinds (tuple): Payload families to send ('xss', 'sqli')
+            
+        Returns:
+            list: Findings (form, field, kind, payload, evidence)
+        """
+        forms = self.unique_forms(forms)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return asyncio.run(self._run(forms, kinds, executor))
+    
+    async def _run(self, forms, kinds, executor):
+        loop = asyncio.get_running_loop()
+        limiter = RateLimiter(self.rate) if self.rate else None
+        
+        async def send(function, *args):
+            if limiter:
+                await limiter.acquire()
+            self.requests_sent += 1
+            return await loop.run_in_executor(executor, function, *args)
+        
+        # What each form returns for benign input, so static error text isn't reported
+        found = await asyncio.gather(*(send(self.baseline, form) for form in forms))
+        baselines = {id(form): signatures for form, signatures in zip(forms, found)}
+        
+        findings = []
+        lanes = self.lanes(forms, kinds)
+        active = {}
+        
+        def advance(lane, payloads):
+            payload = next(payloads, None)
+            if payload is not None:
+                form, field, kind = lane
+                task = asyncio.ensure_future(send(self._probe, form, field, kind, payload,
+                                                  baselines[id(form)]))
+                active[task] = (lane, payloads, payload)
+        
+        while True:
+            for lane in itertools.islice(lanes, self.concurrency - len(active)):
+                advance(lane, iter(FUZZ_KINDS[lane[2]]))
+            if not active:
+                break
+            
+            done, _ = await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                lane, payloads, payload = active.pop(task)
+                evidence = task.result()
+                if evidence is None:
+                    advance(lane, payloads)
+                    continue
+                form, field, kind = lane
+                findings.append({'form': form, 'field': field, 'kind': kind,
+                                 'payload': payload, 'evidence': evidence})
+                self.payloads_skipped += sum(1 for _ in payloads)
+        return findings
+
+
 class WebVulnScanner:
     """Simple web vulnerability scanner to detect common web vulnerabilities"""
     
-    def __init__(self, base_url, max_urls=10):
-        """Initialize with the target URL"""
-        self.base_url = base_url
+    def __init__(self, base_url, max_urls=10, concurrency=10, per_host=4, timeout=5, cache_file=None):
+        """
+        Initialize with the target URL
+        
+        Args:
+            base_url (str): Where crawling starts; only this host is crawled
+            max_urls (int): Maximum pages fetched
+            concurrency (int): Requests in flight at once
+            per_host (int): Requests in flight to any single host
+            timeout (float): Per-request timeout in seconds
+            cache_file (str): Keeps responses between runs for conditional requests
+        """
+        self.base_url = normalize_url(base_url) or base_url
         self.max_urls = max_urls  # Limit URLs to scan for the demo
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
         self.visited_urls = set()
-        self.urls_to_visit = [base_url]
+        self.seen_urls = {self.base_url}
+        self.urls_to_visit = deque([(self.base_url, 0)])  # (url, depth) frontier
         self.forms = []
         self.vulnerabilities = []
+        self.pages_parsed = 0
         
         # Parse base URL to restrict crawling to same domain
-        parsed_url = urlparse(base_url)
-        self.domain = parsed_url.netloc
+        self.domain = urlsplit(self.base_url).netloc
+        
+        # One keep-alive pool shared by every request the scanner makes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.cache = ResponseCache(cache_file)
     
     def crawl(self, max_depth=2):
-        """Crawl website to find forms and links"""
+        """
+        Crawl website to find forms and links
+        
+        Pages are fetched concurrently through the pooled session; links are
+        followed breadth-first until they are max_depth clicks away from the
+        base URL or max_urls pages have been fetched.
+        """
         print(f"Crawling {self.base_url} (limited to {self.max_urls} URLs)...")
+        start = time.monotonic()
         
-        depth = 0
-        while self.urls_to_visit and len(self.visited_urls) < self.max_urls and depth < max_depth:
-            url = self.urls_to_visit.pop(0)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            asyncio.run(self._crawl(max_depth, executor))
             
-            if url in self.visited_urls:
-                continue
-                
-            print(f"Visiting: {url}")
+        self.cache.save()
+        print(f"Crawling completed. Found {len(self.forms)} forms across {len(self.visited_urls)} pages "
+              f"in {time.monotonic() - start:.2f}s ({self.cache.revalidated} unchanged since the last run)")
+    
+    async def _crawl(self, max_depth, executor):
+        """Schedule fetches from the frontier, keeping the concurrency limits"""
+        loop = asyncio.get_running_loop()
+        host_limits = {}
+        pending = set()
+        requested = len(self.visited_urls)
+        
+        while self.urls_to_visit or pending:
+            while self.urls_to_visit and len(pending) < self.concurrency and requested < self.max_urls:
+                url, depth = self.urls_to_visit.popleft()
+                limit = host_limits.setdefault(urlsplit(url).netloc, asyncio.Semaphore(self.per_host))
+                pending.add(asyncio.ensure_future(self._visit(loop, executor, limit, url, depth)))
+                requested += 1
+            if not pending:
+                break
             
-            try:
-                response = requests.get(url, timeout=5)
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, depth, links, forms = task.result()
+                if links is None:
+                    continue
                 self.visited_urls.add(url)
-                
-                if response.status_code == 200 and 'text/html' in response.headers.get('Content-Type', ''):
-                    # Extract forms
-                    self._extract_forms(url, response.text)
-                    
-                    # Extract links for further crawling
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    for a_tag in soup.find_all('a', href=True):
-                        href = a_tag['href']
-                        full_url = urljoin(url, href)
-                        
-                        # Only follow links on the same domain
-                        if urlparse(full_url).netloc == self.domain and full_url not in self.visited_urls:
-                            self.urls_to_visit.append(full_url)
-            
-            except requests.RequestException as e:
-                print(f"Error requesting {url}: {e}")
-                
-            depth += 1
-            
-        print(f"Crawling completed. Found {len(self.forms)} forms across {len(self.visited_urls)} pages")
+                self.forms.extend(forms)
+                if depth >= max_depth:
+                    continue
+                for link in links:
+                    if link not in self.seen_urls and urlsplit(link).netloc == self.domain:
+                        self.seen_urls.add(link)
+                        self.urls_to_visit.append((link, depth + 1))
+    
+    async def _visit(self, loop, executor, limit, url, depth):
+        async with limit:
+            links, forms = await loop.run_in_executor(executor, self._fetch_page, url)
+        return url, depth, links, forms
+    
+    def _fetch_page(self, url):
+        """Fetch and parse one page (runs in a worker thread); returns (links, forms)"""
+        print(f"Visiting: {url}")
+        try:
+            entry, response = self.cache.fetch(self.session, url, self.timeout, need=('links', 'forms'))
+        except requests.RequestException as e:
+            print(f"Error requesting {url}: {e}")
+            return None, None
+        if response is None:
+            return entry['data']['links'], entry['data']['forms']
+        
+        links, forms = [], []
+        if response.status_code == 200 and 'text/html' in response.headers.get('Content-Type', ''):
+            links, forms = self._parse_page(response.url, response.content)
+        entry['data'].update(links=links, forms=forms)
+        return links, forms
     
-    def _extract_forms(self, url, html_content):
-        """Extract forms from HTML content"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        found_forms = soup.find_all('form')
+    def _parse_page(self, url, html_content):
+        """Extract normalized links and forms from one parse of the page"""
+        try:
+            document = lxml.html.fromstring(html_content)
+        except (lxml.etree.ParserError, ValueError):
+            return [], []
+        self.pages_parsed += 1
         
-        for form in found_forms:
+        base_tag = document.find('.//base[@href]')
+        base = urljoin(url, base_tag.get('href')) if base_tag is not None else url
+        
+        links = []
+        for href in document.xpath('//a/@href'):
+            link = normalize_url(href, base)
+            if link:
+                links.append(link)
+        
+        forms = []
+        for form in document.iter('form'):
             form_info = {
                 'url': url,
-                'method': form.get('method', 'get').lower(),
-                'action': urljoin(url, form.get('action', '')),
+                'method': (form.get('method') or 'get').lower(),
+                'action': urljoin(base, form.get('action', '')),
                 'inputs': []
             }
             
             # Extract form inputs
-            for input_field in form.find_all(['input', 'textarea']):
+            for input_field in form.iter('input', 'textarea'):
                 input_info = {
                     'name': input_field.get('name', ''),
                     'type': input_field.get('type', 'text'),
@@ -97,96 +562,63 @@ class WebVulnScanner:
                 }
                 form_info['inputs'].append(input_info)
                 
-            self.forms.append(form_info)
-    
-    def scan_xss_vulnerabilities(self):
-        """Scan for potential XSS vulnerabilities in forms"""
-        print("\nScanning for XSS vulnerabilities...")
-        xss_payloads = [
-            '<script>alert("XSS")</script>',
-            '"><script>alert("XSS")</script>',
-            '"><img src=x onerror=alert("XSS")>',
-            '"><svg/onload=alert("XSS")>'
-        ]
-        
-        for form in self.forms:
-            print(f"Checking form on {form['url']}")
-            
-            # Try each XSS payload
-            for payload in xss_payloads:
-                # Create data dict for the form submission
-                data = {}
-                for input_field in form['inputs']:
-                    # Skip hidden, submit, button fields
-                    if input_field['type'] in ['hidden', 'submit', 'button']:
-                        continue
-                    
-                    # Use the payload for text/password fields
-                    if input_field['type'] in ['text', 'password', ''] or input_field['type'] is None:
-                        data[input_field['name']] = payload
-                    else:
-                        data[input_field['name']] = input_field['value']
-                
-                # For GET requests, only simulate and report
-                if form['method'] == 'get':
-                    query_string = '&'.join([f"{k}={urllib.parse.quote(v)}" for k, v in data.items()])
-                    test_url = f"{form['action']}?{query_string}"
-                    
-                    print(f"[Simulated] Testing GET with XSS payload: {test_url}")
-                    self.vulnerabilities.append({
-                        'type': 'Potential XSS (GET)',
-                        'url': form['url'],
-                        'details': f"Form action {form['action']} allows potentially malicious input via GET"
-                    })
-                
-                # For POST requests, only simulate and report
-                else:
-                    print(f"[Simulated] Testing POST with XSS payload to {form['action']}")
-                    self.vulnerabilities.append({
-                        'type': 'Potential XSS (POST)',
-                        'url': form['url'],
-                        'details': f"Form allows potentially malicious input via POST to {form['action']}"
-                    })
+            forms.append(form_info)
+        return links, forms
     
-    def scan_sqli_vulnerabilities(self):
-        """Scan for potential SQL injection vulnerabilities"""
-        print("\nScanning for SQL Injection vulnerabilities...")
+    def fuzz_forms(self, kinds=('xss', 'sqli'), concurrency=8, rate=20):
+        """
+        Fuzz the crawled forms with XSS and/or SQL injection payloads
         
-        sqli_payloads = [
-            "' OR '1'='1",
-            "\" OR \"1\"=\"1",
-            "' OR '1'='1' --",
-            "'; DROP TABLE users; --"
-        ]
+        Only run this against applications you are authorized to test:
+        every payload is really submitted.
         
-        for form in self.forms:
-            print(f"Checking form on {form['url']}")
+        Args:
+            kinds (tuple): Payload families to send ('xss', 'sqli')
+            concurrency (int): Requests in flight at once
+            rate (float): Maximum requests per second (None = unlimited)
             
-            # Try each SQLi payload
-            for payload in sqli_payloads:
-                # Create data dict for the form submission
-                data = {}
-                for input_field in form['inputs']:
-                    # Skip non-text fields
-                    if input_field['type'] not in ['text', 'password', '', None]:
-                        continue
-                    
-                    # Use the payload for the field
-                    data[input_field['name']] = payload
-                
-                # Only simulate the request for demonstration
-                if form['method'] == 'get':
-                    test_url = f"{form['action']}?{urllib.parse.urlencode(data)}"
-                    print(f"[Simulated] Testing GET with SQLi payload: {test_url}")
-                else:
-                    print(f"[Simulated] Testing POST with SQLi payload to {form['action']}")
-                
-                # Add potential vulnerability
-                self.vulnerabilities.append({
-                    'type': 'Potential SQL Injection',
-                    'url': form['url'],
-                    'details': f"Form input might be vulnerable to SQL Injection"
-                })
+        Returns:
+            list: Findings added to the report
+        """
+        fuzzer = PayloadFuzzer(self.session, concurrency=concurrency, rate=rate, timeout=self.timeout,
+                               cache=self.cache)
+        forms = fuzzer.unique_forms(self.forms)
+        print(f"Fuzzing {len(forms)} forms ({', '.join(kinds)})...")
+        start = time.monotonic()
+        findings = fuzzer.run(forms, kinds)
+        self.cache.save()
+        
+        for finding in findings:
+            form = finding['form']
+            if finding['kind'] == 'xss':
+                vuln_type = f"XSS ({form['method'].upper()})"
+                details = f"Field '{finding['field']}' of form {form['action']} reflects payload unescaped"
+            else:
+                vuln_type = 'SQL Injection'
+                details = (f"Field '{finding['field']}' of form {form['action']} triggers a database error "
+                           f"({html.unescape(finding['evidence'])})")
+            print(f"{vuln_type}: {details} [payload: {finding['payload']}]")
+            self.vulnerabilities.append({
+                'type': vuln_type,
+                'url': form['url'],
+                'details': details,
+                'field': finding['field'],
+                'payload': finding['payload'],
+            })
+        
+        print(f"Sent {fuzzer.requests_sent} requests in {time.monotonic() - start:.2f}s, "
+              f"skipped {fuzzer.payloads_skipped} payloads after confirmed hits")
+        return findings
+    
+    def scan_xss_vulnerabilities(self, **options):
+        """Scan forms for reflected XSS"""
+        print("\nScanning for XSS vulnerabilities...")
+        return self.fuzz_forms(('xss',), **options)
+    
+    def scan_sqli_vulnerabilities(self, **options):
+        """Scan forms for error-based SQL injection"""
+        print("\nScanning for SQL Injection vulnerabilities...")
+        return self.fuzz_forms(('sqli',), **options)
     
     def check_security_headers(self):
         """Check for missing security headers"""
@@ -200,12 +632,14 @@ class WebVulnScanner:
             'X-XSS-Protection': 'Missing X-XSS-Protection header'
         }
         
+        # Pages the crawl just downloaded come straight from the cache
         for url in self.visited_urls:
             try:
-                response = requests.get(url, timeout=5)
+                entry, _ = self.cache.fetch(self.session, url, self.timeout)
+                headers = CaseInsensitiveDict(entry['headers'])
                 
                 for header, message in important_headers.items():
-                    if header not in response.headers:
+                    if header not in headers:
                         self.vulnerabilities.append({
                             'type': 'Missing Security Header',
                             'url': url,
@@ -215,6 +649,7 @@ class WebVulnScanner:
             
             except requests.RequestException:
                 pass
+        self.cache.save()
     
     def report_vulnerabilities(self):
         """Generate a report of all found vulnerabilities"""
@@ -246,35 +681,439 @@ class WebVulnScanner:
 
 # ---- 2. Password Strength Checker ----
 
+BREACH_INDEX_MAGIC = b'PWHASH01'
+BREACH_INDEX_HEADER = struct.Struct('<8sIQ')  # magic, prefix bytes, entry count
+BREACH_FANOUT = struct.Struct('<65537I')      # First entry for each leading 2-byte bucket
+BREACH_PREFIX_BYTES = 8                       # 64-bit SHA-1 prefixes: false positives ~ n / 2**64
+SHA1_LINE = re.compile(rb'^([0-9A-Fa-f]{40})(?::\d+)?$')
+
+
+class BreachedPasswordIndex:
+    """
+    Memory-mapped set of breached passwords.
+    
+    The index file holds the sorted, de-duplicated 8-byte SHA-1 prefixes of
+    every password in a wordlist, after a fan-out table of where each leading
+    2-byte bucket starts. A lookup is one hash, one table read and a binary
+    search of a few dozen entries; only the pages touched are read into
+    memory, so even a 100M-entry index costs almost no RSS.
+    """
+    
+    def __init__(self, path):
+        """Open an index built with BreachedPasswordIndex.build()"""
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.prefix_bytes, self.count = BREACH_INDEX_HEADER.unpack_from(self.mm)
+        if magic != BREACH_INDEX_MAGIC:
+            self.mm.close()
+            raise ValueError(f"{path} is not a breached password index")
+        self.data_offset = BREACH_INDEX_HEADER.size + BREACH_FANOUT.size
+    
+    @staticmethod
+    def build(wordlist, output, hashed=False, chunk_size=2000000):
+        """
+        Build an index file from a wordlist with one password per line
+        
+        Wordlists larger than chunk_size are sorted in chunks on disk and
+        merged, so memory stays bounded for any corpus size.
+        
+        Args:
+            wordlist (str): Plain text wordlist, or SHA1[:count] lines when hashed
+            output (str): Index file to write
+            hashed (bool): Lines are hex SHA-1 hashes (Pwned Passwords downloads)
+            chunk_size (int): Hashes sorted in memory at a time
+            
+        Returns:
+            int: Number of unique entries
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            runs = []
+            chunk = []
+            with open(wordlist, 'rb') as f:
+                for line in f:
+                    line = line.rstrip(b'\r\n')
+                    if not line:
+                        continue
+                    if hashed:
+                        match = SHA1_LINE.match(line)
+                        if not match:
+                            continue
+                        chunk.append(bytes.fromhex(match.group(1).decode())[:BREACH_PREFIX_BYTES])
+                    else:
+                        chunk.append(hashlib.sha1(line).digest()[:BREACH_PREFIX_BYTES])
+                    if len(chunk) >= chunk_size:
+                        runs.append(BreachedPasswordIndex._write_run(tmpdir, len(runs), chunk))
+                        chunk = []
+            if chunk or not runs:
+                runs.append(BreachedPasswordIndex._write_run(tmpdir, len(runs), chunk))
+            
+            files = [open(run, 'rb') for run in runs]
+            try:
+                streams = [iter(lambda f=f: f.read(BREACH_PREFIX_BYTES), b'') for f in files]
+                return BreachedPasswordIndex._write_index(output, heapq.merge(*streams))
+            finally:
+                for f in files:
+                    f.close()
+    
+    @staticmethod
+    def _write_run(tmpdir, number, chunk):
+        chunk.sort()
+        path = os.path.join(tmpdir, f'run{number}')
+        with open(path, 'wb') as f:
+            f.write(b''.join(chunk))
+        return path
+    
+    @staticmethod
+    def _write_index(output, prefixes):
+        """Write sorted prefixes (duplicates allowed) as an index file"""
+        counts = [0] * 65536
+        count = 0
+        previous = None
+        with open(output, 'wb') as f:
+            f.write(b'\0' * (BREACH_INDEX_HEADER.size + BREACH_FANOUT.size))
+            buffer = []
+            for prefix in prefixes:
+                if prefix == previous:
+                    continue
+                previous = prefix
+                buffer.append(prefix)
+                counts[prefix[0] << 8 | prefix[1]] += 1
+                count += 1
+                if len(buffer) >= 65536:
+                    f.write(b''.join(buffer))
+                    buffer = []
+            f.write(b''.join(buffer))
+            
+            fanout = [0] + list(itertools.accumulate(counts))
+            f.seek(0)
+            f.write(BREACH_INDEX_HEADER.pack(BREACH_INDEX_MAGIC, BREACH_PREFIX_BYTES, count))
+            f.write(BREACH_FANOUT.pack(*fanout))
+        return count
+    
+    def __len__(self):
+        return self.count
+    
+    def __contains__(self, password):
+        return self.contains_digest(hashlib.sha1(password.encode('utf-8')).digest())
+    
+    def contains_hash(self, sha1_hex):
+        """Check a hex SHA-1 hash instead of a password"""
+        return self.contains_digest(bytes.fromhex(sha1_hex))
+    
+    def contains_digest(self, digest):
+        key = digest[:self.prefix_bytes]
+        size = self.prefix_bytes
+        bucket = key[0] << 8 | key[1]
+        low, high = struct.unpack_from('<2I', self.mm, BREACH_INDEX_HEADER.size + bucket * 4)
+        mm = self.mm
+        base = self.data_offset
+        while low < high:
+            middle = (low + high) // 2
+            position = base + middle * size
+            entry = mm[position:position + size]
+            if entry < key:
+                low = middle + 1
+            elif entry > key:
+                high = middle
+            else:
+                return True
+        return False
+    
+    def export_ranges(self, directory, prefix_length=5):
+        """
+        Write k-anonymity range files, like the Pwned Passwords range API
+        
+        Each file is named after a hash prefix (prefix_length hex characters)
+        and lists the remaining hex characters of every entry under it, so a
+        client only ever reveals the first few characters of its hash. Serve
+        the directory with any static web server and query it with
+        PasswordRangeLookup.
+        
+        Returns:
+            int: Number of range files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        ranges = itertools.groupby(
+            (self.mm[position:position + self.prefix_bytes].hex().upper()
+             for position in range(self.data_offset, self.data_offset + self.count * self.prefix_bytes,
+                                   self.prefix_bytes)),
+            key=lambda digest: digest[:prefix_length])
+        files = 0
+        for prefix, digests in ranges:
+            with open(os.path.join(directory, prefix), 'w') as f:
+                f.writelines(digest[prefix_length:] + '\n' for digest in digests)
+            files += 1
+        return files
+    
+    def close(self):
+        self.mm.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PasswordRangeLookup:
+    """
+    Breached password check through range files (k-anonymity).
+    
+    Only the first prefix_length hex characters of the password's SHA-1 leave
+    the machine. The source is a directory of range files, or a base URL
+    serving them - including https://api.pwnedpasswords.com/range, whose
+    longer suffixes are compared as far as both sides go.
+    """
+    
+    def __init__(self, source, prefix_length=5, session=None, timeout=5):
+        self.source = source.rstrip('/')
+        self.prefix_length = prefix_length
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.ranges = {}
+    
+    def fetch_range(self, prefix):
+        """
+        Suffixes listed under a hash prefix (cached)
+        
+        A missing range (no file, HTTP 404) is empty, as export_ranges skips
+        prefixes without entries. Any other failure raises instead of being
+        cached as an empty range, so a lookup never fails open.
+        
+        Raises:
+            requests.RequestException: If the range could not be fetched
+        """
+        if prefix not in self.ranges:
+            if self.source.startswith(('http://', 'https://')):
+                response = self.session.get(f"{self.source}/{prefix}", timeout=self.timeout)
+                if response.status_code == 404:
+                    text = ''
+                else:
+                    response.raise_for_status()
+                    text = response.text
+            else:
+                try:
+                    with open(os.path.join(self.source, prefix)) as f:
+                        text = f.read()
+                except FileNotFoundError:
+                    text = ''
+            self.ranges[prefix] = [line.split(':')[0].strip().upper() for line in text.splitlines()
+                                   if line.strip()]
+        return self.ranges[prefix]
+    
+    def __contains__(self, password):
+        digest = hashlib.sha1(password.encode('utf-8')).hexdigest().upper()
+        prefix, suffix = digest[:self.prefix_length], digest[self.prefix_length:]
+        return any(suffix[:len(line)] == line for line in self.fetch_range(prefix))
+
+
+# Most common passwords; large corpora go in a BreachedPasswordIndex
+COMMON_PASSWORDS = [
+    "123456", "password", "123456789", "12345678", "12345",
+    "qwerty", "1234567", "111111", "1234567890", "123123",
+    "admin", "letmein", "welcome", "monkey", "login", 
+    "abc123", "starwars", "123qwe", "dragon", "passw0rd"
+]
+
+# Common password patterns
+COMMON_PATTERNS = [
+    r'^[0-9]+$',  # Only numbers
+    r'^[a-z]+$',  # Only lowercase
+    r'^[A-Z]+$',  # Only uppercase
+    r'^[a-z0-9]+$',  # Only lowercase and numbers
+    r'^[a-zA-Z]+$',  # Only letters
+    r'^[a-zA-Z0-9]+$',  # Only alphanumeric
+    r'^.*password.*$',  # Contains "password"
+    r'^.*123.*$',  # Contains "123"
+]
+
+# All patterns in one compiled match; the first alternative that matches wins, like the loop did
+COMMON_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in COMMON_PATTERNS))
+REPEATED_CHARACTER = re.compile(r'(.)\1', re.DOTALL)
+
+# ---- Guess estimation (a simplified zxcvbn) ----
+
+# Ranked words attackers try first; rank = guesses needed to reach the word
+GUESS_DICTIONARY = {word: rank for rank, word in enumerate(COMMON_PASSWORDS + [
+    "love", "iloveyou", "princess", "sunshine", "football", "baseball", "master", "shadow",
+    "superman", "batman", "trustno1", "hello", "secret", "summer", "winter", "spring", "autumn",
+    "freedom", "whatever", "michael", "jessica", "charlie", "thomas", "hunter", "ranger",
+    "soccer", "hockey", "killer", "pepper", "ginger", "cheese", "computer", "internet",
+    "security", "pass", "word", "root", "user", "test", "guest", "changeme", "default",
+    "company", "office", "london", "paris", "berlin", "january", "october", "december",
+], start=1)}
+LEET_SUBSTITUTIONS = str.maketrans('4@3!1|0$5+7', 'aaeiiiosstt')
+SEQUENCES = ['abcdefghijklmnopqrstuvwxyz', '0123456789']
+KEYBOARD_ROWS = ['`1234567890-=', 'qwertyuiop[]\\', "asdfghjkl;'", 'zxcvbnm,./']
+YEAR = re.compile(r'19\d\d|20\d\d')
+REPEATED_UNIT = re.compile(r'(.+?)\1+', re.DOTALL)
+REFERENCE_YEAR = 2026
+MAX_GUESS_LENGTH = 64  # Longer passwords are scored as brute force past this point
+
+
+def _run_steps():
+    """Map each adjacent character pair of a sequence or keyboard row to (run id, descending)"""
+    steps = {}
+    for rows in (KEYBOARD_ROWS, SEQUENCES):  # Sequences win where both apply (digits)
+        for row in rows:
+            for text, descending in ((row, False), (row[::-1], True)):
+                for a, b in zip(text, text[1:]):
+                    steps[a, b] = (text, descending)
+    return steps
+
+
+def _overlapping(words):
+    """Regex finding the longest of words starting at every position"""
+    ordered = sorted(words, key=len, reverse=True)
+    return re.compile(f"(?=({'|'.join(re.escape(word) for word in ordered)}))")
+
+
+RUN_STEPS = _run_steps()
+DICTIONARY_PATTERN = _overlapping(word for word in GUESS_DICTIONARY if len(word) >= 3)
+
+
+def _guess_matches(password):
+    """Yield (start, end, log10 guesses) for predictable substrings (all found by compiled regexes)"""
+    lower = password.lower()
+    
+    # Dictionary words, with capitalization and l33t variants costing a little extra
+    unleet = lower.translate(LEET_SUBSTITUTIONS)
+    for text, leet in ((lower, 1), (unleet, 2)) if unleet != lower else ((lower, 1),):
+        for match in DICTIONARY_PATTERN.finditer(text):
+            word = match.group(1)
+            i, j = match.start(), match.start() + len(word)
+            if leet == 2 and lower[i:j] == word:
+                continue  # Already counted without substitutions
+            token = password[i:j]
+            case = 1 if token == word or not token.isalpha() else 2 if token[1:].islower() or token.isupper() else 4
+            yield i, j, math.log10(GUESS_DICTIONARY[word] * case * leet)
+    
+    # Sequences (abc, 4321) and keyboard runs (qwer, asdf): maximal stretches of one kind of step
+    steps = [RUN_STEPS.get(pair) for pair in zip(lower, lower[1:])]
+    steps.append(None)
+    first = 0
+    for i in range(1, len(steps)):
+        if steps[i] != steps[first]:
+            if steps[first] and i - first >= 2:
+                text, descending = steps[first]
+                base = 4 if lower[first] in 'az019' else 10 if lower[first].isdigit() else 26
+                factor = 2 if descending and text[::-1] in SEQUENCES else 1
+                yield first, i + 1, math.log10(base * (i + 1 - first) * factor)
+            first = i
+    
+    # Repeated units (aaaa, abcabc) cost the unit plus the repeat count
+    for match in REPEATED_UNIT.finditer(password):
+        unit = match.group(1)
+        if match.end() - match.start() >= 3:
+            unit_guesses = estimate_guesses(unit) if len(unit) > 1 else 1
+            yield match.start(), match.end(), unit_guesses + math.log10(len(match.group()) // len(unit))
+    
+    # Years
+    for match in YEAR.finditer(password):
+        yield match.start(), match.end(), math.log10(max(abs(int(match.group()) - REFERENCE_YEAR), 20))
+
+
+def estimate_guesses(password):
+    """
+    Estimate log10 of the guesses an attacker needs, zxcvbn style
+    
+    The password is split into the cheapest sequence of predictable pieces
+    (dictionary words, sequences, keyboard runs, repeats, years) and
+    brute-forced characters (10 guesses each); the estimate is the product
+    of the pieces' guesses.
+    
+    Returns:
+        float: log10(guesses)
+    """
+    head = password[:MAX_GUESS_LENGTH]
+    length = len(head)
+    ending = [[] for _ in range(length + 1)]
+    for start, end, cost in _guess_matches(head):
+        ending[end].append((start, cost))
+    
+    best = [0.0] * (length + 1)
+    for end in range(1, length + 1):
+        best[end] = best[end - 1] + 1  # Brute force one more character
+        for start, cost in ending[end]:
+            best[end] = min(best[end], best[start] + cost)
+    return best[length] + (len(password) - length)
+
+
+def crack_score(guesses_log10):
+    """zxcvbn's 0-4 score: < 10^3, 10^6, 10^8, 10^10 guesses, or more"""
+    return sum(guesses_log10 >= threshold for threshold in (3, 6, 8, 10))
+
+
+def character_classes(password):
+    """(upper, lower, digit, special) flags from one pass over the distinct characters"""
+    has_upper = has_lower = has_digit = has_special = False
+    for c in set(password):
+        if c.isupper():
+            has_upper = True
+        elif c.islower():
+            has_lower = True
+        if c.isdigit():
+            has_digit = True
+        if not c.isalnum():
+            has_special = True
+    return has_upper, has_lower, has_digit, has_special
+
+
+AUDIT_FIELDS = ['account', 'length', 'score', 'strength', 'entropy_bits', 'crack_score', 'breached', 'feedback']
+
+_audit_checker = None  # Per-process checker for audit workers
+
+
+def _init_audit_worker(breach_source):
+    global _audit_checker
+    _audit_checker = PasswordChecker(breach_index=PasswordChecker.open_breach_source(breach_source))
+
+
+def _audit_chunk(chunk):
+    return [_audit_checker.audit_row(account, password) for account, password in chunk]
+
+
+def read_credentials(path, password_column='password', account_column='username'):
+    """
+    Stream (account, password) pairs from a credential export
+    
+    Args:
+        path (str): CSV file with a header row, or a text file with one password per line
+        password_column (str): CSV column holding the password
+        account_column (str): CSV column identifying the account
+    """
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.DictReader(f):
+                yield row.get(account_column), row[password_column]
+        else:
+            for number, line in enumerate(f, 1):
+                password = line.rstrip('\r\n')
+                if password:
+                    yield number, password
+
+
 class PasswordChecker:
     """Check password strength against common vulnerabilities"""
     
-    def __init__(self):
-        """Initialize with common password lists"""
-        # Most common passwords (normally this would be a much larger list)
-        self.common_passwords = [
-            "123456", "password", "123456789", "12345678", "12345",
-            "qwerty", "1234567", "111111", "1234567890", "123123",
-            "admin", "letmein", "welcome", "monkey", "login", 
-            "abc123", "starwars", "123qwe", "dragon", "passw0rd"
-        ]
-        
-        # Common password patterns
-        self.patterns = [
-            r'^[0-9]+$',  # Only numbers
-            r'^[a-z]+$',  # Only lowercase
-            r'^[A-Z]+$',  # Only uppercase
-            r'^[a-z0-9]+$',  # Only lowercase and numbers
-            r'^[a-zA-Z]+$',  # Only letters
-            r'^[a-zA-Z0-9]+$',  # Only alphanumeric
-            r'^.*password.*$',  # Contains "password"
-            r'^.*123.*$',  # Contains "123"
-        ]
+    def __init__(self, breach_index=None):
+        """
+        Initialize with common password lists
+        
+        Args:
+            breach_index: BreachedPasswordIndex or PasswordRangeLookup with
+                breached passwords (anything supporting `password in index`)
+        """
+        self.common_passwords = set(COMMON_PASSWORDS)
+        self.breach_index = breach_index
+        self.patterns = COMMON_PATTERNS
     
     def check_strength(self, password):
         """Check password strength and return score and feedback"""
         score = 100
         feedback = []
+        breached = False
         
         # Check length
         if len(password) < 8:
@@ -288,21 +1127,19 @@ class PasswordChecker:
         if password.lower() in self.common_passwords:
             score -= 50
             feedback.append("Common password, easily guessed")
+            breached = True
+        elif self.breach_index is not None and password in self.breach_index:
+            score -= 50
+            feedback.append("Found in known data breaches")
+            breached = True
             
         # Check for common patterns
-        for pattern in self.patterns:
-            if re.match(pattern, password):
-                score -= 25
-                feedback.append("Uses a common pattern")
-                break
+        if COMMON_PATTERN.match(password):
+            score -= 25
+            feedback.append("Uses a common pattern")
                 
         # Check complexity
-        has_upper = any(c.isupper() for c in password)
-        has_lower = any(c.islower() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_special = any(not c.isalnum() for c in password)
-        
-        complexity_count = sum([has_upper, has_lower, has_digit, has_special])
+        complexity_count = sum(character_classes(password))
         
         if complexity_count <= 1:
             score -= 40
@@ -315,9 +1152,15 @@ class PasswordChecker:
             feedback.append("Could use all character types")
             
         # Check for repeating characters
-        if any(password[i] == password[i+1] for i in range(len(password)-1)):
+        if REPEATED_CHARACTER.search(password):
             score -= 10
             feedback.append("Contains repeating characters")
+        
+        # Estimate how many guesses it takes; complexity rules miss "Password2024!"
+        guesses_log10 = estimate_guesses(password)
+        if crack_score(guesses_log10) <= 1 and not breached:
+            score -= 20
+            feedback.append(f"Predictable (about 10^{int(guesses_log10)} guesses)")
             
         # Normalize score
         score = max(0, min(score, 100))
@@ -335,36 +1178,413 @@ class PasswordChecker:
         return {
             'score': score,
             'strength': strength,
-            'feedback': feedback
+            'feedback': feedback,
+            'breached': breached,
+            'entropy_bits': round(guesses_log10 * math.log2(10), 1),
+            'crack_score': crack_score(guesses_log10)
+        }
+    
+    def audit_row(self, account, password):
+        """Result row for one credential; the password itself is never written out"""
+        result = self.check_strength(password)
+        return {
+            'account': account,
+            'length': len(password),
+            'score': result['score'],
+            'strength': result['strength'],
+            'entropy_bits': result['entropy_bits'],
+            'crack_score': result['crack_score'],
+            'breached': result['breached'],
+            'feedback': '; '.join(result['feedback'])
         }
+    
+    def breach_source(self):
+        """Picklable description of breach_index for worker processes"""
+        if isinstance(self.breach_index, BreachedPasswordIndex):
+            return ('index', self.breach_index.path)
+        if isinstance(self.breach_index, PasswordRangeLookup):
+            return ('range', self.breach_index.source, self.breach_index.prefix_length)
+        if self.breach_index is not None:
+            raise ValueError("Worker processes need a BreachedPasswordIndex or PasswordRangeLookup")
+        return None
+    
+    @staticmethod
+    def open_breach_source(source):
+        if source is None:
+            return None
+        if source[0] == 'index':
+            return BreachedPasswordIndex(source[1])
+        return PasswordRangeLookup(source[1], prefix_length=source[2])
+    
+    def audit(self, credentials, output_file=None, output_format='ndjson', workers=None, chunk_size=2000):
+        """
+        Check a whole credential store and stream one row per account
+        
+        Args:
+            credentials: Iterable of passwords or (account, password) pairs,
+                e.g. read_credentials(path)
+            output_file (str): Where to write rows (None = statistics only)
+            output_format (str): 'ndjson' or 'csv'
+            workers (int): Worker processes (None = CPU count, 1 = this process)
+            chunk_size (int): Passwords sent to a worker at a time
+            
+        Returns:
+            dict: Aggregate statistics
+        """
+        if output_format not in ('ndjson', 'csv'):
+            raise ValueError(f"Unsupported audit format: {output_format}")
+        workers = workers or os.cpu_count() or 1
+        stats = {'total': 0, 'strength': {}, 'breached': 0, 'too_short': 0,
+                 'score_sum': 0, 'entropy_sum': 0.0, 'crack_score': [0] * 5}
+        start = time.monotonic()
+        
+        output = open(output_file, 'w', newline='') if output_file else None
+        writer = csv.DictWriter(output, fieldnames=AUDIT_FIELDS) if output and output_format == 'csv' else None
+        if writer:
+            writer.writeheader()
+        try:
+            for row in self._audit_rows(credentials, workers, chunk_size):
+                stats['total'] += 1
+                stats['strength'][row['strength']] = stats['strength'].get(row['strength'], 0) + 1
+                stats['breached'] += row['breached']
+                stats['too_short'] += row['length'] < 8
+                stats['score_sum'] += row['score']
+                stats['entropy_sum'] += row['entropy_bits']
+                stats['crack_score'][row['crack_score']] += 1
+                if writer:
+                    writer.writerow(row)
+                elif output:
+                    output.write(json.dumps(row) + "\n")
+        finally:
+            if output:
+                output.close()
+        
+        total = stats['total']
+        elapsed = time.monotonic() - start
+        summary = {
+            'total': total,
+            'strength': stats['strength'],
+            'crack_score': stats['crack_score'],
+            'breached': stats['breached'],
+            'too_short': stats['too_short'],
+            'mean_score': round(stats.pop('score_sum') / total, 1) if total else 0,
+            'mean_entropy_bits': round(stats.pop('entropy_sum') / total, 1) if total else 0,
+            'elapsed': round(elapsed, 3),
+            'per_second': round(total / elapsed) if elapsed else total,
+        }
+        print(f"Audited {total} passwords in {elapsed:.2f}s ({summary['per_second']}/s): "
+              f"{summary['breached']} breached or common, {summary['too_short']} too short, "
+              f"mean score {summary['mean_score']}")
+        return summary
+    
+    def _audit_rows(self, credentials, workers, chunk_size):
+        """Yield audit rows in input order, keeping at most 2 chunks per worker in flight"""
+        records = ((None, item) if isinstance(item, str) else item for item in credentials)
+        if workers == 1:
+            for account, password in records:
+                yield self.audit_row(account, password)
+            return
+        
+        chunks = iter(lambda: list(itertools.islice(records, chunk_size)), [])
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_audit_worker,
+                                 initargs=(self.breach_source(),)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_audit_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
 
 
 # ---- 3. File Integrity Monitor ----
 
+# What a baseline remembers per file. Unchanged (size, mtime, ctime, inode) means
+# unchanged content - ctime can't be set from user space, so `touch -r` doesn't hide edits
+FileRecord = namedtuple('FileRecord', ['size', 'mtime_ns', 'ctime_ns', 'inode', 'digest'])
+
+BASELINE_MAGIC = b'FIMBASE1'
+BASELINE_HEADER = struct.Struct('<8sIIQ')   # magic, metadata length, generation, file count
+BASELINE_RECORD = struct.Struct('<HHQqqQ')  # shared path prefix, suffix length, size, mtime, ctime, inode
+
+
+HASH_BUFFER_SIZE = 1 << 20  # 1 MiB reads: few syscalls, still cache-friendly
+PARALLEL_MIN_FILES = 64     # Below this a process pool costs more than it saves
+HASH_BATCH_SIZE = 32        # Files per task sent to a worker
+
+
+def file_digest(filepath, algorithm='sha256', buffer_size=HASH_BUFFER_SIZE):
+    """Raw digest of a file read in large chunks into one reused buffer, or None if unreadable"""
+    h = hashlib.new(algorithm)
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    try:
+        with open(filepath, 'rb', buffering=0) as f:
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                h.update(view[:size])
+    except OSError:
+        return None
+    return h.digest()
+
+
+def _hash_batch(paths, algorithm):
+    return [file_digest(path, algorithm) for path in paths]
+
+
+def build_merkle_tree(baseline, algorithm='sha256'):
+    """
+    Directory hashes over a baseline
+    
+    A directory's hash covers the sorted names, kinds and hashes of its
+    entries, so equal hashes mean identical subtrees.
+    
+    Returns:
+        tuple: (tree {dir: digest}, children {dir: {name: is_directory}}); '' is the root
+    """
+    children = defaultdict(dict)
+    children['']
+    for rel_path in baseline:
+        parent, name = os.path.split(rel_path)
+        children[parent][name] = False
+        while parent:
+            above, directory = os.path.split(parent)
+            if directory in children[above]:
+                break
+            children[above][directory] = True
+            parent = above
+    
+    tree = {}
+    for directory in sorted(children, key=lambda d: d.count(os.sep) + 1 if d else 0, reverse=True):
+        h = hashlib.new(algorithm)
+        for name, is_directory in sorted(children[directory].items()):
+            path = os.path.join(directory, name)
+            digest = tree[path] if is_directory else baseline[path].digest
+            h.update(b'd' if is_directory else b'f')
+            h.update(name.encode('utf-8', 'surrogateescape') + b'\0')
+            h.update(digest)
+        tree[directory] = h.digest()
+    return tree, dict(children)
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_ONLYDIR)
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+INOTIFY_READ_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """
+    Recursive inotify watch on a directory tree (Linux only, through libc)
+    
+    One watch per directory; the kernel queues events, so memory use here is
+    bounded by the number of directories, not by the event rate.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.watches = {}  # watch descriptor -> directory relative to the root
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        try:
+            self.libc = ctypes.CDLL(libc_name, use_errno=True)
+            self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            raise OSError(f"inotify is not available on {sys.platform}")
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+    
+    def add_watch(self, rel_dir):
+        path = os.path.join(self.directory, rel_dir)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                raise OSError(error, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+            return False  # Directory vanished or unreadable
+        self.watches[wd] = rel_dir
+        return True
+    
+    def add_tree(self, rel_dir=''):
+        """Watch a directory and everything below it; returns the files found there"""
+        files = []
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            if not self.add_watch(current):
+                continue
+            try:
+                with os.scandir(os.path.join(self.directory, current)) as entries:
+                    for entry in entries:
+                        rel_path = os.path.join(current, entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(rel_path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append(rel_path)
+            except OSError:
+                continue
+        return files
+    
+    def remove_tree(self, rel_dir):
+        """Drop the watches of a directory that moved away"""
+        prefix = rel_dir + os.sep
+        for wd, watched in list(self.watches.items()):
+            if watched == rel_dir or watched.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+    
+    def read(self, timeout):
+        """
+        Wait up to timeout seconds and drain queued events
+        
+        Returns:
+            list: (rel_path, mask) tuples; rel_path is None for a queue overflow
+        """
+        events = []
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return events
+        while True:
+            try:
+                data = os.read(self.fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    events.append((None, mask))
+                elif mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                elif name and wd in self.watches:
+                    events.append((os.path.join(self.watches[wd], os.fsdecode(name)), mask))
+        return events
+    
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def compile_file_patterns(file_patterns):
+    """One regex matching file names against any of the glob patterns"""
+    regexes = []
+    for pattern in file_patterns or ['*']:
+        # Convert glob pattern to regex
+        regexes.append(pattern.replace('.', '\\.').replace('*', '.*').replace('?', '.'))
+    return re.compile(f"^(?:{'|'.join(regexes)})$")
+
+
 class FileIntegrityMonitor:
-    """Monitor files for changes by comparing hash values"""
+    """
+    Monitor files for changes by comparing hash values.
+    
+    Checks are stat-first: a file whose size, mtime, ctime and inode match
+    the baseline is not read at all. Changed metadata triggers a re-hash,
+    and every verify_every checks each file is re-hashed anyway (a rotating
+    sample), so even content swapped under identical metadata is caught.
     
-    def __init__(self, directory="."):
-        """Initialize with target directory to monitor"""
+    Hashing is spread over a process pool, and the baseline carries a Merkle
+    tree of directory hashes: comparing two baselines only descends into
+    directories whose hashes differ.
+    """
+    
+    def __init__(self, directory=".", verify_every=30, workers=None):
+        """
+        Initialize with target directory to monitor
+        
+        Args:
+            directory (str): Directory tree to monitor
+            verify_every (int): Fully verify each unchanged file once per this
+                many checks (0 = trust metadata)
+            workers (int): Hashing processes (None = CPU count, 1 = this process)
+        """
         self.directory = directory
         self.baseline = {}
         self.algorithm = "sha256"
+        self.file_patterns = ['*']
+        self.pattern = compile_file_patterns(self.file_patterns)
+        self.verify_every = verify_every
+        self.workers = workers or os.cpu_count() or 1
+        self.generation = 0
+        self.files_hashed = 0
+        self.tree = {}
+        self.children = {}
+        self.nodes_visited = 0
     
     def calculate_file_hash(self, filepath):
         """Calculate hash of a file"""
-        h = hashlib.new(self.algorithm)
-        
-        try:
-            with open(filepath, 'rb') as f:
-                # Read in chunks for large files
-                chunk = f.read(8192)
-                while chunk:
-                    h.update(chunk)
-                    chunk = f.read(8192)
-                    
-            return h.hexdigest()
-        except (IOError, OSError):
-            return None
+        digest = file_digest(filepath, self.algorithm)
+        return digest.hex() if digest is not None else None
+    
+    def _hash_many(self, rel_paths):
+        """Digests for many files ({rel_path: digest or None}), in a process pool when worth it"""
+        paths = [os.path.join(self.directory, rel_path) for rel_path in rel_paths]
+        if self.workers == 1 or len(paths) < PARALLEL_MIN_FILES:
+            digests = [file_digest(path, self.algorithm) for path in paths]
+        else:
+            batches = [paths[i:i + HASH_BATCH_SIZE] for i in range(0, len(paths), HASH_BATCH_SIZE)]
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                digests = list(itertools.chain.from_iterable(
+                    executor.map(_hash_batch, batches, itertools.repeat(self.algorithm))))
+        self.files_hashed += sum(digest is not None for digest in digests)
+        return dict(zip(rel_paths, digests))
+    
+    def build_tree(self):
+        """Recompute the Merkle tree of the current baseline"""
+        self.tree, self.children = build_merkle_tree(self.baseline, self.algorithm)
+        return self.tree
+    
+    @property
+    def root_hash(self):
+        """Hex hash of the whole monitored tree"""
+        return self.tree[''].hex() if self.tree else None
+    
+    def _scan(self):
+        """Yield (relative path, stat result) for every monitored file"""
+        stack = [self.directory]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and self.pattern.match(entry.name):
+                            yield os.path.relpath(entry.path, self.directory), entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+    
+    @staticmethod
+    def _record(stat, digest):
+        return FileRecord(stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino, digest)
     
     def create_baseline(self, file_patterns=None):
         """Create baseline hashes for files in directory"""
@@ -372,105 +1592,536 @@ class FileIntegrityMonitor:
         self.baseline = {}
         
         # If file patterns is not specified, use all files
-        if file_patterns is None:
-            file_patterns = ['*']
-            
-        # Convert file patterns to regex
-        pattern_regexes = []
-        for pattern in file_patterns:
-            # Convert glob pattern to regex
-            regex = pattern.replace('.', '\\.').replace('*', '.*').replace('?', '.')
-            pattern_regexes.append(re.compile(f"^{regex}$"))
-        
-        # Walk through directory and calculate hashes
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                # Check if file matches any pattern
-                if not any(pattern.match(file) for pattern in pattern_regexes):
-                    continue
-                    
-                filepath = os.path.join(root, file)
-                file_hash = self.calculate_file_hash(filepath)
-                
-                if file_hash:
-                    rel_path = os.path.relpath(filepath, self.directory)
-                    self.baseline[rel_path] = {
-                        'hash': file_hash,
-                        'last_modified': os.path.getmtime(filepath),
-                        'size': os.path.getsize(filepath)
-                    }
+        self.file_patterns = list(file_patterns or ['*'])
+        self.pattern = compile_file_patterns(self.file_patterns)
+        self.generation = 0
+        
+        files = list(self._scan())
+        digests = self._hash_many([rel_path for rel_path, _ in files])
+        for rel_path, stat in files:
+            if digests[rel_path] is not None:
+                self.baseline[rel_path] = self._record(stat, digests[rel_path])
+        self.build_tree()
         
         print(f"Baseline created with {len(self.baseline)} files")
         return self.baseline
     
-    def check_integrity(self):
-        """Check current files against baseline for changes"""
+    def _due_for_verify(self, rel_path):
+        """Rotating sample: each file is fully verified once every verify_every checks"""
+        if not self.verify_every:
+            return False
+        return zlib.crc32(rel_path.encode('utf-8', 'surrogateescape')) % self.verify_every == \
+            self.generation % self.verify_every
+    
+    def _live_records(self):
+        """
+        Current FileRecord of every monitored file
+        
+        Baseline digests are reused where metadata is unchanged and the file
+        isn't due for verification; everything else is hashed in one batch.
+        
+        Returns:
+            tuple: (records, paths whose metadata matched the baseline)
+        """
+        records = {}
+        unchanged = set()
+        pending = []
+        for rel_path, stat in self._scan():
+            record = self.baseline.get(rel_path)
+            same_metadata = record is not None and (record.size, record.mtime_ns, record.ctime_ns, record.inode) == \
+                (stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino)
+            if same_metadata:
+                unchanged.add(rel_path)
+                if not self._due_for_verify(rel_path):
+                    records[rel_path] = record
+                    continue
+            pending.append((rel_path, stat))
+        
+        digests = self._hash_many([rel_path for rel_path, _ in pending])
+        for rel_path, stat in pending:
+            digest = digests[rel_path]
+            if digest is not None:
+                records[rel_path] = self._record(stat, digest)
+            elif rel_path in self.baseline:
+                records[rel_path] = self.baseline[rel_path]  # Unreadable right now; keep what we know
+            else:
+                records[rel_path] = self._record(stat, b'')  # Unreadable new file is still new
+        return records, unchanged
+    
+    def check_integrity(self, accept=False):
+        """
+        Check current files against baseline for changes
+        
+        Files whose content is unchanged but whose metadata moved (touch,
+        chmod, a restore) get their baseline metadata refreshed, so they
+        take the fast path next time; changed files keep being reported
+        until a new baseline is created.
+        
+        Args:
+            accept (bool): Make the current state the new baseline, so each
+                change is only reported once (used by watch mode)
+        """
         if not self.baseline:
             print("No baseline exists. Create a baseline first.")
             return []
             
         print("Checking file integrity against baseline...")
+        start = time.monotonic()
+        hashed_before = self.files_hashed
+        self.generation += 1
         changes = []
         
-        # Check existing files for changes
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                filepath = os.path.join(root, file)
-                rel_path = os.path.relpath(filepath, self.directory)
-                
-                if rel_path in self.baseline:
-                    # Calculate current hash
-                    current_hash = self.calculate_file_hash(filepath)
-                    
-                    if current_hash and current_hash != self.baseline[rel_path]['hash']:
-                        changes.append({
-                            'file': rel_path,
-                            'type': 'modified',
-                            'details': f"Hash changed: {self.baseline[rel_path]['hash']} -> {current_hash}"
-                        })
-                else:
-                    # New file
-                    changes.append({
-                        'file': rel_path,
-                        'type': 'new',
-                        'details': 'File did not exist in baseline'
-                    })
+        live, unchanged = self._live_records()
+        for rel_path, record in live.items():
+            baseline_record = self.baseline.get(rel_path)
+            if baseline_record is None:
+                # New file
+                changes.append({
+                    'file': rel_path,
+                    'type': 'new',
+                    'details': 'File did not exist in baseline'
+                })
+            elif record.digest != baseline_record.digest:
+                details = f"Hash changed: {baseline_record.digest.hex()} -> {record.digest.hex()}"
+                if rel_path in unchanged:
+                    details += " (metadata unchanged)"
+                changes.append({
+                    'file': rel_path,
+                    'type': 'modified',
+                    'details': details
+                })
+            elif record is not baseline_record:
+                self.baseline[rel_path] = record
         
         # Check for deleted files
         for rel_path in self.baseline:
-            filepath = os.path.join(self.directory, rel_path)
-            if not os.path.exists(filepath):
+            if rel_path not in live:
                 changes.append({
                     'file': rel_path,
                     'type': 'deleted',
                     'details': 'File no longer exists'
                 })
         
-        print(f"Found {len(changes)} changes")
+        if accept:
+            self.baseline = live
+        
+        print(f"Found {len(changes)} changes in {len(live)} files "
+              f"({self.files_hashed - hashed_before} hashed, {time.monotonic() - start:.2f}s)")
+        return changes
+    
+    def check_paths(self, rel_paths):
+        """
+        Re-check only the given files and accept what is found as the new baseline
+        
+        Returns:
+            list: Changes in the check_integrity() format
+        """
+        changes = []
+        pending = []
+        for rel_path in sorted(rel_paths):
+            try:
+                stat = os.lstat(os.path.join(self.directory, rel_path))
+            except OSError:
+                stat = None
+            if stat is None or not S_ISREG(stat.st_mode):
+                if self.baseline.pop(rel_path, None) is not None:
+                    changes.append({
+                        'file': rel_path,
+                        'type': 'deleted',
+                        'details': 'File no longer exists'
+                    })
+                continue
+            record = self.baseline.get(rel_path)
+            if record is None or (record.size, record.mtime_ns, record.ctime_ns, record.inode) != \
+                    (stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino):
+                pending.append((rel_path, stat))
+        
+        digests = self._hash_many([rel_path for rel_path, _ in pending])
+        for rel_path, stat in pending:
+            digest = digests[rel_path]
+            if digest is None:
+                continue
+            record = self.baseline.get(rel_path)
+            if record is None:
+                changes.append({
+                    'file': rel_path,
+                    'type': 'new',
+                    'details': 'File did not exist in baseline'
+                })
+            elif record.digest != digest:
+                changes.append({
+                    'file': rel_path,
+                    'type': 'modified',
+                    'details': f"Hash changed: {record.digest.hex()} -> {digest.hex()}"
+                })
+            self.baseline[rel_path] = self._record(stat, digest)
+        return changes
+    
+    def watch(self, on_change=None, batch_delay=0.2, reconcile_interval=300, max_pending=10000,
+              duration=None, stop_event=None, ready=None):
+        """
+        Watch the tree with inotify and report changes as they happen
+        
+        Events are coalesced for batch_delay seconds after the first one, then
+        only the touched files are re-hashed. A full check_integrity() runs
+        every reconcile_interval seconds, and immediately if the kernel queue
+        overflows or more than max_pending files are dirty, so missed events
+        are still caught. Without inotify this degrades to that periodic scan.
+        
+        Args:
+            on_change (callable): Called with each change dict (default: print)
+            batch_delay (float): Seconds to coalesce events before checking
+            reconcile_interval (float): Seconds between full reconciliation scans
+            max_pending (int): Dirty files tracked before falling back to a full scan
+            duration (float): Stop after this many seconds (None = until stop_event)
+            stop_event (threading.Event): Set to stop watching
+            ready (threading.Event): Set once the watches are in place
+            
+        Returns:
+            int: Number of changes reported
+        """
+        if not self.baseline:
+            print("No baseline exists. Create a baseline first.")
+            return 0
+        if on_change is None:
+            on_change = lambda change: print(f"  {change['type'].upper()}: {change['file']}")
+        stop_event = stop_event or threading.Event()
+        
+        try:
+            watcher = InotifyWatcher(self.directory)
+            watcher.add_tree()
+            print(f"Watching {len(watcher.watches)} directories under '{self.directory}'")
+        except OSError as e:
+            print(f"inotify unavailable ({e}); falling back to periodic scans")
+            watcher = None
+        if ready is not None:
+            ready.set()
+        
+        start = time.monotonic()
+        deadline = start + duration if duration is not None else None
+        next_reconcile = start + reconcile_interval
+        self.events_seen = 0
+        self.reconciliations = 0
+        reported = 0
+        dirty = set()
+        overflowed = False
+        batch_started = None
+        
+        try:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                
+                # Sleep until the next thing due, but wake regularly to notice stop_event
+                waits = [0.5, next_reconcile - now]
+                if batch_started is not None:
+                    waits.append(batch_started + batch_delay - now)
+                if deadline is not None:
+                    waits.append(deadline - now)
+                timeout = max(0, min(waits))
+                if watcher is None:
+                    stop_event.wait(timeout)
+                    events = []
+                else:
+                    events = watcher.read(timeout)
+                
+                for rel_path, mask in events:
+                    self.events_seen += 1
+                    if rel_path is None:
+                        overflowed = True
+                    elif mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            # Files may land before the new watch exists
+                            dirty.update(path for path in watcher.add_tree(rel_path)
+                                         if self.pattern.match(os.path.basename(path)))
+                        elif mask & IN_MOVED_FROM:
+                            watcher.remove_tree(rel_path)
+                            prefix = rel_path + os.sep
+                            dirty.update(path for path in self.baseline if path.startswith(prefix))
+                    elif self.pattern.match(os.path.basename(rel_path)):
+                        dirty.add(rel_path)
+                    if batch_started is None:
+                        batch_started = time.monotonic()
+                if len(dirty) > max_pending:
+                    overflowed = True
+                    dirty.clear()
+                
+                now = time.monotonic()
+                if overflowed or now >= next_reconcile:
+                    changes = self.check_integrity(accept=True)
+                    self.reconciliations += 1
+                    next_reconcile = now + reconcile_interval
+                    dirty.clear()
+                    overflowed = False
+                    batch_started = None
+                elif batch_started is not None and now - batch_started >= batch_delay:
+                    changes = self.check_paths(dirty)
+                    dirty.clear()
+                    batch_started = None
+                else:
+                    continue
+                for change in changes:
+                    on_change(change)
+                reported += len(changes)
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self.build_tree()
+        return reported
+    
+    def snapshot(self):
+        """
+        Baseline of the live tree, as a new monitor
+        
+        Only files whose metadata changed (or that are due for verification)
+        are hashed; compare it with compare_baseline() to locate changes
+        through the Merkle tree.
+        """
+        live = FileIntegrityMonitor(self.directory, self.verify_every, self.workers)
+        live.algorithm = self.algorithm
+        live.file_patterns = self.file_patterns
+        live.pattern = self.pattern
+        live.generation = self.generation
+        live.baseline, _ = self._live_records()
+        live.build_tree()
+        return live
+    
+    def compare_baseline(self, other):
+        """
+        Changes from this baseline to another one (e.g. a later snapshot())
+        
+        Walks both Merkle trees from the root and skips every directory whose
+        hash is equal on both sides, so a single changed file is found by
+        visiting only the directories on its path (depth x fanout work).
+        
+        Returns:
+            list: Changes in the check_integrity() format
+        """
+        if not self.tree:
+            self.build_tree()
+        if not other.tree:
+            other.build_tree()
+        changes = []
+        self.nodes_visited = 0
+        
+        def files_under(side, directory):
+            for name, is_directory in side.children.get(directory, {}).items():
+                path = os.path.join(directory, name)
+                if is_directory:
+                    yield from files_under(side, path)
+                else:
+                    yield path
+        
+        def report(path, change_type):
+            details = {'new': 'File did not exist in baseline', 'deleted': 'File no longer exists'}
+            changes.append({'file': path, 'type': change_type, 'details': details[change_type]})
+        
+        stack = [''] if self.tree.get('') != other.tree.get('') else []
+        while stack:
+            directory = stack.pop()
+            self.nodes_visited += 1
+            before = self.children.get(directory, {})
+            after = other.children.get(directory, {})
+            for name in sorted(before.keys() | after.keys()):
+                path = os.path.join(directory, name)
+                was_directory, is_directory = before.get(name), after.get(name)
+                if was_directory and is_directory:
+                    if self.tree[path] != other.tree[path]:
+                        stack.append(path)
+                    continue
+                # Whole subtrees appearing or disappearing (or a file replaced by a directory)
+                if was_directory:
+                    for file_path in files_under(self, path):
+                        report(file_path, 'deleted')
+                elif was_directory is False and not is_directory:
+                    if is_directory is None:
+                        report(path, 'deleted')
+                    elif self.baseline[path].digest != other.baseline[path].digest:
+                        changes.append({
+                            'file': path,
+                            'type': 'modified',
+                            'details': f"Hash changed: {self.baseline[path].digest.hex()} -> "
+                                       f"{other.baseline[path].digest.hex()}"
+                        })
+                    continue
+                elif was_directory is False:
+                    report(path, 'deleted')
+                if is_directory:
+                    for file_path in files_under(other, path):
+                        report(file_path, 'new')
+                elif is_directory is False:
+                    report(path, 'new')
         return changes
+    
+    def save_baseline(self, path):
+        """
+        Write the baseline in a compact binary format
+        
+        Paths are sorted and front-coded (each stores only what differs from
+        the previous one) and digests are raw bytes, which keeps a
+        million-file baseline to a few tens of megabytes.
+        """
+        metadata = json.dumps({'algorithm': self.algorithm, 'file_patterns': self.file_patterns,
+                               'verify_every': self.verify_every}).encode()
+        with open(path, 'wb') as f:
+            f.write(BASELINE_HEADER.pack(BASELINE_MAGIC, len(metadata), self.generation, len(self.baseline)))
+            f.write(metadata)
+            previous = b''
+            for rel_path in sorted(self.baseline):
+                record = self.baseline[rel_path]
+                encoded = rel_path.encode('utf-8', 'surrogateescape')
+                shared = len(os.path.commonprefix([previous, encoded]))
+                suffix = encoded[shared:]
+                f.write(BASELINE_RECORD.pack(shared, len(suffix), record.size, record.mtime_ns,
+                                             record.ctime_ns, record.inode))
+                f.write(suffix)
+                f.write(record.digest)
+                previous = encoded
+    
+    def load_baseline(self, path):
+        """Read a baseline written by save_baseline"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, metadata_length, self.generation, count = BASELINE_HEADER.unpack_from(data)
+        if magic != BASELINE_MAGIC:
+            raise ValueError(f"{path} is not a file integrity baseline")
+        offset = BASELINE_HEADER.size
+        metadata = json.loads(data[offset:offset + metadata_length])
+        offset += metadata_length
+        self.algorithm = metadata['algorithm']
+        self.file_patterns = metadata['file_patterns']
+        self.pattern = compile_file_patterns(self.file_patterns)
+        self.verify_every = metadata.get('verify_every', self.verify_every)
+        digest_size = hashlib.new(self.algorithm).digest_size
+        
+        self.baseline = {}
+        previous = b''
+        for _ in range(count):
+            shared, suffix_length, size, mtime_ns, ctime_ns, inode = BASELINE_RECORD.unpack_from(data, offset)
+            offset += BASELINE_RECORD.size
+            encoded = previous[:shared] + data[offset:offset + suffix_length]
+            offset += suffix_length
+            digest = data[offset:offset + digest_size]
+            offset += digest_size
+            self.baseline[encoded.decode('utf-8', 'surrogateescape')] = FileRecord(
+                size, mtime_ns, ctime_ns, inode, digest)
+            previous = encoded
+        self.build_tree()
+        return self.baseline
 
 
 # ---- Demo ----
 
-def demonstrate_vulnerability_assessment():
+class DemoTarget:
+    """
+    Deliberately vulnerable web app on 127.0.0.1 for the scanner demo
+    
+    /search reflects its query unescaped (XSS) and /product builds SQL by
+    string formatting against an in-memory SQLite database (SQLi), so the
+    scanner's payloads never leave this machine.
+    """
+    
+    INDEX = ('<html><body>'
+             '<form action="/search"><input name="q"></form>'
+             '<form method="post" action="/product"><input name="id"></form>'
+             '<a href="/about">About</a></body></html>')
+    
+    def __init__(self):
+        self.database = sqlite3.connect(':memory:', check_same_thread=False)
+        self.database.execute("CREATE TABLE users (id INTEGER, name TEXT)")
+        self.lock = threading.Lock()
+        target = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                self.respond(url.path, dict(parse_qsl(url.query)))
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                self.respond(urlsplit(self.path).path, dict(parse_qsl(body)))
+            
+            def respond(self, path, params):
+                page = target.page(path, params)
+                data = (page or '<p>Not found</p>').encode()
+                self.send_response(200 if page else 404)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    def page(self, path, params):
+        if path in ('/', '/about'):
+            return self.INDEX
+        if path == '/search':
+            return f"<p>Results for {params.get('q', '')}</p>"
+        if path == '/product':
+            with self.lock:
+                try:
+                    rows = self.database.execute(
+                        f"SELECT name FROM users WHERE id = {params.get('id', '')}").fetchall()
+                    return f"<p>{len(rows)} products</p>"
+                except sqlite3.Error as e:
+                    return f"<p>Database error: {html.escape(f'{type(e).__module__}.{type(e).__name__}: {e}')}</p>"
+        return None
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        self.database.close()
+
+
+def demonstrate_vulnerability_assessment(target_url=None):
+    """
+    Run the demo; the web scanner attacks a local DemoTarget unless a target_url
+    you are authorized to test is passed explicitly
+    """
     print("===== VULNERABILITY ASSESSMENT DEMO =====\n")
     
-    # 1. Web Vulnerability Scanner (simulation only)
+    # 1. Web Vulnerability Scanner (payloads are really submitted)
     print("1. Web Vulnerability Scanner Demo")
-    print("Note: We'll only simulate scanning to avoid any actual testing")
-    
-    # Target URL for demonstration (use a test site, not production)
-    scanner = WebVulnScanner("https://example.com", max_urls=3)
-    scanner.crawl(max_depth=1)
-    scanner.scan_xss_vulnerabilities()
-    scanner.scan_sqli_vulnerabilities()
-    scanner.check_security_headers()
-    scanner.report_vulnerabilities()
+    
+    def scan(url):
+        scanner = WebVulnScanner(url, max_urls=10)
+        scanner.crawl(max_depth=1)
+        scanner.scan_xss_vulnerabilities()
+        scanner.scan_sqli_vulnerabilities()
+        scanner.check_security_headers()
+        scanner.report_vulnerabilities()
+    
+    if target_url:
+        print(f"Scanning {target_url} - only scan sites you are authorized to test")
+        scan(target_url)
+    else:
+        with DemoTarget() as target:
+            print(f"Scanning the local demo app at {target.url}")
+            scan(target.url)
     print("")
     
     # 2. Password Strength Checker
     print("2. Password Strength Checker Demo")
-    checker = PasswordChecker()
+    
+    # A tiny stand-in for a breach corpus; build() streams wordlists of any size
+    breach_dir = tempfile.mkdtemp()
+    wordlist = os.path.join(breach_dir, 'breached.txt')
+    with open(wordlist, 'w') as f:
+        f.write("\n".join(["P@ssw0rd!", "iloveyou", "Summer2023!", "trustno1"]) + "\n")
+    index_file = os.path.join(breach_dir, 'breached.idx')
+    BreachedPasswordIndex.build(wordlist, index_file)
+    breach_index = BreachedPasswordIndex(index_file)
+    checker = PasswordChecker(breach_index=breach_index)
     
     test_passwords = [
         "password123",
@@ -486,6 +2137,15 @@ def demonstrate_vulnerability_assessment():
         print(f"Strength: {result['strength']} ({result['score']}/100)")
         print(f"Feedback: {', '.join(result['feedback']) if result['feedback'] else 'No issues found'}")
     
+    # Batch audit of a credential store (read_credentials streams CSV/text exports)
+    print("\nBatch audit:")
+    stats = checker.audit(test_passwords, workers=1)
+    print(f"Strength breakdown: {stats['strength']}")
+    
+    breach_index.close()
+    os.remove(wordlist)
+    os.remove(index_file)
+    os.rmdir(breach_dir)
     print("")
     
     # 3. File Integrity Monitor
@@ -494,7 +2154,7 @@ def demonstrate_vulnerability_assessment():
     monitor = FileIntegrityMonitor(".")
     
     # Create baseline
-    baseline = monitor.create_baseline([".py"])  # Only monitor Python files
+    baseline = monitor.create_baseline(["*.py"])  # Only monitor Python files
     
     # Simulate a file change
     demo_file = "integrity_test.txt"
@@ -511,6 +2171,31 @@ def demonstrate_vulnerability_assessment():
     
     # Check integrity
     changes = monitor.check_integrity()
+    for change in changes:
+        print(f"  {change['type'].upper()}: {change['file']}")
+    
+    # Compare a snapshot through the Merkle tree: unchanged directories are skipped
+    snapshot = monitor.snapshot()
+    print(f"Root hash {monitor.root_hash[:16]}... -> {snapshot.root_hash[:16]}...")
+    for change in monitor.compare_baseline(snapshot):
+        print(f"  {change['type'].upper()}: {change['file']} "
+              f"({monitor.nodes_visited} directories visited)")
+    
+    # Persist the baseline; the next run only hashes files whose metadata changed
+    baseline_file = os.path.join(tempfile.gettempdir(), "integrity_baseline.bin")
+    monitor.save_baseline(baseline_file)
+    rerun = FileIntegrityMonitor(".")
+    rerun.load_baseline(baseline_file)
+    rerun.check_integrity()
+    os.remove(baseline_file)
+    
+    # Watch mode: inotify events, only touched files re-hashed
+    watcher = threading.Thread(target=rerun.watch, kwargs={'duration': 1.5})
+    watcher.start()
+    time.sleep(0.3)
+    with open(demo_file, 'w') as f:
+        f.write("Changed while watched")
+    watcher.join()
     
     # Clean up test file
     if os.path.exists(demo_file):
@@ -518,4 +2203,5 @@ def demonstrate_vulnerability_assessment():
 
 
 if __name__ == "__main__":
-    demonstrate_vulnerability_assessment()
+    # Pass an authorized target on the command line to scan it instead of the local demo app
+    demonstrate_vulnerability_assessment(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -4,7 +4,7 @@ Infrastructure & Configuration Security Examples
 ----------------------------------------------
 This script demonstrates basic infrastructure and configuration security concepts:
 1. File permission checker
-2. Open port scanner
+2. Open port scanner (/proc/net listener inventory)
 3. Basic Docker image security checker
 4. Simple AWS security configuration checker
 """
@@ -15,6 +15,7 @@ import socket
 import json
 import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import platform
 import docker
 
@@ -120,11 +121,124 @@ class FilePermissionChecker:
 
 # ---- 2. Open Port Scanner ----
 
+# Socket tables exported by the Linux kernel (relative to /proc)
+PROC_NET_TABLES = [
+    ('tcp', 'ipv4', 'net/tcp'),
+    ('tcp', 'ipv6', 'net/tcp6'),
+    ('udp', 'ipv4', 'net/udp'),
+    ('udp', 'ipv6', 'net/udp6'),
+]
+
+# Kernel socket states (include/net/tcp_states.h)
+TCP_STATES = {
+    '01': 'ESTABLISHED', '02': 'SYN_SENT', '03': 'SYN_RECV', '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2', '06': 'TIME_WAIT', '07': 'CLOSE', '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK', '0A': 'LISTEN', '0B': 'CLOSING',
+}
+
+
+def decode_proc_address(value, family):
+    """
+    Decode a /proc/net address such as '0100007F:0050' into (ip, port)
+    
+    Addresses are hex in host byte order, one 32-bit word at a time
+    (little-endian on x86/ARM); the port is plain big-endian hex.
+    """
+    address, port = value.split(':')
+    raw = bytes.fromhex(address)
+    if family == 'ipv4':
+        packed = raw[::-1] if socket.htonl(1) != 1 else raw
+        ip = socket.inet_ntop(socket.AF_INET, packed)
+    else:
+        if socket.htonl(1) != 1:
+            raw = b''.join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+        ip = socket.inet_ntop(socket.AF_INET6, raw)
+    return ip, int(port, 16)
+
+
+def parse_proc_net(text, protocol, family):
+    """Parse the text of one /proc/net/{tcp,udp}[6] table into socket records"""
+    records = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        local_ip, local_port = decode_proc_address(fields[1], family)
+        remote_ip, remote_port = decode_proc_address(fields[2], family)
+        records.append({
+            'protocol': protocol,
+            'family': family,
+            'address': local_ip,
+            'port': local_port,
+            'remote_address': remote_ip,
+            'remote_port': remote_port,
+            'state': TCP_STATES.get(fields[3], fields[3]),
+            'uid': int(fields[7]),
+            'inode': int(fields[9]),
+        })
+    return records
+
+
+def map_socket_inodes(inodes=None, proc_dir='/proc'):
+    """
+    Map socket inodes to the processes holding them
+    
+    Every /proc/<pid>/fd/<n> that is a socket links to 'socket:[<inode>]'.
+    Processes we may not inspect (other users, without root) are skipped.
+    
+    Args:
+        inodes (set): Only look for these inodes; stops early once all are found
+    
+    Returns:
+        dict: {inode: {'pid': int, 'process': str}}
+    """
+    owners = {}
+    try:
+        pids = [entry.name for entry in os.scandir(proc_dir) if entry.name.isdigit()]
+    except OSError:
+        return owners
+    
+    for pid in pids:
+        fd_dir = os.path.join(proc_dir, pid, 'fd')
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        process = None
+        for fd in fds:
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if not target.startswith('socket:['):
+                continue
+            inode = int(target[8:-1])
+            if inodes is not None and inode not in inodes:
+                continue
+            if process is None:
+                try:
+                    with open(os.path.join(proc_dir, pid, 'comm')) as f:
+                        process = f.read().strip()
+                except OSError:
+                    process = '?'
+            owners.setdefault(inode, {'pid': int(pid), 'process': process})
+        if inodes is not None and len(owners) == len(inodes):
+            break
+    return owners
+
+
 class LocalPortScanner:
-    """Scan local system for open ports"""
+    """
+    Inventory of local listening ports.
     
-    def __init__(self):
+    On Linux the kernel socket tables in /proc/net are read directly, which
+    takes milliseconds and sends no traffic. Connecting to the ports is an
+    optional, concurrent verification step (and the fallback elsewhere).
+    """
+    
+    def __init__(self, proc_dir='/proc'):
         """Initialize port scanner"""
+        self.proc_dir = proc_dir
         self.open_ports = []
         self.common_services = {
             21: "FTP",
@@ -149,31 +263,110 @@ class LocalPortScanner:
             8080: "HTTP-Alt"
         }
     
-    def scan_ports(self, start_port=1, end_port=1024):
-        """Scan local system for open ports"""
+    def proc_available(self):
+        """True if the kernel socket tables can be read"""
+        return os.path.exists(os.path.join(self.proc_dir, 'net', 'tcp'))
+    
+    def list_listeners(self, include_processes=True):
+        """
+        Read listening TCP sockets and bound UDP sockets from /proc/net
+        
+        Args:
+            include_processes (bool): Resolve the owning PID and process name
+        
+        Returns:
+            list: Records sorted by (protocol, port, address)
+        """
+        listeners = []
+        for protocol, family, table in PROC_NET_TABLES:
+            path = os.path.join(self.proc_dir, table)
+            try:
+                with open(path) as f:
+                    records = parse_proc_net(f.read(), protocol, family)
+            except OSError:
+                continue  # e.g. IPv6 disabled
+            for record in records:
+                if protocol == 'tcp' and record['state'] != 'LISTEN':
+                    continue
+                # Unconnected UDP sockets are the "listening" ones
+                if protocol == 'udp' and record['remote_port'] != 0:
+                    continue
+                record['service'] = self.common_services.get(record['port'], "Unknown")
+                listeners.append(record)
+        
+        if include_processes and listeners:
+            owners = map_socket_inodes({r['inode'] for r in listeners}, self.proc_dir)
+            for record in listeners:
+                owner = owners.get(record['inode'], {})
+                record['pid'] = owner.get('pid')
+                record['process'] = owner.get('process')
+        
+        listeners.sort(key=lambda r: (r['protocol'], r['port'], r['address']))
+        return listeners
+    
+    def verify_ports(self, targets, timeout=0.1, max_workers=100):
+        """
+        Concurrently connect to (address, port) pairs
+        
+        Wildcard listeners are checked on loopback.
+        
+        Returns:
+            set: The (address, port) pairs that accepted a connection
+        """
+        def probe(target):
+            address, port = target
+            if address in ('0.0.0.0', '::'):
+                address = '127.0.0.1' if address == '0.0.0.0' else '::1'
+            family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            try:
+                with socket.socket(family, socket.SOCK_STREAM) as s:
+                    s.settimeout(timeout)
+                    return s.connect_ex((address, port)) == 0
+            except OSError:
+                return False
+        
+        targets = list(targets)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets) or 1))) as executor:
+            results = executor.map(probe, targets)
+            return {target for target, ok in zip(targets, results) if ok}
+    
+    def scan_ports(self, start_port=1, end_port=1024, verify=False, timeout=0.1):
+        """
+        Find open TCP ports on the local system
+        
+        Args:
+            verify (bool): Also connect to every listener found in /proc
+            timeout (float): Connect timeout for verification/probing
+        """
         print(f"Scanning local system for open ports ({start_port}-{end_port})...")
         
         self.open_ports = []
         
-        for port in range(start_port, end_port + 1):
-            try:
-                # Create socket and try to connect to localhost
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(0.1)
-                result = s.connect_ex(('127.0.0.1', port))
-                s.close()
-                
-                # If port is open
-                if result == 0:
-                    service = self.common_services.get(port, "Unknown")
-                    self.open_ports.append({
-                        'port': port,
-                        'service': service
-                    })
-                    print(f"Found open port {port} ({service})")
-            except:
-                pass
+        if self.proc_available():
+            listeners = [r for r in self.list_listeners()
+                         if r['protocol'] == 'tcp' and start_port <= r['port'] <= end_port]
+            if verify:
+                reachable = self.verify_ports({(r['address'], r['port']) for r in listeners},
+                                              timeout=timeout)
+            by_port = {}
+            for record in listeners:
+                if verify:
+                    record['verified'] = (record['address'], record['port']) in reachable
+                by_port.setdefault(record['port'], record)
+            self.open_ports = [by_port[port] for port in sorted(by_port)]
+        else:
+            # No socket tables to read (macOS, Windows): probe loopback concurrently
+            ports = range(start_port, end_port + 1)
+            reachable = self.verify_ports((('127.0.0.1', port) for port in ports), timeout=timeout)
+            for _, port in sorted(reachable, key=lambda t: t[1]):
+                self.open_ports.append({
+                    'port': port,
+                    'service': self.common_services.get(port, "Unknown"),
+                    'verified': True,
+                })
         
+        for record in self.open_ports:
+            print(f"Found open port {record['port']} ({record['service']})")
         print(f"Scan complete. Found {len(self.open_ports)} open ports.")
         return self.open_ports
     
@@ -181,6 +374,17 @@ class LocalPortScanner:
         """Get processes listening on ports (platform specific)"""
         listening = []
         
+        if self.proc_available():
+            listening = self.list_listeners()
+            print("\nListening processes:")
+            print(f"{'Proto':<6} {'Local address':<40} {'PID':>7}  Process")
+            for record in listening:
+                address = f"[{record['address']}]" if ':' in record['address'] else record['address']
+                pid = record['pid'] if record['pid'] is not None else '-'
+                print(f"{record['protocol'] + ('6' if record['family'] == 'ipv6' else ''):<6} "
+                      f"{address + ':' + str(record['port']):<40} {pid:>7}  {record['process'] or '-'}")
+            return listening
+        
         try:
             if platform.system() == 'Linux' or platform.system() == 'Darwin':
                 # Use netstat on Linux/macOS
@@ -446,8 +650,8 @@ def demonstrate_infrastructure_security():
     # 2. Open Port Scanner
     print("2. Local Port Scanner Demo")
     port_scanner = LocalPortScanner()
-    # Scan a small range of ports for the demo
-    port_scanner.scan_ports(1, 1000)
+    # Scan a small range of ports for the demo, confirming each with a connect
+    port_scanner.scan_ports(1, 1000, verify=True)
     port_scanner.get_listening_processes()
     print("")
     
@@ -0,0 +1,2076 @@
+#pip install unittest
+
+import os
+import shutil
+import re
+import csv
+import hashlib
+import gzip
+import ssl
+import json
+import time
+import random
+import socket
+import struct
+import asyncio
+import datetime
+import tempfile
+import tracemalloc
+import threading
+import importlib
+import sqlite3
+import logging
+import unittest
+from unittest import mock
+from collections import defaultdict
+from html import escape
+from urllib.parse import urlsplit, parse_qsl
+from functools import partial
+from fractions import Fraction
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from scapy.all import Ether, Dot1Q, IP, IPv6, TCP, UDP, ARP
+
+# Lecture modules start with a digit, so they can't be imported with a plain import statement
+network_security = importlib.import_module('3_network_security')
+vulnerability_assessment = importlib.import_module('4_vulnerability_assessment')
+logging_monitoring = importlib.import_module('5_logging_monitoring')
+infrastructure_security = importlib.import_module('6_infrastructure_security')
+
+
+def start_listeners(count, host='127.0.0.1'):
+    """Open `count` listening sockets on loopback and return them"""
+    listeners = []
+    for _ in range(count):
+        server = socket.socket()
+        server.bind((host, 0))
+        server.listen()
+        listeners.append(server)
+    return listeners
+
+
+def start_filtered_listeners(count, host='127.0.0.1'):
+    """
+    Emulate filtered ports on loopback: a listener whose accept queue is full
+    silently drops new SYNs, so connects to it time out like a firewall DROP.
+    Returns (ports, sockets to close).
+    """
+    ports, sockets = [], []
+    for server in start_listeners(count, host):
+        server.listen(0)
+        ports.append(server.getsockname()[1])
+        sockets.append(server)
+        for _ in range(3):
+            client = socket.socket()
+            client.setblocking(False)
+            client.connect_ex(server.getsockname())
+            sockets.append(client)
+    time.sleep(0.1)
+    return sorted(ports), sockets
+
+
+def make_self_signed_cert(directory, common_name='localhost', valid_from=-1, valid_until=30):
+    """
+    Write a self-signed certificate and key; return (cert_path, key_path)
+    
+    Validity bounds are in days relative to now (negative = in the past).
+    """
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now + datetime.timedelta(days=valid_from))
+            .not_valid_after(now + datetime.timedelta(days=valid_until))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_path = os.path.join(directory, f'{common_name}.crt')
+    key_path = os.path.join(directory, f'{common_name}.key')
+    with open(cert_path, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class StubServer:
+    """
+    Loopback TCP service for tests: sends an optional greeting on connect,
+    answers the first request with `response`, then closes. With an
+    ssl_context every connection is wrapped in TLS first.
+    """
+    
+    def __init__(self, greeting=b'', response=b'', ssl_context=None):
+        self.greeting = greeting
+        self.response = response
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+    
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+    
+    def _handle(self, conn):
+        try:
+            conn.settimeout(2)
+            if self.ssl_context:
+                conn = self.ssl_context.wrap_socket(conn, server_side=True)
+            if self.greeting:
+                conn.sendall(self.greeting)
+            if conn.recv(4096) and self.response:
+                conn.sendall(self.response)
+        except (OSError, ssl.SSLError):
+            pass
+        finally:
+            conn.close()
+    
+    def close(self):
+        self.server.close()
+
+
+class PortScannerTest(unittest.TestCase):
+    def setUp(self):
+        self.listeners = start_listeners(5)
+        self.ports = sorted(s.getsockname()[1] for s in self.listeners)
+
+    def tearDown(self):
+        for server in self.listeners:
+            server.close()
+
+    def test_async_scan_finds_listeners(self):
+        engine = network_security.AsyncPortScanner(concurrency=200, timeout=0.5)
+        results = []
+        open_ports = engine.scan_ports('127.0.0.1', self.ports + [1, 2, 3],
+                                       on_result=lambda *r: results.append(r))
+        self.assertEqual(open_ports, self.ports)
+        self.assertEqual(len(results), len(self.ports) + 3)
+        self.assertEqual({r[1] for r in results if r[0] in (1, 2, 3)}, {'closed'})
+
+    def test_rate_limit(self):
+        # A virtual clock that only advances when the limiter sleeps (exact
+        # fractions, so tiny sleeps near a whole token still move it)
+        clock = [Fraction(0)]
+
+        async def sleep(delay):
+            clock[0] += delay
+
+        limiter = network_security.RateLimiter(1000)
+
+        async def acquire_all():
+            for _ in range(300):
+                await limiter.acquire()
+
+        with mock.patch.object(network_security, 'time', mock.Mock(monotonic=lambda: clock[0])), \
+                mock.patch.object(network_security, 'asyncio', mock.Mock(sleep=sleep)):
+            limiter.updated = clock[0]
+            asyncio.run(acquire_all())
+        # The first 100 tokens are the burst; the other 200 arrive at 1000/s
+        self.assertEqual(clock[0], Fraction(200, 1000))
+
+    def test_adaptive_timeout(self):
+        estimator = network_security.RTTEstimator(initial_timeout=1.0, min_timeout=0.05)
+        self.assertEqual(estimator.timeout(), 1.0)
+        for _ in range(10):
+            estimator.update(0.001)
+        self.assertEqual(estimator.timeout(), 0.05)
+
+    def test_range_scan_matches_serial(self):
+        scanner = network_security.PortScanner('127.0.0.1')
+        low, high = min(self.ports), min(self.ports) + 4999
+
+        serial = [p for p in range(low, high + 1) if scanner.scan_port(p, timeout=1)]
+        concurrent = scanner.scan_port_range(low, high, timeout=1)
+
+        # Inside the ephemeral range a loopback connect can occasionally
+        # self-connect, so only the listeners are compared
+        expected = {p for p in self.ports if low <= p <= high}
+        self.assertTrue(expected <= set(serial))
+        self.assertTrue(expected <= set(concurrent))
+
+    def test_filtered_ports_probed_concurrently(self):
+        engine = network_security.AsyncPortScanner(timeout=0.25)
+        probe = engine.probe
+        in_flight = [0, 0]  # current, peak
+
+        async def counting_probe(*args):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            try:
+                return await probe(*args)
+            finally:
+                in_flight[0] -= 1
+
+        engine.probe = counting_probe
+        filtered, sockets = start_filtered_listeners(10)
+        try:
+            scanner = network_security.PortScanner('127.0.0.1')
+            serial = [p for p in filtered if scanner.scan_port(p, timeout=0.25)]
+            results = []
+            engine.scan_ports('127.0.0.1', filtered, on_result=lambda *r: results.append(r))
+        finally:
+            for s in sockets:
+                s.close()
+
+        self.assertEqual(serial, [])
+        self.assertEqual({state for _, state, _ in results}, {'filtered'})
+        self.assertEqual(in_flight[1], len(filtered))  # All timeouts overlap
+
+
+class ScanSchedulerTest(unittest.TestCase):
+    def test_port_spec(self):
+        self.assertEqual(network_security.parse_port_spec('top3,20-22,80'), [80, 23, 443, 20, 21, 22])
+        self.assertEqual(len(network_security.parse_port_spec('top100')), 100)
+        with self.assertRaises(ValueError):
+            network_security.parse_port_spec('70000')
+
+    def test_expand_targets(self):
+        targets = list(network_security.expand_targets(['10.0.0.0/30', '192.0.2.7', 'example.com']))
+        self.assertEqual(targets, ['10.0.0.1', '10.0.0.2', '192.0.2.7', 'example.com'])
+
+    def test_dns_cache(self):
+        cache = network_security.DNSCache()
+        resolved = asyncio.run(cache.resolve_all(['localhost', 'localhost', '127.0.0.9']))
+        self.assertIn(resolved['localhost'], ('127.0.0.1', '::1'))
+        self.assertEqual(resolved['127.0.0.9'], '127.0.0.9')
+        self.assertEqual(list(cache.cache), ['localhost'])
+
+    def test_scheduler_scans_twice(self):
+        # Each scan() has its own event loop; lookups beyond the DNS concurrency must wait on it
+        scheduler = network_security.ScanScheduler(timeout=0.2, retries=0)
+
+        async def slow_lookup(host):
+            await asyncio.sleep(0.001)
+            return None
+
+        scheduler.dns_cache._lookup = slow_lookup
+        names = [f"h{i}.invalid" for i in range(60)]
+        self.assertEqual(scheduler.scan(names, '80'), {})
+        scheduler.dns_cache.cache.clear()
+        self.assertEqual(scheduler.scan(names, '80'), {})
+
+    def test_interleaving_and_politeness(self):
+        scheduler = network_security.ScanScheduler(concurrency=50, host_concurrency=2, timeout=0.5)
+        in_flight = defaultdict(int)
+        peak = defaultdict(int)
+        order = []
+
+        async def fake_probe(ip, port, timeout):
+            in_flight[ip] += 1
+            peak[ip] = max(peak[ip], in_flight[ip])
+            order.append(ip)
+            await asyncio.sleep(0.001)
+            in_flight[ip] -= 1
+            return ('open' if port == 22 else 'closed'), 0.001
+
+        scheduler.engine.probe = fake_probe
+        result = scheduler.scan(['10.1.0.0/29'], 'top20')
+
+        self.assertEqual(len(result), 6)
+        self.assertTrue(all(ports == [22] for ports in result.values()))
+        self.assertLessEqual(max(peak.values()), 2)
+        # The first probes go to different hosts rather than one host's port list
+        self.assertEqual(len(set(order[:6])), 6)
+
+    def test_scan_loopback_listeners(self):
+        listeners = start_listeners(2)
+        ports = sorted(s.getsockname()[1] for s in listeners)
+        try:
+            result = network_security.ScanScheduler(timeout=0.5).scan(
+                ['127.0.0.1', 'localhost'], ','.join(map(str, ports)))
+        finally:
+            for server in listeners:
+                server.close()
+        self.assertEqual(result['127.0.0.1'], ports)
+
+
+class BannerGrabberTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cert, key = make_self_signed_cert(self.tmpdir.name)
+        tls_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        tls_context.load_cert_chain(cert, key)
+        http_response = b"HTTP/1.1 200 OK\r\nServer: nginx/1.24.0\r\nContent-Length: 0\r\n\r\n"
+        self.servers = {
+            'ssh': StubServer(greeting=b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.6\r\n"),
+            'smtp': StubServer(greeting=b"220 mail.example.com ESMTP Postfix (Ubuntu)\r\n"),
+            'http': StubServer(response=http_response),
+            'https': StubServer(response=http_response, ssl_context=tls_context),
+        }
+        self.ports = {name: server.port for name, server in self.servers.items()}
+    
+    def tearDown(self):
+        for server in self.servers.values():
+            server.close()
+        self.tmpdir.cleanup()
+    
+    def test_signature_table(self):
+        fingerprint = network_security.match_banner(b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3\r\n")
+        self.assertEqual(fingerprint, {'service': 'ssh', 'product': 'OpenSSH', 'version': '8.9p1'})
+        fingerprint = network_security.match_banner(b"220 (vsFTPd 3.0.3)\r\n")
+        self.assertEqual(fingerprint, {'service': 'ftp', 'product': 'vsFTPd', 'version': '3.0.3'})
+        self.assertIsNone(network_security.match_banner(b"\x00\x01garbage"))
+    
+    def test_fingerprint_stub_services(self):
+        grabber = network_security.BannerGrabber(timeout=1.0, read_timeout=0.3)
+        services = grabber.grab_ports('127.0.0.1', list(self.ports.values()))
+        found = {port: fp for port, fp in services.items()}
+        
+        self.assertEqual(found[self.ports['ssh']]['product'], 'OpenSSH')
+        self.assertEqual(found[self.ports['smtp']]['service'], 'smtp')
+        self.assertEqual(found[self.ports['smtp']]['product'], 'Postfix')
+        self.assertEqual(found[self.ports['http']]['service'], 'http')
+        self.assertEqual(found[self.ports['http']]['version'], '1.24.0')
+        self.assertEqual(found[self.ports['https']]['service'], 'https')
+        self.assertIn(found[self.ports['https']]['tls']['version'], ('TLSv1.2', 'TLSv1.3'))
+    
+    def test_cache_skips_reprobe(self):
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            path = f.name
+        try:
+            grabber = network_security.BannerGrabber(
+                read_timeout=0.3, cache=network_security.FingerprintCache(ttl=60, path=path))
+            grabber.grab_ports('127.0.0.1', [self.ports['ssh']])
+            connections = self.servers['ssh'].connections
+            
+            # A new scanner run loads the persisted cache and doesn't connect again
+            rerun = network_security.BannerGrabber(
+                cache=network_security.FingerprintCache(ttl=60, path=path))
+            services = rerun.grab_ports('127.0.0.1', [self.ports['ssh']])
+            self.assertEqual(services[self.ports['ssh']]['service'], 'ssh')
+            self.assertEqual(rerun.probes_sent, 0)
+            self.assertEqual(self.servers['ssh'].connections, connections)
+            
+            expired = network_security.BannerGrabber(
+                read_timeout=0.3, cache=network_security.FingerprintCache(ttl=-1))
+            expired.grab_ports('127.0.0.1', [self.ports['ssh']])
+            expired.grab_ports('127.0.0.1', [self.ports['ssh']])
+            self.assertEqual(expired.probes_sent, 2)
+        finally:
+            os.unlink(path)
+    
+    def test_only_open_ports_are_grabbed(self):
+        scanner = network_security.PortScanner('127.0.0.1')
+        low = min(self.ports.values())
+        high = max(self.ports.values())
+        grabber = network_security.BannerGrabber(read_timeout=0.3)
+        open_ports = scanner.scan_port_range(low, high, timeout=0.5, grab_banners=True,
+                                             grabber=grabber)
+        self.assertEqual(set(scanner.services), set(open_ports))
+        self.assertEqual(scanner.services[self.ports['ssh']]['service'], 'ssh')
+
+
+# Explicit MAC addresses keep scapy from trying to resolve them
+MACS = {'src': '02:00:00:00:00:01', 'dst': '02:00:00:00:00:02'}
+
+
+def make_capture_frames(count=1000, start=1700000000.0):
+    """Synthetic capture: a TCP conversation, IPv6 DNS, tagged VLAN traffic and ARP"""
+    templates = [
+        bytes(Ether(**MACS) / IP(src='10.0.0.1', dst='10.0.0.2') / TCP(sport=40000, dport=443, flags='PA') / (b'x' * 100)),
+        bytes(Ether(**MACS) / IP(src='10.0.0.2', dst='10.0.0.1') / TCP(sport=443, dport=40000, flags='A')),
+        bytes(Ether(**MACS) / IPv6(src='2001:db8::1', dst='2001:db8::53') / UDP(sport=5353, dport=53) / (b'q' * 30)),
+        bytes(Ether(**MACS) / Dot1Q(vlan=10) / IP(src='192.168.1.5', dst='192.168.1.1') / UDP(sport=123, dport=123)),
+        bytes(Ether(**MACS) / ARP()),
+    ]
+    return [(start + i * 0.01, templates[i % len(templates)]) for i in range(count)]
+
+
+def write_pcapng(path, frames, extra_interface_frames=()):
+    """
+    Write a pcapng fixture: interface 0 is Ethernet with nanosecond
+    timestamps, interface 1 is raw IP (its frames are written as Enhanced
+    Packet Blocks too), plus one Simple Packet Block at the end
+    """
+    def block(block_type, body):
+        body += b'\x00' * (-len(body) % 4)
+        length = len(body) + 12
+        return struct.pack('<II', block_type, length) + body + struct.pack('<I', length)
+    
+    def packet(interface, timestamp, frame):
+        ticks = int(round(timestamp * 1e9))
+        return block(6, struct.pack('<IIIII', interface, ticks >> 32, ticks & 0xFFFFFFFF,
+                                    len(frame), len(frame)) + frame)
+    
+    tsresol = struct.pack('<HHB3x', 9, 1, 9) + struct.pack('<HH', 0, 0)
+    with open(path, 'wb') as f:
+        f.write(block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)))
+        f.write(block(1, struct.pack('<HHI', 1, 0, 65535) + tsresol))
+        f.write(block(1, struct.pack('<HHI', 101, 0, 65535)))
+        for timestamp, frame in frames:
+            f.write(packet(0, timestamp, frame))
+        for timestamp, frame in extra_interface_frames:
+            f.write(packet(1, timestamp, frame))
+        f.write(block(3, struct.pack('<I', len(frames[0][1])) + frames[0][1]))
+
+
+class FlowCaptureTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pcap = os.path.join(self.tmpdir.name, 'fixture.pcap')
+        network_security.write_pcap(self.pcap, make_capture_frames())
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_parse_frame(self):
+        frame = bytes(Ether(**MACS) / Dot1Q(vlan=5) / IP(src='10.1.2.3', dst='10.3.2.1') /
+                      TCP(sport=1234, dport=80, flags='S'))
+        proto, src, dst, sport, dport, flags = network_security.parse_frame(memoryview(frame))
+        self.assertEqual((proto, sport, dport), (6, 1234, 80))
+        self.assertEqual(network_security.format_address(src), '10.1.2.3')
+        self.assertEqual(network_security.tcp_flags_text(flags), 'S')
+        
+        frame = bytes(IPv6(src='::1', dst='::2') / UDP(sport=53, dport=5353))
+        parsed = network_security.parse_frame(frame, network_security.LINKTYPE_RAW)
+        self.assertEqual(parsed[:2], (17, socket.inet_pton(socket.AF_INET6, '::1')))
+        self.assertIsNone(network_security.parse_frame(bytes(Ether(**MACS) / ARP())))
+        self.assertIsNone(network_security.parse_frame(frame[:10], network_security.LINKTYPE_RAW))
+    
+    def test_replay_aggregates_flows(self):
+        output = os.path.join(self.tmpdir.name, 'flows.ndjson')
+        sniffer = network_security.PacketSniffer()
+        stats = sniffer.replay_pcap(self.pcap, summary_interval=2, output_file=output)
+        
+        self.assertEqual(stats['packets'], 1000)
+        self.assertEqual(stats['non_ip'], 200)
+        self.assertEqual(stats['flows'], 4)
+        with open(output) as f:
+            records = [json.loads(line) for line in f]
+        summaries = [r for r in records if r['type'] == 'summary']
+        flows = {(r['src'], r['src_port']): r for r in records if r['type'] == 'flow'}
+        self.assertEqual(len(summaries), 5)  # 10 s of packets, every 2 s, plus the final one
+        self.assertEqual(flows[('10.0.0.1', 40000)]['packets'], 200)
+        self.assertEqual(flows[('10.0.0.1', 40000)]['tcp_flags'], 'PA')
+        self.assertEqual(flows[('2001:db8::1', 5353)]['protocol'], 'UDP')
+        
+        stats = sniffer.replay_pcap(self.pcap, filter_str='tcp', output_file=output)
+        self.assertEqual(stats['flows'], 2)
+    
+    def test_pipeline_skips_scapy(self):
+        big = os.path.join(self.tmpdir.name, 'big.pcap')
+        network_security.write_pcap(big, make_capture_frames(5000))
+        # Headers are unpacked in place; no frame is ever dissected by scapy
+        with mock.patch('scapy.packet.Packet.dissect', side_effect=AssertionError("dissected")):
+            stats = network_security.PacketSniffer().replay_pcap(big, output_file=os.devnull)
+        self.assertEqual(stats['packets'], 5000)
+        self.assertEqual(stats['non_ip'], 1000)  # The ARP frames
+        self.assertEqual(stats['flows'], 4)
+    
+    def test_summaries_while_idle(self):
+        tcp = bytes(Ether(**MACS) / IP(src='10.0.0.1', dst='10.0.0.2') / TCP(sport=40000, dport=80))
+        udp = bytes(Ether(**MACS) / IP(src='10.0.0.1', dst='10.0.0.2') / UDP(sport=53, dport=53))
+        # One matching packet, then only idle ticks and packets the filter drops
+        frames = [(100.0, tcp, len(tcp))]
+        frames += [(100.0 + t, None, 0) for t in range(1, 6)]
+        frames += [(100.0 + t, udp, len(udp)) for t in range(6, 11)]
+        
+        output = os.path.join(self.tmpdir.name, 'idle.ndjson')
+        sniffer = network_security.PacketSniffer()
+        stats = sniffer._run_pipeline(iter(frames), network_security.LINKTYPE_ETHERNET,
+                                      network_security.CaptureFilter('tcp'), 2, output, 5, 3.0)
+        with open(output) as f:
+            records = [json.loads(line) for line in f]
+        
+        self.assertEqual((stats['packets'], stats['filtered'], stats['flows']), (6, 5, 0))
+        self.assertEqual([r['time'] for r in records if r['type'] == 'summary'],
+                         [102.0, 104.0, 106.0, 108.0, 110.0, 110.0])
+        # The idle flow is exported by the 104 s summary, not at the end of the capture
+        self.assertEqual([r['type'] for r in records[:3]], ['summary', 'flow', 'summary'])
+    
+    def test_live_frames_tick_on_timeout(self):
+        sock = mock.Mock()
+        sock.recvfrom_into.side_effect = socket.timeout
+        ticks = network_security.PacketSniffer()._live_frames(sock, None, None)
+        self.assertEqual([next(ticks)[1:] for _ in range(3)], [(None, 0)] * 3)
+    
+    def test_live_capture_loopback(self):
+        def traffic():
+            time.sleep(0.3)
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for _ in range(20):
+                sender.sendto(b'ping', ('127.0.0.1', 9))
+            sender.close()
+        
+        thread = threading.Thread(target=traffic)
+        thread.start()
+        sniffer = network_security.PacketSniffer()
+        stats = sniffer.capture_flows(interface='lo', filter_str='udp', duration=1.0,
+                                      output_file=os.devnull)
+        thread.join()
+        if stats is None:
+            self.skipTest("raw packet capture not permitted")
+        self.assertGreaterEqual(stats['packets'], 20)
+        self.assertEqual(stats['filtered'], 0)  # The kernel filter already dropped the rest
+
+
+class PcapAnalysisTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.frames = make_capture_frames()
+        self.pcap = os.path.join(self.tmpdir.name, 'fixture.pcap')
+        self.pcapng = os.path.join(self.tmpdir.name, 'fixture.pcapng')
+        network_security.write_pcap(self.pcap, self.frames)
+        raw_ip = bytes(IP(src='172.16.0.1', dst='172.16.0.2') / UDP(sport=1, dport=2))
+        write_pcapng(self.pcapng, self.frames, [(1700000000.5, raw_ip)])
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_pcapng_reader(self):
+        for use_mmap in (False, True):
+            with network_security.PcapReader(self.pcapng, use_mmap=use_mmap) as reader:
+                records = [(ts, bytes(frame), length) for ts, frame, length in reader]
+                self.assertEqual(reader.format, 'pcapng')
+                self.assertEqual(reader.linktype, network_security.LINKTYPE_ETHERNET)
+                self.assertEqual(reader.skipped, 1)  # The raw-IP interface
+            # Every EPB plus the Simple Packet Block (which reuses the last timestamp)
+            self.assertEqual(len(records), len(self.frames) + 1)
+            self.assertAlmostEqual(records[1][0], self.frames[1][0], places=6)
+            self.assertEqual(records[-1][1], self.frames[0][1])
+            self.assertEqual([r[1] for r in records[:-1]], [f for _, f in self.frames])
+    
+    def test_pcapng_requires_section_header(self):
+        with open(self.pcapng, 'rb') as f, network_security.PcapReader(self.pcapng) as reader:
+            f.seek(28)  # Skip the Section Header Block
+            with self.assertRaises(ValueError):
+                next(reader._pcapng_blocks(f.read))
+    
+    def test_mmap_matches_buffered(self):
+        sniffer = network_security.PacketSniffer()
+        for path in (self.pcap, self.pcapng):
+            buffered = sniffer.replay_pcap(path, output_file=os.devnull)
+            buffered_flows = dict(sniffer.flows.flows)
+            mapped = sniffer.replay_pcap(path, output_file=os.devnull, use_mmap=True)
+            self.assertEqual(dict(sniffer.flows.flows), buffered_flows)
+            self.assertEqual(mapped['packets'], buffered['packets'])
+    
+    def test_filter_expressions(self):
+        sniffer = network_security.PacketSniffer()
+        cases = {
+            'tcp and port 443': 2,
+            'tcp and dst port 443': 1,
+            'src net 10.0.0.0/24': 2,
+            'ip6 or host 192.168.1.5': 2,
+            'not tcp and (udp && portrange 100-200)': 1,
+            'icmp': 0,
+        }
+        for expression, flows in cases.items():
+            sniffer.replay_pcap(self.pcap, filter_str=expression, output_file=os.devnull)
+            self.assertEqual(len(sniffer.flows.flows), flows, expression)
+        
+        self.assertEqual(network_security.CaptureFilter('tcp and port 80').protocol, 'tcp')
+        self.assertIsNone(network_security.CaptureFilter('tcp or udp').protocol)
+        web = network_security.CaptureFilter('src net 10.0.0.0/24 and not (dst port 22 or icmp)')
+        inside, outside = socket.inet_aton('10.0.0.7'), socket.inet_aton('10.0.1.7')
+        self.assertTrue(web(6, inside, outside, 40000, 443))
+        self.assertFalse(web(6, inside, outside, 40000, 22))
+        self.assertFalse(web(1, inside, outside, 0, 0))
+        self.assertFalse(web(6, outside, inside, 40000, 443))
+        for bad in ('tcp and', 'frobnicate', '(udp', 'port 70000'):
+            with self.assertRaises(ValueError):
+                network_security.CaptureFilter(bad)
+    
+    def test_streaming_memory(self):
+        big = os.path.join(self.tmpdir.name, 'big.pcap')
+        network_security.write_pcap(big, make_capture_frames(100000))
+        size = os.path.getsize(big)
+        for use_mmap in (False, True):
+            tracemalloc.start()
+            with network_security.PcapReader(big, use_mmap=use_mmap) as reader:
+                count = sum(1 for _ in reader)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.assertEqual(count, 100000)
+            self.assertLess(peak, size / 20)
+
+
+class CertificateScannerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cert, key = make_self_signed_cert(self.tmpdir.name, valid_until=90)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert, key)
+        self.server = StubServer(ssl_context=context)
+        
+        expired_cert, expired_key = make_self_signed_cert(self.tmpdir.name, 'expired.test', -60, -1)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(expired_cert, expired_key)
+        self.expired_server = StubServer(ssl_context=context)
+        
+        # Accepts TCP but never speaks TLS, like a hung service
+        self.silent = socket.socket()
+        self.silent.bind(('127.0.0.1', 0))
+        self.silent.listen()
+    
+    def tearDown(self):
+        self.server.close()
+        self.expired_server.close()
+        self.silent.close()
+        self.tmpdir.cleanup()
+    
+    def test_parse_endpoints(self):
+        endpoints = network_security.parse_endpoints(
+            ['example.com', 'example.com:443', 'mail.example.com:993  # IMAPS', '',
+             '[2001:db8::1]:8443', '2001:db8::2'])
+        self.assertEqual(endpoints, [('example.com', 443), ('mail.example.com', 993),
+                                     ('2001:db8::1', 8443), ('2001:db8::2', 443)])
+    
+    def test_inventory(self):
+        scanner = network_security.CertificateScanner(timeout=1.0, cafile=self.cert)
+        completed = []
+        records = scanner.scan([f'localhost:{self.server.port}',
+                                f'127.0.0.1:{self.expired_server.port}',
+                                f'127.0.0.1:{self.silent.getsockname()[1]}',
+                                '127.0.0.1:1'], on_result=lambda r: completed.append(r['port']))
+        valid, expired, hung, closed = records
+        
+        self.assertEqual(valid['status'], 'valid')
+        self.assertEqual(valid['subject'], 'localhost')
+        self.assertEqual(valid['san'], ['localhost'])
+        self.assertIn(valid['days_left'], (88, 89, 90))
+        self.assertFalse(valid['expired'])
+        
+        # Verification fails, but the inventory still has the certificate's dates
+        self.assertEqual(expired['status'], 'invalid')
+        self.assertTrue(expired['expired'])
+        self.assertEqual(expired['subject'], 'expired.test')
+        
+        self.assertEqual(hung['status'], 'error')
+        self.assertIn('Timed out', hung['error'])
+        self.assertEqual(closed['status'], 'error')
+        self.assertEqual(completed[-1], hung['port'])  # The hung endpoint doesn't hold up the others
+        self.assertEqual([r['host'] for r in scanner.expiring()], ['127.0.0.1'])
+        
+        output = os.path.join(self.tmpdir.name, 'inventory.csv')
+        scanner.save_inventory(output, 'csv')
+        with open(output) as f:
+            self.assertEqual(f.readline().strip().split(','), network_security.INVENTORY_FIELDS)
+    
+    def test_session_resumption(self):
+        scanner = network_security.CertificateScanner(timeout=1.0, cafile=self.cert,
+                                                      resume_sessions=True)
+        endpoint = [('localhost', self.server.port)]
+        first = scanner.scan(endpoint)[0]
+        second = scanner.scan(endpoint)[0]
+        self.assertFalse(first['session_reused'])
+        self.assertTrue(second['session_reused'])
+        self.assertEqual(second['subject'], 'localhost')
+    
+    def test_bulk_scan(self):
+        scanner = network_security.CertificateScanner(concurrency=50, timeout=2.0, cafile=self.cert)
+        endpoints = [('localhost', self.server.port)] * 200
+        scan_endpoint = scanner.scan_endpoint
+        in_flight = [0, 0]  # current, peak
+        
+        async def counting_scan(*args):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            try:
+                return await scan_endpoint(*args)
+            finally:
+                in_flight[0] -= 1
+        
+        scanner.scan_endpoint = counting_scan
+        records = asyncio.run(scanner.scan_all(endpoints))
+        self.assertEqual({r['status'] for r in records}, {'valid'})
+        self.assertEqual(in_flight[1], 50)  # Bounded by concurrency, and it was all used
+        self.assertEqual(self.server.connections, 200)
+
+
+IPTABLES_DUMP = """\
+# Generated by iptables-save
+*filter
+:INPUT DROP [0:0]
+:FORWARD DROP [0:0]
+:OUTPUT ACCEPT [0:0]
+:LOGDROP - [0:0]
+-A INPUT -i lo -j ACCEPT
+-A INPUT -m conntrack --ctstate RELATED,ESTABLISHED -j ACCEPT
+-A INPUT -s 10.0.0.0/8 -p tcp -m tcp --dport 22 -j ACCEPT
+-A INPUT -s 10.1.0.0/16 -p tcp -m tcp --dport 22 -j ACCEPT
+-A INPUT -s 10.2.3.4/32 -p tcp -m tcp --dport 22 -j DROP
+-A INPUT -p tcp -m multiport --dports 80,443,8000:8100 -m comment --comment "web servers" -j ACCEPT
+-A INPUT ! -s 192.168.0.0/16 -p udp -m udp --sport 53 -j LOGDROP
+-A LOGDROP -j LOG --log-prefix "drop: "
+-A LOGDROP -j DROP
+COMMIT
+"""
+
+NFT_DUMP = """\
+table inet filter {
+\tset blocked {
+\t\ttype ipv4_addr
+\t\telements = { 1.2.3.4, 5.6.7.8 }
+\t}
+
+\tchain input {
+\t\ttype filter hook input priority filter; policy drop;
+\t\tiifname "lo" accept
+\t\tct state established,related accept
+\t\tip saddr @blocked drop
+\t\tip saddr 10.0.0.0/8 tcp dport 22 counter packets 0 bytes 0 accept
+\t\ttcp dport { 80, 443, 8000-8100 } accept comment "web servers"
+\t\ttcp dport 443 drop
+\t\tip6 saddr fe80::/10 udp dport 546 accept
+\t\tip saddr != 192.168.0.0/16 udp sport 53 jump logdrop
+\t\tmeta l4proto { tcp, udp } th dport 9999 reject with icmpx type port-unreachable
+\t}
+
+\tchain logdrop {
+\t\tlog prefix "drop: " level info
+\t\tdrop
+\t}
+}
+"""
+
+
+def make_large_ruleset(count=50000, seed=7):
+    """Synthetic iptables-save dump: per-subnet SSH-style rules, host rules, port ranges"""
+    rng = random.Random(seed)
+    lines = ['*filter', ':INPUT DROP [0:0]', ':FORWARD DROP [0:0]', ':OUTPUT ACCEPT [0:0]',
+             '-A INPUT -i lo -j ACCEPT',
+             '-A INPUT -m conntrack --ctstate RELATED,ESTABLISHED -j ACCEPT']
+    for _ in range(count):
+        kind = rng.random()
+        action = rng.choice(['ACCEPT', 'DROP'])
+        if kind < 0.6:
+            lines.append(f"-A INPUT -s 10.{rng.randrange(256)}.{rng.randrange(256)}.0/24 -p tcp -m tcp "
+                         f"--dport {rng.randrange(1, 65536)} -j {action}")
+        elif kind < 0.8:
+            lines.append(f"-A INPUT -d 172.16.{rng.randrange(256)}.{rng.randrange(256)}/32 -p udp -m udp "
+                         f"--dport {rng.randrange(1, 65536)} -j {action}")
+        elif kind < 0.95:
+            low = rng.randrange(1, 60000)
+            lines.append(f"-A INPUT -p tcp -m tcp --dport {low}:{low + rng.randrange(1, 200)} -j {action}")
+        else:
+            lines.append(f"-A INPUT -s 192.168.{rng.randrange(256)}.0/24 -j {action}")
+    lines.append('COMMIT')
+    return '\n'.join(lines) + '\n'
+
+
+def random_packets(ruleset, count, seed=1):
+    rng = random.Random(seed)
+    return [ruleset.make_packet(f"10.{rng.randrange(256)}.{rng.randrange(256)}.5",
+                                f"172.16.{rng.randrange(256)}.{rng.randrange(256)}",
+                                rng.choice(['tcp', 'udp']), 40000, rng.randrange(1, 65536))
+            for _ in range(count)]
+
+
+class FirewallRulesetTest(unittest.TestCase):
+    def check(self, ruleset, chain, *packet, **interfaces):
+        verdict, rule = ruleset.lookup(ruleset.make_packet(*packet, **interfaces), chain)
+        return verdict, rule.position if rule else None
+    
+    def test_iptables_lookup(self):
+        ruleset = network_security.FirewallRuleset().parse_iptables_save(IPTABLES_DUMP)
+        self.assertEqual(ruleset.rule_count, 9)
+        rules = ruleset.chains[('filter', 'INPUT')]
+        self.assertEqual(rules[5].comment, 'web servers')
+        self.assertTrue(rules[1].conditional)
+        
+        self.assertEqual(self.check(ruleset, 'INPUT', '10.2.3.4', '10.9.9.9', 'tcp', 5555, 22), ('ACCEPT', 2))
+        self.assertEqual(self.check(ruleset, 'INPUT', '8.8.8.8', '10.9.9.9', 'tcp', 5555, 8050), ('ACCEPT', 5))
+        self.assertEqual(self.check(ruleset, 'INPUT', '8.8.8.8', '10.9.9.9', 'tcp', 5555, 22), ('DROP', None))
+        self.assertEqual(self.check(ruleset, 'INPUT', '8.8.8.8', '10.9.9.9', 'tcp', 1, 22,
+                                    in_interface='lo'), ('ACCEPT', 0))
+        # Jump into LOGDROP: LOG falls through, DROP decides
+        verdict, rule = ruleset.lookup(ruleset.make_packet('8.8.8.8', '10.9.9.9', 'udp', 53, 5000))
+        self.assertEqual((verdict, rule.chain, rule.position), ('DROP', 'LOGDROP', 1))
+        # The negated source keeps 192.168/16 out of the jump
+        self.assertEqual(self.check(ruleset, 'INPUT', '192.168.1.1', '10.9.9.9', 'udp', 53, 5000), ('DROP', None))
+    
+    def test_nftables_lookup(self):
+        ruleset = network_security.FirewallRuleset().parse_nftables(NFT_DUMP)
+        rules = ruleset.chains[('inet filter', 'input')]
+        self.assertEqual(len(rules), 9)
+        self.assertEqual(ruleset.policies[('inet filter', 'input')], 'DROP')
+        self.assertEqual(rules[4].comment, 'web servers')
+        self.assertTrue(rules[2].conditional)  # Named set
+        
+        self.assertEqual(self.check(ruleset, 'INPUT', '10.1.1.1', '10.9.9.9', 'tcp', 5555, 22), ('ACCEPT', 3))
+        self.assertEqual(self.check(ruleset, 'input', 'fe80::1', 'fe80::2', 'udp', 547, 546), ('ACCEPT', 6))
+        self.assertEqual(self.check(ruleset, 'input', '8.8.8.8', '10.9.9.9', 'udp', 1, 9999), ('REJECT', 8))
+        self.assertEqual(self.check(ruleset, 'input', '8.8.8.8', '10.9.9.9', 'udp', 53, 1)[0], 'DROP')
+        # IPv4-only rule doesn't match IPv6 traffic
+        self.assertEqual(self.check(ruleset, 'input', 'fe80::1', 'fe80::2', 'tcp', 1, 22), ('DROP', None))
+    
+    def test_nftables_families_kept_apart(self):
+        dump = (
+            "table ip filter {\n\tchain input {\n\t\ttype filter hook input priority 0; policy drop;\n"
+            "\t\ttcp dport 22 accept\n\t}\n}\n"
+            "table ip6 filter {\n\tchain input {\n\t\ttype filter hook input priority 0; policy accept;\n"
+            "\t\ttcp dport 23 drop\n\t}\n}\n"
+        )
+        ruleset = network_security.FirewallRuleset().parse_nftables(dump)
+        self.assertEqual(len(ruleset.chains[('ip filter', 'input')]), 1)
+        self.assertEqual(len(ruleset.chains[('ip6 filter', 'input')]), 1)
+        self.assertEqual(ruleset.policies[('ip filter', 'input')], 'DROP')
+        self.assertEqual(ruleset.policies[('ip6 filter', 'input')], 'ACCEPT')
+        
+        self.assertEqual(self.check(ruleset, 'input', '8.8.8.8', '10.0.0.1', 'tcp', 1, 443), ('DROP', None))
+        self.assertEqual(self.check(ruleset, 'input', '8.8.8.8', '10.0.0.1', 'tcp', 1, 22), ('ACCEPT', 0))
+        self.assertEqual(self.check(ruleset, 'input', '2001:db8::1', '2001:db8::2', 'tcp', 1, 443), ('ACCEPT', None))
+        self.assertEqual(self.check(ruleset, 'input', '2001:db8::1', '2001:db8::2', 'tcp', 1, 23), ('DROP', 0))
+        
+        # An inet table is traversed too: its drop wins over the ip table's accept
+        dump += "table inet filter {\n\tchain input {\n\t\ttype filter hook input priority 0;\n\t\ttcp dport 22 drop\n\t}\n}\n"
+        ruleset = network_security.FirewallRuleset().parse_nftables(dump)
+        self.assertEqual(self.check(ruleset, 'input', '8.8.8.8', '10.0.0.1', 'tcp', 1, 22), ('DROP', 0))
+        self.assertEqual(ruleset.lookup(ruleset.make_packet('8.8.8.8', '10.0.0.1', 'tcp', 1, 22),
+                                        'input', 'ip filter')[0], 'ACCEPT')
+    
+    def test_anomalies(self):
+        for ruleset, expected in (
+                (network_security.FirewallRuleset().parse_iptables_save(IPTABLES_DUMP),
+                 [('redundant', 3, 2), ('shadowed', 4, 2)]),
+                (network_security.FirewallRuleset().parse_nftables(NFT_DUMP),
+                 [('shadowed', 5, 4)])):
+            found = [(a['type'], a['rule'], a['covered_by']) for a in ruleset.find_anomalies()]
+            self.assertEqual(found, expected)
+    
+    def test_anomalies_match_pairwise_check(self):
+        ruleset = network_security.FirewallRuleset().parse_iptables_save(make_large_ruleset(2000))
+        rules = ruleset.chains[('filter', 'INPUT')]
+        pairwise = []
+        for rule in rules:
+            for earlier in rules[:rule.position]:
+                if earlier.target in network_security.TERMINAL_TARGETS and earlier.covers(rule):
+                    pairwise.append((rule.position, earlier.position))
+                    break
+        indexed = [(a['rule'], a['covered_by']) for a in ruleset.find_anomalies()]
+        self.assertEqual(indexed, pairwise)
+        self.assertTrue(indexed)
+    
+    def test_large_ruleset_index(self):
+        ruleset = network_security.FirewallRuleset().parse_iptables_save(make_large_ruleset())
+        self.assertEqual(ruleset.rule_count, 50002)
+        
+        packets = random_packets(ruleset, 100)
+        matches = network_security.FirewallRule.matches
+        verdicts, rules_tested = {}, {}
+        for linear in (False, True):
+            calls = [0]
+            
+            def counting_matches(rule, packet):
+                calls[0] += 1
+                return matches(rule, packet)
+            
+            with mock.patch.object(network_security.FirewallRule, 'matches', counting_matches):
+                verdicts[linear] = [ruleset.lookup(packet, linear=linear) for packet in packets]
+            rules_tested[linear] = calls[0]
+        
+        self.assertEqual(verdicts[False], verdicts[True])
+        # The index hands each packet a short candidate list instead of the whole chain
+        self.assertLess(rules_tested[False] * 10, rules_tested[True])
+        self.assertTrue(ruleset.find_anomalies())
+
+
+class StubSite:
+    """
+    Loopback HTTP/1.1 site for crawler tests. `pages` maps a path (with
+    query) to HTML, or a bare path to a function of the GET/POST parameters
+    returning HTML; every response is delayed by `delay` seconds. With
+    `validators` ('etag', 'last-modified') pages carry validators derived from
+    their content and conditional requests get 304s. Tracks requests, TCP
+    connections and the peak number of requests in flight.
+    """
+    
+    def __init__(self, pages, delay=0.0, headers=None, validators=()):
+        self.pages = pages
+        self.delay = delay
+        self.headers = headers or {}
+        self.validators = validators
+        self.requests = []
+        self.not_modified = 0
+        self.connections = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        site = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+            
+            def setup(self):
+                super().setup()
+                with site.lock:
+                    site.connections += 1
+            
+            def do_GET(self):
+                self.respond(urlsplit(self.path).query)
+            
+            def do_POST(self):
+                self.respond(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+            
+            def respond(self, query):
+                with site.lock:
+                    site.requests.append(self.path)
+                    site.active += 1
+                    site.peak = max(site.peak, site.active)
+                time.sleep(site.delay)
+                with site.lock:
+                    site.active -= 1
+                body = site.pages.get(self.path, site.pages.get(urlsplit(self.path).path))
+                if callable(body):
+                    body = body(dict(parse_qsl(query, keep_blank_values=True)))
+                status = 200 if body is not None else 404
+                body = (body if body is not None else 'not found').encode()
+                
+                validators = {}
+                version = hashlib.sha1(body).hexdigest()[:16]
+                if 'etag' in site.validators:
+                    validators['ETag'] = f'"{version}"'
+                if 'last-modified' in site.validators:
+                    # A fake date per content version is enough for an exact-match check
+                    stamp = datetime.datetime(2026, 1, 1) + datetime.timedelta(seconds=int(version[:6], 16))
+                    validators['Last-Modified'] = stamp.strftime('%a, %d %b %Y %H:%M:%S GMT')
+                if status == 200 and validators and (
+                        self.headers.get('If-None-Match', object()) == validators.get('ETag') or
+                        self.headers.get('If-Modified-Since', object()) == validators.get('Last-Modified')):
+                    with site.lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    for name, value in validators.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    return
+                
+                self.send_response(status)
+                for name, value in validators.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in site.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_site(sections=4, pages_per_section=5):
+    """Three-level site: / -> /section/N -> /section/N/page/M, with noise links"""
+    pages = {'/': '<html><body>' + ''.join(
+        f'<a href="/section/{n}">Section {n}</a>' for n in range(sections)) +
+        '<a href="mailto:admin@example.com">mail</a><a href="http://other.example/">elsewhere</a>'
+        '<form action="/search"><input name="q"><input type="submit" value="Go"></form></body></html>'}
+    for n in range(sections):
+        links = ''.join(f'<a href="page/{m}#top">Page {m}</a>' for m in range(pages_per_section))
+        pages[f'/section/{n}'] = f'<html><head><base href="/section/{n}/"></head><body>{links}' \
+                                 f'<a href="/section/{n}/../{n}">self</a><a href="/">home</a></body></html>'
+        for m in range(pages_per_section):
+            pages[f'/section/{n}/page/{m}'] = (
+                f'<html><body><a href="/list?b=2&amp;a=1">list</a><a href="/list?a=1&b=2">same</a>'
+                f'<form method="POST" action="/comment"><textarea name="text"></textarea>'
+                f'<input type="hidden" name="page" value="{n}.{m}"></form></body></html>')
+    pages['/list?a=1&b=2'] = '<html><body><a href="/deep">deeper</a></body></html>'
+    return pages
+
+
+class WebCrawlerTest(unittest.TestCase):
+    def test_normalize_url(self):
+        normalize = vulnerability_assessment.normalize_url
+        self.assertEqual(normalize('HTTP://Example.COM:80'), 'http://example.com/')
+        self.assertEqual(normalize('https://example.com:443/a/./b/../c/?z=1&a=2#frag'),
+                         'https://example.com/a/c/?a=2&z=1')
+        self.assertEqual(normalize('../x?q', 'http://example.com:8080/a/b/'), 'http://example.com:8080/a/x?q=')
+        self.assertIsNone(normalize('mailto:admin@example.com', 'http://example.com/'))
+        self.assertIsNone(normalize('javascript:void(0)', 'http://example.com/'))
+    
+    def test_crawl_depth_and_dedup(self):
+        site = StubSite(make_site())
+        try:
+            scanner = vulnerability_assessment.WebVulnScanner(site.url, max_urls=100)
+            scanner.crawl(max_depth=1)
+            self.assertEqual(len(scanner.visited_urls), 5)  # Root and the 4 sections
+            self.assertEqual(len(scanner.forms), 1)
+            
+            scanner = vulnerability_assessment.WebVulnScanner(site.url, max_urls=100)
+            scanner.crawl(max_depth=3)
+        finally:
+            site.close()
+        
+        # 1 + 4 sections + 20 pages + one list page (two spellings) at depth 3;
+        # /deep would be depth 4
+        self.assertEqual(len(scanner.visited_urls), 26)
+        self.assertIn(site.url + '/list?a=1&b=2', scanner.visited_urls)
+        self.assertNotIn(site.url + '/deep', scanner.visited_urls)
+        self.assertEqual(len(site.requests), 5 + 26)
+        self.assertEqual(scanner.pages_parsed, 26)
+        self.assertEqual(len(scanner.forms), 21)
+        
+        form = [f for f in scanner.forms if f['method'] == 'post'][0]
+        self.assertEqual(form['action'], site.url + '/comment')
+        self.assertEqual([i['type'] for i in form['inputs']], ['text', 'hidden'])
+    
+    def test_max_urls(self):
+        site = StubSite(make_site())
+        try:
+            scanner = vulnerability_assessment.WebVulnScanner(site.url, max_urls=7, concurrency=4)
+            scanner.crawl(max_depth=3)
+        finally:
+            site.close()
+        self.assertEqual(len(site.requests), 7)
+        self.assertEqual(len(scanner.visited_urls), 7)
+    
+    def test_concurrency_and_keep_alive(self):
+        site = StubSite(make_site(sections=8, pages_per_section=8), delay=0.05)
+        try:
+            scanner = vulnerability_assessment.WebVulnScanner(site.url, max_urls=200, concurrency=16,
+                                                              per_host=6)
+            scanner.crawl(max_depth=2)
+        finally:
+            site.close()
+        
+        pages = len(scanner.visited_urls)
+        self.assertEqual(pages, 1 + 8 + 64)
+        self.assertLessEqual(site.peak, 6)
+        self.assertGreater(site.peak, 1)
+        self.assertLessEqual(site.connections, 6)  # Reused, not one per request
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmpdir.name, 'responses.json')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def scan(self, site):
+        scanner = vulnerability_assessment.WebVulnScanner(site.url, max_urls=100, cache_file=self.cache_file)
+        scanner.crawl(max_depth=3)
+        scanner.check_security_headers()
+        return scanner
+    
+    def test_rescan_gets_304s(self):
+        pages = make_site()
+        site = StubSite(pages, headers={'X-Frame-Options': 'DENY'}, validators=('etag',))
+        try:
+            first = self.scan(site)
+            self.assertEqual(len(site.requests), 26)  # Header checks reused the crawl
+            self.assertEqual(first.cache.hits, 26)
+            
+            site.requests.clear()
+            second = self.scan(site)
+            self.assertEqual(len(site.requests), 26)
+            self.assertEqual(site.not_modified, 26)
+            self.assertEqual(second.pages_parsed, 0)
+            self.assertEqual(second.visited_urls, first.visited_urls)
+            self.assertEqual(len(second.forms), len(first.forms))
+            self.assertEqual(len(second.vulnerabilities), len(first.vulnerabilities))
+            self.assertEqual(len(first.vulnerabilities), 26 * 4)
+            
+            # One changed page is downloaded and parsed again
+            pages['/section/2'] += '<a href="/new">new</a>'
+            third = self.scan(site)
+        finally:
+            site.close()
+        self.assertEqual(third.pages_parsed, 1)
+        self.assertEqual(len(third.visited_urls), 27)
+    
+    def test_last_modified(self):
+        site = StubSite(make_site(), validators=('last-modified',))
+        try:
+            self.scan(site)
+            self.scan(site)
+        finally:
+            site.close()
+        self.assertEqual(site.not_modified, 26)
+    
+    def test_without_validators_nothing_is_persisted(self):
+        site = StubSite(make_site())
+        try:
+            self.scan(site)
+            second = self.scan(site)
+        finally:
+            site.close()
+        self.assertEqual(site.not_modified, 0)
+        self.assertEqual(second.pages_parsed, 26)
+        with open(self.cache_file) as f:
+            self.assertEqual(json.load(f), {})
+    
+    def test_fuzzer_reuses_baselines(self):
+        site = StubSite(make_vulnerable_app(), validators=('etag',))
+        try:
+            cache = vulnerability_assessment.ResponseCache(self.cache_file)
+            forms = [{'url': site.url, 'method': 'get', 'action': site.url + '/faq',
+                      'inputs': [{'name': 'topic', 'type': 'text', 'value': ''}]}]
+            fuzzer = vulnerability_assessment.PayloadFuzzer(cache=cache)
+            self.assertEqual(fuzzer.run(forms), [])
+            cache.save()
+            
+            cache = vulnerability_assessment.ResponseCache(self.cache_file)
+            fuzzer = vulnerability_assessment.PayloadFuzzer(cache=cache)
+            self.assertEqual(fuzzer.run(forms), [])
+        finally:
+            site.close()
+        self.assertEqual(site.not_modified, 1)
+        self.assertEqual(cache.revalidated, 1)
+
+
+def make_vulnerable_app():
+    """
+    Deliberately vulnerable pages: /search reflects its query raw, /product
+    builds SQL by string formatting and shows the error. /safe, /faq (static
+    text that looks like an SQL error) and /login (bound parameters) are not
+    vulnerable.
+    """
+    database = sqlite3.connect(':memory:', check_same_thread=False)
+    database.execute("CREATE TABLE users (id INTEGER, name TEXT, password TEXT)")
+    lock = threading.Lock()
+    
+    def query(sql, *args):
+        with lock:
+            try:
+                return database.execute(sql, args).fetchall(), None
+            except sqlite3.Error as e:
+                return None, f"{type(e).__module__}.{type(e).__name__}: {e}"
+    
+    def product(params):
+        rows, error = query(f"SELECT name FROM users WHERE id = {params.get('id', '')}")
+        return f"<p>Database error: {escape(error)}</p>" if error else f"<p>{len(rows)} products</p>"
+    
+    def login(params):
+        rows, error = query("SELECT id FROM users WHERE name = ? AND password = ?",
+                            params.get('username', ''), params.get('password', ''))
+        return "<p>Login failed</p>"
+    
+    pages = {
+        '/': '<html><body>'
+             '<form action="/search"><input name="q"></form>'
+             '<form action="/safe"><input name="q" type="search"></form>'
+             '<form action="/faq"><input name="topic"></form>'
+             '<form method="post" action="/product"><input name="id">'
+             '<input type="hidden" name="csrf" value="token"></form>'
+             '<form method="post" action="/login"><input name="username"><input type="password" name="password">'
+             '<input type="submit" name="go" value="Log in"></form>'
+             '<a href="/about">About</a></body></html>',
+        '/about': '<html><body><form action="/search"><input name="q"></form></body></html>',
+        '/search': lambda params: f"<p>Results for {params.get('q', '')}</p>",
+        '/safe': lambda params: f"<p>Results for {escape(params.get('q', ''))}</p>",
+        '/faq': lambda params: "<p>Seeing 'You have an error in your SQL syntax'? Contact support.</p>",
+        '/product': product,
+        '/login': login,
+    }
+    return pages
+
+
+class PayloadFuzzerTest(unittest.TestCase):
+    def setUp(self):
+        self.site = StubSite(make_vulnerable_app())
+    
+    def tearDown(self):
+        self.site.close()
+    
+    def test_signatures_single_pass(self):
+        signatures = vulnerability_assessment.PayloadFuzzer.signatures(
+            '<p><script>alert("XSS")</script></p> ORA-00933: SQL command not properly ended')
+        self.assertEqual(signatures, {('xss', '<script>alert("xss")</script>'), ('sqli', 'ora-00933')})
+        self.assertEqual(vulnerability_assessment.PayloadFuzzer.signatures('&lt;script&gt;'), set())
+    
+    def test_fuzz_crawled_forms(self):
+        scanner = vulnerability_assessment.WebVulnScanner(self.site.url)
+        scanner.crawl(max_depth=1)
+        self.assertEqual(len(scanner.forms), 6)
+        
+        findings = scanner.fuzz_forms(rate=None)
+        self.assertEqual({(urlsplit(f['form']['action']).path, f['field'], f['kind']) for f in findings},
+                         {('/search', 'q', 'xss'), ('/product', 'id', 'sqli')})
+        self.assertEqual(sorted(v['type'] for v in scanner.vulnerabilities), ['SQL Injection', 'XSS (GET)'])
+        
+        # 5 unique forms: 5 baselines + 6 text fields x 8 payloads, minus 3 payloads
+        # skipped for each of the two fields confirmed on the first try
+        self.assertEqual(len(self.site.requests), 1 + 1 + 5 + 48 - 6)
+    
+    def test_early_stop_and_rate_limit(self):
+        forms = [{'url': self.site.url, 'method': 'get', 'action': self.site.url + '/search',
+                  'inputs': [{'name': 'q', 'type': 'text', 'value': ''}]},
+                 {'url': self.site.url, 'method': 'get', 'action': self.site.url + '/safe',
+                  'inputs': [{'name': 'q', 'type': 'text', 'value': ''}]}]
+        limiters = []
+        
+        class RecordingLimiter(vulnerability_assessment.RateLimiter):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.acquired = 0
+                limiters.append(self)
+            
+            async def acquire(self):
+                self.acquired += 1
+                await super().acquire()
+        
+        fuzzer = vulnerability_assessment.PayloadFuzzer(concurrency=4, rate=20)
+        with mock.patch.object(vulnerability_assessment, 'RateLimiter', RecordingLimiter):
+            findings = fuzzer.run(forms, kinds=('xss',))
+        
+        self.assertEqual([(f['field'], f['payload']) for f in findings],
+                         [('q', vulnerability_assessment.XSS_PAYLOADS[0])])
+        self.assertEqual(fuzzer.payloads_skipped, 3)
+        self.assertEqual(fuzzer.requests_sent, 2 + 1 + 4)
+        # Every request, baselines included, waits for the one shared bucket
+        self.assertEqual([(limiter.rate, limiter.acquired) for limiter in limiters],
+                         [(20, fuzzer.requests_sent)])
+    
+    def test_demo_target_is_local(self):
+        with vulnerability_assessment.DemoTarget() as target:
+            self.assertTrue(target.url.startswith('http://127.0.0.1:'))
+            scanner = vulnerability_assessment.WebVulnScanner(target.url)
+            scanner.crawl(max_depth=1)
+            scanner.fuzz_forms(rate=None)
+        self.assertEqual(sorted(v['type'] for v in scanner.vulnerabilities), ['SQL Injection', 'XSS (GET)'])
+
+
+class QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class BreachedPasswordTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = random.Random(3)
+        self.passwords = [f"{rng.choice(['sun', 'moon', 'star'])}{rng.getrandbits(32):x}" for _ in range(50000)]
+        self.wordlist = os.path.join(self.tmpdir.name, 'breached.txt')
+        with open(self.wordlist, 'wb') as f:
+            # Duplicates, blank lines, CRLF endings and non-UTF-8 bytes all occur in real dumps
+            lines = [p.encode() for p in self.passwords + self.passwords[:1000]] + [b'', b'caf\xe9']
+            f.write(b'\r\n'.join(lines) + b'\n')
+        self.index_file = os.path.join(self.tmpdir.name, 'breached.idx')
+        count = vulnerability_assessment.BreachedPasswordIndex.build(self.wordlist, self.index_file,
+                                                                     chunk_size=7000)
+        self.assertEqual(count, len(set(self.passwords)) + 1)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_lookup(self):
+        with vulnerability_assessment.BreachedPasswordIndex(self.index_file) as index:
+            self.assertEqual(len(index), len(set(self.passwords)) + 1)
+            self.assertTrue(all(password in index for password in self.passwords))
+            self.assertFalse(any(f"not-{password}" in index for password in self.passwords[:5000]))
+            self.assertTrue(index.contains_hash(hashlib.sha1(self.passwords[0].encode()).hexdigest()))
+            self.assertTrue(index.contains_digest(hashlib.sha1(b'caf\xe9').digest()))  # Raw bytes are hashed
+    
+    def test_hashed_wordlist(self):
+        hashes = os.path.join(self.tmpdir.name, 'pwned.txt')
+        with open(hashes, 'w') as f:
+            f.write("7C4A8D09CA3762AF61E59520943DC26494F8941B:37359195\n"  # 123456
+                    "not a hash line\n"
+                    "5BAA61E4C9B93F3F0682250B6CF8331B7EE68FD8:9545824\n")  # password
+        index_file = os.path.join(self.tmpdir.name, 'pwned.idx')
+        self.assertEqual(vulnerability_assessment.BreachedPasswordIndex.build(hashes, index_file, hashed=True), 2)
+        with vulnerability_assessment.BreachedPasswordIndex(index_file) as index:
+            self.assertIn('123456', index)
+            self.assertIn('password', index)
+            self.assertNotIn('1234567', index)
+        with self.assertRaises(ValueError):
+            vulnerability_assessment.BreachedPasswordIndex(self.wordlist)
+    
+    def test_lookup_memory(self):
+        probes = self.passwords[:10000] + [f"x{password}" for password in self.passwords[:10000]]
+        tracemalloc.start()
+        index = vulnerability_assessment.BreachedPasswordIndex(self.index_file)
+        found = sum(password in index for password in probes)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        index.close()
+        
+        # Lookups search the mapped file; the corpus is never loaded into memory
+        self.assertEqual(found, 10000)
+        self.assertLess(peak, 64 * 1024)
+    
+    def test_range_files(self):
+        ranges = os.path.join(self.tmpdir.name, 'range')
+        with vulnerability_assessment.BreachedPasswordIndex(self.index_file) as index:
+            self.assertEqual(index.export_ranges(ranges, prefix_length=3), 4096)
+        
+        server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietFileHandler, directory=ranges))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            for source in (ranges, f"http://127.0.0.1:{server.server_address[1]}/"):
+                lookup = vulnerability_assessment.PasswordRangeLookup(source, prefix_length=3)
+                self.assertTrue(all(password in lookup for password in self.passwords[:200]))
+                self.assertFalse(any(f"x{password}" in lookup for password in self.passwords[:200]))
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    def test_range_errors_are_not_cached(self):
+        suffix = hashlib.sha1(b'123456').hexdigest().upper()[5:]
+        unavailable = mock.Mock(status_code=503)
+        unavailable.raise_for_status.side_effect = vulnerability_assessment.requests.HTTPError('503')
+        session = mock.Mock()
+        session.get.side_effect = [unavailable, mock.Mock(status_code=200, text=f"{suffix}:42\n"),
+                                   mock.Mock(status_code=404)]
+        lookup = vulnerability_assessment.PasswordRangeLookup('https://ranges.test', session=session)
+        
+        with self.assertRaises(vulnerability_assessment.requests.HTTPError):
+            '123456' in lookup
+        self.assertIn('123456', lookup)
+        self.assertNotIn('correct horse battery staple', lookup)
+        self.assertEqual(session.get.call_count, 3)
+    
+    def test_checker_flags_breached_password(self):
+        with vulnerability_assessment.BreachedPasswordIndex(self.index_file) as index:
+            checker = vulnerability_assessment.PasswordChecker(breach_index=index)
+            breached = 'Sun-' + self.passwords[0] + '!X'
+            self.assertNotIn("Found in known data breaches", checker.check_strength(breached)['feedback'])
+            
+            result = checker.check_strength(self.passwords[0])
+            self.assertIn("Found in known data breaches", result['feedback'])
+            self.assertIn("Common password, easily guessed", checker.check_strength('qwerty')['feedback'])
+
+
+class PasswordAuditTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = random.Random(5)
+        alphabet = 'abcXYZ019!@ pass123word'
+        self.passwords = [''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 16))) for _ in range(3000)]
+        self.passwords += ['qwerty', 'Summer2024!', 'xK9#mQ2$vL7!', 'correct horse battery staple']
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_compiled_checks_match_original_rules(self):
+        for password in self.passwords:
+            self.assertEqual(
+                bool(vulnerability_assessment.COMMON_PATTERN.match(password)),
+                any(re.match(pattern, password) for pattern in vulnerability_assessment.COMMON_PATTERNS),
+                password)
+            self.assertEqual(vulnerability_assessment.character_classes(password), (
+                any(c.isupper() for c in password), any(c.islower() for c in password),
+                any(c.isdigit() for c in password), any(not c.isalnum() for c in password)))
+            self.assertEqual(bool(vulnerability_assessment.REPEATED_CHARACTER.search(password)),
+                             any(password[i] == password[i + 1] for i in range(len(password) - 1)))
+    
+    def test_guess_estimation(self):
+        checker = vulnerability_assessment.PasswordChecker()
+        weak = ['Password2024!', 'qwertyuiop', 'abcdef123456', 'zzzzzzzzzzzz', 'Dragon1984', 'P@ssw0rd']
+        for password in weak:
+            self.assertLessEqual(checker.check_strength(password)['crack_score'], 1, password)
+        for password in ['xK9#mQ2$vL7!', 'correct horse battery staple', 'tq8-Vw3;Lp']:
+            self.assertEqual(checker.check_strength(password)['crack_score'], 4, password)
+        
+        # Same character types, very different guessability
+        result = checker.check_strength('Password2024!')
+        self.assertIn('Predictable', result['feedback'][-1])
+        self.assertLess(result['entropy_bits'], checker.check_strength('Pkwtemdx7291!')['entropy_bits'] - 10)
+        self.assertEqual(checker.check_strength('xK9#mQ2$vL7!')['score'], 100)
+    
+    def test_audit_streams_rows_and_stats(self):
+        credentials = os.path.join(self.tmpdir.name, 'export.csv')
+        with open(credentials, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['username', 'password', 'last_login'])
+            for number, password in enumerate(self.passwords):
+                writer.writerow([f'user{number}', password, '2026-01-01'])
+        
+        breached_list = os.path.join(self.tmpdir.name, 'breached.txt')
+        with open(breached_list, 'w') as f:
+            f.write('Summer2024!\nxK9#mQ2$vL7!\n')
+        index_file = os.path.join(self.tmpdir.name, 'breached.idx')
+        vulnerability_assessment.BreachedPasswordIndex.build(breached_list, index_file)
+        
+        outputs = {}
+        with vulnerability_assessment.BreachedPasswordIndex(index_file) as index:
+            checker = vulnerability_assessment.PasswordChecker(breach_index=index)
+            for workers, output_format in ((1, 'ndjson'), (2, 'ndjson'), (2, 'csv')):
+                output = os.path.join(self.tmpdir.name, f'audit{workers}.{output_format}')
+                stats = checker.audit(vulnerability_assessment.read_credentials(credentials), output,
+                                      output_format, workers=workers, chunk_size=500)
+                outputs[workers, output_format] = output
+                self.assertEqual(stats['total'], len(self.passwords))
+                self.assertEqual(sum(stats['strength'].values()), len(self.passwords))
+                self.assertEqual(sum(stats['crack_score']), len(self.passwords))
+                self.assertEqual(stats['too_short'], sum(len(p) < 8 for p in self.passwords))
+                self.assertGreaterEqual(stats['breached'], 3)  # qwerty (common) + the two listed
+            strong_score = checker.check_strength('xK9#mQ2$vL7!')['score']
+        
+        with open(outputs[1, 'ndjson']) as f:
+            inline = [json.loads(line) for line in f]
+        with open(outputs[2, 'ndjson']) as f:
+            pooled = [json.loads(line) for line in f]
+        self.assertEqual(inline, pooled)
+        self.assertEqual(inline[-3]['account'], f'user{len(self.passwords) - 3}')
+        self.assertTrue(inline[-2]['breached'])
+        self.assertEqual(inline[-2]['score'], strong_score)
+        
+        with open(outputs[2, 'csv'], newline='') as f:
+            reader = csv.DictReader(f)
+            self.assertEqual(reader.fieldnames, vulnerability_assessment.AUDIT_FIELDS)
+            rows = list(reader)
+        self.assertEqual([row['account'] for row in rows], [row['account'] for row in inline])
+        with open(outputs[2, 'csv']) as f:
+            self.assertNotIn('xK9#mQ2$vL7!', f.read())  # Passwords never reach the report
+    
+    def test_audit_uses_precompiled_checks(self):
+        checker = vulnerability_assessment.PasswordChecker()
+        # Every pattern is compiled at import time, never once per password
+        with mock.patch.object(vulnerability_assessment.re, 'compile',
+                               side_effect=AssertionError("compiled during audit")):
+            stats = checker.audit(self.passwords * 5, workers=1)
+        self.assertEqual(stats['total'], len(self.passwords) * 5)
+
+
+def make_tree(base, directories=20, files_per_directory=50, suffix='.conf'):
+    """Write a two-level tree of small files; returns their relative paths"""
+    paths = []
+    for d in range(directories):
+        directory = os.path.join(base, f'dir{d:02d}', 'sub')
+        os.makedirs(directory, exist_ok=True)
+        for n in range(files_per_directory):
+            rel_path = os.path.join(f'dir{d:02d}', 'sub', f'file{n:03d}{suffix}')
+            with open(os.path.join(base, rel_path), 'w') as f:
+                f.write(f"setting_{d}_{n} = {n * d}\n")
+            paths.append(rel_path)
+    return paths
+
+
+class FileIntegrityTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = self.tmpdir.name
+        self.paths = make_tree(self.base, directories=5, files_per_directory=20)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def changes(self, monitor):
+        return sorted((change['type'], change['file']) for change in monitor.check_integrity())
+    
+    def test_patterns_respected(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        self.assertEqual(len(monitor.create_baseline(['*.conf'])), 100)
+        with open(os.path.join(self.base, 'debug.log'), 'w') as f:
+            f.write('noise')
+        with open(os.path.join(self.base, 'extra.conf'), 'w') as f:
+            f.write('new')
+        self.assertEqual(self.changes(monitor), [('new', 'extra.conf')])
+    
+    def test_stat_fast_path(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        monitor.create_baseline()
+        self.assertEqual(monitor.files_hashed, 100)
+        
+        self.assertEqual(self.changes(monitor), [])
+        self.assertEqual(monitor.files_hashed, 100)  # Nothing read
+        
+        edited, touched, removed = self.paths[:3]
+        with open(os.path.join(self.base, edited), 'a') as f:
+            f.write('tampered\n')
+        os.utime(os.path.join(self.base, touched))
+        os.remove(os.path.join(self.base, removed))
+        self.assertEqual(self.changes(monitor), [('deleted', removed), ('modified', edited)])
+        self.assertEqual(monitor.files_hashed, 102)
+        
+        # The touched file's new metadata was accepted; the edited file is still reported
+        self.assertEqual(self.changes(monitor), [('deleted', removed), ('modified', edited)])
+        self.assertEqual(monitor.files_hashed, 103)
+    
+    def test_restored_mtime_still_detected(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        monitor.create_baseline()
+        path = os.path.join(self.base, self.paths[10])
+        stat = os.stat(path)
+        with open(path, 'r+') as f:
+            content = f.read()
+            f.seek(0)
+            f.write(content.replace('=', ':'))  # Same size
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(os.stat(path).st_size, stat.st_size)
+        self.assertEqual(self.changes(monitor), [('modified', self.paths[10])])  # ctime moved
+    
+    def test_rotating_full_verify(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=4)
+        monitor.create_baseline()
+        
+        # Swap content under identical metadata, as if written behind the filesystem's back
+        record = monitor.baseline[self.paths[0]]
+        monitor.baseline[self.paths[0]] = record._replace(digest=bytes(len(record.digest)))
+        found = []
+        for _ in range(4):
+            found += self.changes(monitor)
+        self.assertEqual(found, [('modified', self.paths[0])])
+        self.assertEqual(monitor.files_hashed, 100 + 100)  # Every file verified once over 4 checks
+    
+    def test_compact_baseline_round_trip(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=7)
+        monitor.create_baseline(['*.conf', 'file00?.*'])
+        monitor.check_integrity()
+        baseline_file = os.path.join(self.base, 'baseline.bin')
+        monitor.save_baseline(baseline_file)
+        
+        loaded = vulnerability_assessment.FileIntegrityMonitor(self.base)
+        loaded.load_baseline(baseline_file)
+        self.assertEqual(loaded.baseline, monitor.baseline)
+        self.assertEqual(loaded.file_patterns, ['*.conf', 'file00?.*'])
+        self.assertEqual(loaded.verify_every, 7)
+        self.assertEqual(loaded.generation, 1)
+        self.assertEqual(self.changes(loaded), [])
+        
+        as_json = json.dumps({path: {'hash': r.digest.hex(), 'last_modified': r.mtime_ns / 1e9, 'size': r.size}
+                              for path, r in monitor.baseline.items()})
+        self.assertLess(os.path.getsize(baseline_file), len(as_json) * 0.6)
+        
+        with open(baseline_file, 'wb') as f:
+            f.write(b'not a baseline' * 4)
+        with self.assertRaises(ValueError):
+            loaded.load_baseline(baseline_file)
+    
+    def test_incremental_check_samples(self):
+        make_tree(self.base, directories=30, files_per_directory=100, suffix='.dat')
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=30)
+        monitor.create_baseline()
+        self.assertEqual(monitor.files_hashed, len(monitor.baseline))
+        
+        # Unchanged files are settled by stat; only the rotating sample is re-read
+        self.assertEqual(monitor.check_integrity(), [])
+        hashed = monitor.files_hashed - len(monitor.baseline)
+        self.assertGreater(hashed, 0)
+        self.assertLess(hashed, len(monitor.baseline) / 10)
+    
+    def test_parallel_baseline_matches_serial(self):
+        with open(os.path.join(self.base, 'large.bin'), 'wb') as f:
+            f.write(os.urandom(3 * vulnerability_assessment.HASH_BUFFER_SIZE + 17))
+        serial = vulnerability_assessment.FileIntegrityMonitor(self.base, workers=1)
+        parallel = vulnerability_assessment.FileIntegrityMonitor(self.base, workers=2)
+        self.assertEqual(serial.create_baseline(), parallel.create_baseline())
+        self.assertEqual(parallel.files_hashed, 101)
+        with open(os.path.join(self.base, 'large.bin'), 'rb') as f:
+            self.assertEqual(serial.baseline['large.bin'].digest, hashlib.sha256(f.read()).digest())
+        self.assertEqual(serial.root_hash, parallel.root_hash)
+    
+    def test_merkle_tree(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        monitor.create_baseline()
+        root, sibling = monitor.root_hash, monitor.tree['dir01']
+        self.assertEqual(set(monitor.children['']), {f'dir{d:02d}' for d in range(5)})
+        
+        with open(os.path.join(self.base, self.paths[0]), 'a') as f:
+            f.write('tampered\n')
+        live = monitor.snapshot()
+        self.assertNotEqual(live.root_hash, root)
+        self.assertNotEqual(live.tree[os.path.join('dir00', 'sub')], monitor.tree[os.path.join('dir00', 'sub')])
+        self.assertEqual(live.tree['dir01'], sibling)
+        
+        # Saved baselines come back with the same tree
+        baseline_file = os.path.join(self.base, 'baseline.bin')
+        monitor.save_baseline(baseline_file)
+        loaded = vulnerability_assessment.FileIntegrityMonitor(self.base)
+        loaded.load_baseline(baseline_file)
+        self.assertEqual(loaded.tree, monitor.tree)
+    
+    def test_compare_baselines(self):
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        monitor.create_baseline()
+        self.assertEqual(monitor.compare_baseline(monitor.snapshot()), [])
+        self.assertEqual(monitor.nodes_visited, 0)  # Equal roots: nothing descended into
+        
+        edited, removed = self.paths[0], self.paths[45]
+        with open(os.path.join(self.base, edited), 'a') as f:
+            f.write('tampered\n')
+        os.remove(os.path.join(self.base, removed))
+        os.makedirs(os.path.join(self.base, 'dir09', 'new'))
+        with open(os.path.join(self.base, 'dir09', 'new', 'added.conf'), 'w') as f:
+            f.write('new')
+        shutil.rmtree(os.path.join(self.base, 'dir04'))
+        
+        changes = sorted((c['type'], c['file']) for c in monitor.compare_baseline(monitor.snapshot()))
+        expected = sorted([('modified', edited), ('deleted', removed),
+                           ('new', os.path.join('dir09', 'new', 'added.conf'))] +
+                          [('deleted', path) for path in self.paths if path.startswith('dir04')])
+        self.assertEqual(changes, expected)
+        self.assertEqual(changes, self.changes(monitor))
+    
+    def test_locating_change_skips_unchanged_subtrees(self):
+        make_tree(self.base, directories=100, files_per_directory=100, suffix='.dat')
+        monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        monitor.create_baseline()
+        with open(os.path.join(self.base, 'dir42', 'sub', 'file007.dat'), 'a') as f:
+            f.write('tampered\n')
+        live = monitor.snapshot()
+        
+        changes = monitor.compare_baseline(live)
+        self.assertEqual([c['file'] for c in changes], [os.path.join('dir42', 'sub', 'file007.dat')])
+        self.assertEqual(monitor.nodes_visited, 3)  # Root, dir42 and dir42/sub; 99 siblings skipped
+
+
+class FileWatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = self.tmpdir.name
+        self.paths = make_tree(self.base, directories=5, files_per_directory=20)
+        self.monitor = vulnerability_assessment.FileIntegrityMonitor(self.base, verify_every=0)
+        self.monitor.create_baseline(['*.conf'])
+        self.found = []
+        self.stop = threading.Event()
+        self.thread = None
+    
+    def tearDown(self):
+        self.stop.set()
+        if self.thread:
+            self.thread.join()
+        self.tmpdir.cleanup()
+    
+    def start(self, **options):
+        try:
+            vulnerability_assessment.InotifyWatcher(self.base).close()
+        except OSError as e:
+            self.skipTest(str(e))
+        on_change = lambda change: self.found.append((change['type'], change['file']))
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.monitor.watch, daemon=True,
+                                       kwargs=dict(on_change=on_change, stop_event=self.stop,
+                                                   ready=ready, **options))
+        self.thread.start()
+        self.assertTrue(ready.wait(5))  # Watches are placed before the test touches files
+    
+    def wait_for(self, count, timeout=3):
+        deadline = time.monotonic() + timeout
+        while len(self.found) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return sorted(self.found)
+    
+    def test_changes_emitted_from_events(self):
+        self.start(batch_delay=0.1)
+        hashed = self.monitor.files_hashed
+        edited, removed = self.paths[0], self.paths[30]
+        
+        for i in range(50):  # Many events on one file coalesce into one check
+            with open(os.path.join(self.base, edited), 'a') as f:
+                f.write(f'line {i}\n')
+        os.remove(os.path.join(self.base, removed))
+        os.makedirs(os.path.join(self.base, 'dir00', 'new'))
+        with open(os.path.join(self.base, 'dir00', 'new', 'added.conf'), 'w') as f:
+            f.write('new')
+        with open(os.path.join(self.base, 'ignored.log'), 'w') as f:
+            f.write('not monitored')
+        
+        self.assertEqual(self.wait_for(3), [('deleted', removed), ('modified', edited),
+                                            ('new', os.path.join('dir00', 'new', 'added.conf'))])
+        self.assertEqual(self.monitor.files_hashed - hashed, 2)  # Only the touched files
+        self.assertEqual(self.monitor.reconciliations, 0)  # Reported from events, not a rescan
+        
+        # Changes are accepted as they are reported, so a later edit shows up once
+        with open(os.path.join(self.base, edited), 'a') as f:
+            f.write('again\n')
+        self.assertEqual(len(self.wait_for(4)), 4)
+        time.sleep(0.3)
+        self.assertEqual(len(self.found), 4)
+    
+    def test_reconciliation_catches_missed_changes(self):
+        # Content changed behind inotify's back (e.g. while the watcher was down)
+        record = self.monitor.baseline[self.paths[5]]
+        self.monitor.baseline[self.paths[5]] = record._replace(digest=bytes(len(record.digest)))
+        self.monitor.verify_every = 1
+        self.start(reconcile_interval=0.3)
+        self.assertEqual(self.wait_for(1), [('modified', self.paths[5])])
+        self.assertGreaterEqual(self.monitor.reconciliations, 1)
+    
+    def test_pending_limit_falls_back_to_scan(self):
+        self.start(batch_delay=0.5, max_pending=10)
+        for path in self.paths[:20]:
+            with open(os.path.join(self.base, path), 'a') as f:
+                f.write('tampered\n')
+        self.assertEqual(self.wait_for(20), [('modified', path) for path in sorted(self.paths[:20])])
+        self.assertEqual(self.monitor.reconciliations, 1)
+
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord('test', level, __file__, 0, message, None, None)
+
+
+class AsyncLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loggers = []
+    
+    def tearDown(self):
+        for logger in self.loggers:
+            logger.close()
+        self.tmpdir.cleanup()
+    
+    def make_logger(self, name='Test App', console=False, **options):
+        logger = logging_monitoring.SecureLogger(name, log_dir=self.tmpdir.name, console=console, **options)
+        self.loggers.append(logger)
+        return logger
+    
+    def read_log(self, logger):
+        with open(logger.get_log_file_path()) as f:
+            return [json.loads(line) for line in f]
+    
+    def test_async_mode_writes_everything_in_batches(self):
+        logger = self.make_logger(async_mode=True, batch_size=100)
+        listener = logger.listener
+        for i in range(1000):
+            logger.info("event", seq=i, user="alice")
+        logger.close()
+        
+        records = self.read_log(logger)
+        self.assertEqual(len(records), 1001)  # Plus the initialization message
+        self.assertEqual([r['seq'] for r in records[1:]], list(range(1000)))
+        self.assertEqual(records[1]['user'], 'alice')
+        self.assertLessEqual(listener.batches, 1001 // 100 + 2)
+    
+    def test_errors_flush_immediately(self):
+        logger = self.make_logger(async_mode=True, flush_interval=30)
+        logger.info("buffered")
+        logger.error("Authentication failure", ip="198.51.100.77")
+        # Poll well within flush_interval until both records are on disk
+        deadline = time.monotonic() + 5
+        messages = []
+        while messages[-1:] != ["Authentication failure"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+            with open(logger.get_log_file_path()) as f:
+                messages = [json.loads(line)['message'] for line in f if line.endswith('\n')]
+        self.assertEqual(messages[-2:], ["buffered", "Authentication failure"])
+    
+    def test_drop_oldest_policy(self):
+        handler = logging_monitoring.BoundedQueueHandler(10, 'drop_oldest')
+        for i in range(25):
+            handler.handle(make_record(f"message {i}"))
+        self.assertEqual(handler.dropped, 15)
+        kept = [handler.queue.get_nowait().msg for _ in range(10)]
+        self.assertEqual(kept, [f"message {i}" for i in range(15, 25)])
+    
+    def test_sample_policy_keeps_warnings(self):
+        handler = logging_monitoring.BoundedQueueHandler(100, 'sample', sample_every=10)
+        for i in range(200):
+            handler.handle(make_record(f"message {i}"))
+        handler.handle(make_record("intrusion", logging.WARNING))
+        self.assertEqual(handler.sampled_out, 113)
+        self.assertEqual(handler.queue.qsize(), 75 + 12 + 1)
+        
+        with self.assertRaises(ValueError):
+            logging_monitoring.BoundedQueueHandler(10, 'discard')
+    
+    def test_latency_report(self):
+        logger = self.make_logger(async_mode=True)
+        result = logging_monitoring.measure_log_latency(logger, messages=2000, rate=50000)
+        logger.close()
+        self.assertEqual(result['messages'], 2000)
+        self.assertLessEqual(result['p50_us'], result['p99_us'])
+        self.assertLessEqual(result['p99_us'], result['max_us'])
+        self.assertEqual(len(self.read_log(logger)), 2001)
+    
+    def test_blocked_output_stays_off_the_caller(self):
+        console = BlockedStream()
+        root_records = []
+        root_handler = logging.Handler()
+        root_handler.emit = root_records.append
+        logging.getLogger().addHandler(root_handler)
+        try:
+            with mock.patch('sys.stdout', console):
+                logger = self.make_logger(console=True, async_mode=True)
+            self.assertFalse(logger.logger.propagate)
+            
+            # The console is stuck, yet every call returns
+            self.assertTrue(console.writing.wait(5))
+            for i in range(100):
+                logger.info("event", seq=i)
+            self.assertFalse(console.release.is_set())
+        finally:
+            console.release.set()
+            logging.getLogger().removeHandler(root_handler)
+        logger.close()
+        self.assertEqual(root_records, [])  # Root handlers would run on the caller's thread
+        self.assertEqual(len(console.lines), 101)
+
+
+class BlockedStream:
+    """Console whose writes hang until released, like a stalled terminal or full pipe"""
+    
+    def __init__(self):
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.lines = []
+    
+    def write(self, text):
+        self.writing.set()
+        self.release.wait()
+        self.lines += text.splitlines()
+    
+    def flush(self):
+        pass
+
+
+class RenderCounter:
+    """Context value that counts how often it gets rendered"""
+    renders = 0
+    
+    def __str__(self):
+        RenderCounter.renders += 1
+        return 'rendered'
+    
+    def __format__(self, spec):
+        return str(self)
+
+
+class LogFormatterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def write_lines(self, use_json, log):
+        logger = logging_monitoring.SecureLogger('Formatter App', log_dir=self.tmpdir.name,
+                                                 console=False, use_json=use_json)
+        log(logger)
+        logger.close()
+        with open(logger.get_log_file_path()) as f:
+            return f.read().splitlines()[1:]
+    
+    def test_json_fields(self):
+        def log(logger):
+            logger.warning("Unusual login pattern detected", user="user123", attempts=5, level="spoofed",
+                           app="spoofed", host="spoofed")
+            try:
+                1 / 0
+            except ZeroDivisionError:
+                logger.logger.exception("Handler crashed")
+        
+        lines = self.write_lines(True, log)
+        self.assertEqual(lines[0].count('"app"'), 1)  # No duplicate keys for parsers to disagree on
+        warning, error = [json.loads(line) for line in lines]
+        self.assertEqual(warning['level'], 'WARNING')  # Context can't overwrite core fields
+        self.assertEqual(warning['user'], 'user123')
+        self.assertEqual(warning['attempts'], 5)
+        self.assertEqual(warning['app'], 'Formatter App')
+        self.assertEqual(warning['host'], socket.gethostname())
+        self.assertTrue(datetime.datetime.fromisoformat(warning['timestamp']))
+        self.assertIn('ZeroDivisionError', error['exc_info'])
+    
+    def test_stdlib_fallback_matches_orjson(self):
+        formatter = logging_monitoring.FastJsonFormatter('App', host='web01')
+        record = make_record("login")
+        record.context = {'user': 'alice', 'when': datetime.date(2024, 1, 2)}
+        fast = json.loads(formatter.format(record))
+        with mock.patch.object(logging_monitoring, 'ORJSON_AVAILABLE', False):
+            fallback = json.loads(logging_monitoring.FastJsonFormatter('App', host='web01').format(record))
+        self.assertEqual(fast, fallback)
+        self.assertEqual(fast['when'], '2024-01-02')
+        
+        # Beyond orjson's 64-bit integers the record still gets written
+        record.context = {'big': 2 ** 70}
+        self.assertEqual(json.loads(formatter.format(record))['big'], 2 ** 70)
+    
+    def test_text_mode_renders_context_lazily(self):
+        RenderCounter.renders = 0
+        def log(logger):
+            logger.debug("Debug detail", value=RenderCounter())
+            logger.info("Login", user="alice", ip="192.0.2.1")
+        
+        lines = self.write_lines(False, log)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith("[INFO] [Formatter App] - Login - user=alice ip=192.0.2.1"))
+        self.assertEqual(RenderCounter.renders, 0)
+    
+    def test_formatting_benchmark_report(self):
+        costs = logging_monitoring.benchmark_formatters(records=100)
+        self.assertEqual(set(costs), {'json_legacy', 'json_fast', 'text_legacy', 'text_fast',
+                                      'disabled_legacy', 'disabled_fast'})
+        self.assertTrue(all(cost >= 0 for cost in costs.values()))
+
+
+class LogRotationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = self.tmpdir.name
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def read_all(self, handler):
+        """Every line ever written: rotated segments oldest first, then the live file"""
+        lines = []
+        for path in handler.segments():
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt') as f:
+                lines += f.read().splitlines()
+        with open(handler.baseFilename) as f:
+            lines += f.read().splitlines()
+        return lines
+    
+    def test_size_rotation_compresses_in_background(self):
+        for async_mode in (False, True):
+            logger = logging_monitoring.SecureLogger(f'Rotating {async_mode}', log_dir=self.base, console=False,
+                                                     max_size_mb=0.01, backup_count=None,
+                                                     async_mode=async_mode, batch_size=50)
+            handler = logger.file_handler
+            for i in range(1000):
+                logger.info("event", seq=i)
+            logger.close()
+            
+            segments = handler.segments()
+            self.assertGreater(len(segments), 3)
+            self.assertTrue(all(path.endswith('.gz') for path in segments))
+            self.assertEqual([json.loads(line).get('seq') for line in self.read_all(handler)][1:], list(range(1000)))
+    
+    def test_time_rotation(self):
+        handler = logging_monitoring.CompressingRotatingFileHandler(
+            os.path.join(self.base, 'timed.log'), interval=0.2, compression=None)
+        handler.handle(make_record("first"))
+        time.sleep(0.25)
+        handler.handle(make_record("second"))
+        handler.handle(make_record("third"))
+        handler.close()
+        self.assertEqual(handler.rollovers, 1)
+        self.assertEqual(self.read_all(handler), ["first", "second", "third"])
+    
+    def test_retention_by_bytes(self):
+        handler = logging_monitoring.CompressingRotatingFileHandler(
+            os.path.join(self.base, 'kept.log'), max_bytes=4096, compression=None, retention_bytes=20000)
+        for i in range(2000):
+            handler.handle(make_record(f"line {i:05d} " + 'x' * 40))
+        handler.wait_for_compression()
+        segments = handler.segments()
+        self.assertLessEqual(sum(os.path.getsize(path) for path in segments), 20000)
+        self.assertGreater(handler.rollovers, len(segments))
+        self.assertEqual(self.read_all(handler)[-1], f"line 01999 " + 'x' * 40)  # Newest data kept
+        handler.close()
+        
+        with self.assertRaises(ValueError):
+            logging_monitoring.CompressingRotatingFileHandler(os.path.join(self.base, 'bad.log'), compression='lz4')
+    
+    def test_retention_skips_pending_segments(self):
+        handler = logging_monitoring.CompressingRotatingFileHandler(
+            os.path.join(self.base, 'tight.log'), max_bytes=2000, retention_bytes=3000)
+        with mock.patch('builtins.print') as printed:
+            for i in range(5000):
+                handler.handle(make_record(f"line {i:05d} " + 'x' * 40))
+            handler.wait_for_compression()
+            handler.close()
+        
+        self.assertEqual(printed.call_args_list, [])
+        segments = handler.segments()
+        self.assertTrue(segments)
+        self.assertTrue(all(path.endswith('.gz') for path in segments))
+        self.assertLessEqual(sum(os.path.getsize(path) for path in segments), 3000)
+    
+    def test_zstd_falls_back_to_gzip(self):
+        if logging_monitoring.ZSTD_AVAILABLE:
+            self.skipTest("zstandard installed")
+        handler = logging_monitoring.CompressingRotatingFileHandler(
+            os.path.join(self.base, 'z.log'), compression='zstd')
+        self.assertEqual(handler.compression, 'gzip')
+        handler.close()
+    
+    def test_rollover_does_not_wait_for_compression(self):
+        path = os.path.join(self.base, 'big.log')
+        with open(path, 'w') as f:
+            f.write("2024-01-01T00:00:00 INFO request handled user=alice\n" * 100)
+        handler = logging_monitoring.CompressingRotatingFileHandler(path, max_bytes=1)
+        compress_segment = logging_monitoring.compress_segment
+        release, compressed = threading.Event(), threading.Event()
+        
+        def blocked_compress(segment, compression):
+            release.wait(5)
+            compress_segment(segment, compression)
+            compressed.set()
+        
+        with mock.patch.object(logging_monitoring, 'compress_segment', blocked_compress):
+            handler.handle(make_record("after rollover"))
+            # The logging thread is already back while the segment waits to be compressed
+            self.assertEqual(handler.rollovers, 1)
+            self.assertFalse(compressed.is_set())
+            release.set()
+            handler.wait_for_compression()
+        handler.close()
+        
+        self.assertTrue(compressed.is_set())
+        self.assertEqual([path.endswith('.gz') for path in handler.segments()], [True])
+
+
+PROC_NET_TCP = """\
+  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 0100007F:1F90 00000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 4242 1 0000000000000000 100 0 0 10 0
+   1: 0100007F:1F90 0100007F:D431 01 00000000:00000000 00:00000000 00000000  1000        0 4243 1 0000000000000000 20 4 30 10 -1
+"""
+
+PROC_NET_TCP6 = """\
+  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000000000000000000001000000:0016 00000000000000000000000000000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 5151 1 0000000000000000 100 0 0 10 0
+"""
+
+
+class LocalPortScannerTest(unittest.TestCase):
+    def test_parse_proc_net(self):
+        records = infrastructure_security.parse_proc_net(PROC_NET_TCP, 'tcp', 'ipv4')
+        self.assertEqual([(r['address'], r['port'], r['state']) for r in records],
+                         [('127.0.0.1', 8080, 'LISTEN'), ('127.0.0.1', 8080, 'ESTABLISHED')])
+        self.assertEqual(records[1]['remote_port'], 54321)
+        self.assertEqual(records[0]['inode'], 4242)
+        
+        records = infrastructure_security.parse_proc_net(PROC_NET_TCP6, 'tcp', 'ipv6')
+        self.assertEqual((records[0]['address'], records[0]['port']), ('::1', 22))
+    
+    def test_inventory_finds_own_listeners(self):
+        scanner = infrastructure_security.LocalPortScanner()
+        if not scanner.proc_available():
+            self.skipTest("/proc/net not available")
+        tcp = start_listeners(1)[0]
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.bind(('127.0.0.1', 0))
+        try:
+            # The inventory comes from the socket tables, without a single connect
+            with mock.patch.object(scanner, 'verify_ports', side_effect=AssertionError("probed")):
+                listeners = scanner.list_listeners()
+            
+            found = {(r['protocol'], r['port']): r for r in listeners}
+            tcp_record = found[('tcp', tcp.getsockname()[1])]
+            self.assertEqual(tcp_record['pid'], os.getpid())
+            self.assertEqual(tcp_record['address'], '127.0.0.1')
+            self.assertEqual(found[('udp', udp.getsockname()[1])]['pid'], os.getpid())
+        finally:
+            tcp.close()
+            udp.close()
+    
+    def test_optional_verification(self):
+        scanner = infrastructure_security.LocalPortScanner()
+        if not scanner.proc_available():
+            self.skipTest("/proc/net not available")
+        listener = start_listeners(1)[0]
+        port = listener.getsockname()[1]
+        try:
+            records = scanner.scan_ports(port, port, verify=True)
+        finally:
+            listener.close()
+        self.assertEqual([(r['port'], r['verified']) for r in records], [(port, True)])
+        
+        reachable = scanner.verify_ports([('127.0.0.1', port), ('0.0.0.0', 1)])
+        self.assertEqual(reachable, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
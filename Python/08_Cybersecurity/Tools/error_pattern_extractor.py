@@ -18,6 +18,7 @@ Features:
 - Severity classification (critical, error, warning, notice)
 - Error categorization by type
 - Context analysis for related errors
+- Reads gzip/zstd-compressed rotated log segments transparently
 """
 
 import re
@@ -27,6 +28,7 @@ import argparse
 import datetime
 import json
 from collections import defaultdict, Counter
+from log_reader import open_log
 
 
 class ErrorPatternExtractor:
@@ -124,7 +126,7 @@ class ErrorPatternExtractor:
         
         try:
             # Read the file
-            with open(file_path, 'r', errors='ignore') as f:
+            with open_log(file_path) as f:
                 lines = f.readlines()
                 
             if not lines:
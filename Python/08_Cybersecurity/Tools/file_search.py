@@ -12,13 +12,16 @@ Usage:
   python file_search.py --pattern "password*.txt" "config*.ini" --path /Users --sensitive
   python file_search.py --pattern "*.mp3" --path /Users --size-min 10MB --size-max 50MB
   python file_search.py --pattern "*.log" --path /var/log --modified-after 2023-01-01
+  python file_search.py --pattern "*" --path / --stream --format ndjson --output files.ndjson
   
 Features:
 - Multiple pattern search with wildcards
 - Content search within files (including sensitive data detection)
+- Validated sensitive data hits (Luhn, SSN area rules, key prefixes and entropy)
 - Metadata collection (size, timestamps, permissions)
 - Size and date filtering
-- Comprehensive reporting in various formats (text, CSV, JSON)
+- Comprehensive reporting in various formats (text, CSV, JSON, NDJSON)
+- Streaming CSV/NDJSON output with constant memory for very large trees
 """
 
 import os
@@ -29,30 +32,511 @@ import time
 import stat
 import json
 import csv
+import math
 import hashlib
 import argparse
 import datetime
+import heapq
+import threading
 from pathlib import Path
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import magic  # python-magic for file type detection
 
-# Regular expressions for sensitive data
+# Regular expressions for sensitive data.
+# These are only cheap prefilters: every candidate they produce is confirmed
+# by the matching validator in SensitiveDataDetector before it is reported.
 PATTERNS = {
-    'credit_card': r'\b(?:\d{4}[-\s]?){3}\d{4}\b',
+    'credit_card': r'(?<!\d)(?:\d[-\s]?){12,}\d(?!\d)',
     'ssn': r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b',
-    'api_key': r'\b[A-Za-z0-9_-]{20,40}\b',
-    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'api_key': r'\b[sr]k_(?:live|test)_[A-Za-z0-9]{10,247}\b|\bgithub_pat_[A-Za-z0-9_]{22,255}\b|\bxox[abposr]-[A-Za-z0-9-]{10,72}\b|\b[A-Za-z0-9_-]{20,40}\b',
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
     'ip_address': r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',
     'password_field': r'password[\s]*[=:][^\n]{3,}'
 }
 
+# Literal hints: a detector only runs its regex if one of these substrings
+# appears in the (lower-cased) content. Detectors without hints always run.
+PREFILTER_HINTS = {
+    'email': ('@',),
+    'ip_address': ('.',),
+    'password_field': ('password',),
+}
+
+# Vendor-issued secrets are recognised by prefix regardless of entropy
+KNOWN_KEY_PREFIXES = (
+    'AKIA', 'ASIA',                                  # AWS access key IDs
+    'ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_', 'github_pat_',  # GitHub tokens
+    'glpat-',                                        # GitLab personal tokens
+    'xoxa-', 'xoxb-', 'xoxp-', 'xoxo-', 'xoxs-', 'xoxr-',   # Slack tokens
+    'sk_live_', 'rk_live_', 'sk_test_', 'rk_test_',  # Stripe keys
+    'AIza',                                          # Google API keys
+)
+
+# Issuer prefixes (IIN) for the major card networks
+CARD_PREFIXES = ('4', '34', '37', '36', '38', '30', '35', '51', '52', '53', '54', '55',
+                 '22', '23', '24', '25', '26', '27', '6011', '65', '64', '62')
+
+# SSNs that are syntactically valid but publicly known to be fake/advertising
+INVALID_SSNS = {'078051120', '219099999', '123456789'}
+
+
+def luhn_checksum_valid(number):
+    """Return True if the digit string passes the Luhn (mod 10) check"""
+    total = 0
+    for i, ch in enumerate(reversed(number)):
+        digit = ord(ch) - 48
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def shannon_entropy(text):
+    """Shannon entropy of a string in bits per character"""
+    if not text:
+        return 0.0
+    length = len(text)
+    counts = {}
+    for ch in text:
+        counts[ch] = counts.get(ch, 0) + 1
+    return -sum((c / length) * math.log2(c / length) for c in counts.values())
+
+
+def is_valid_credit_card(candidate):
+    """Validate a card number candidate: length, issuer prefix and Luhn"""
+    digits = re.sub(r'[-\s]', '', candidate)
+    if not 13 <= len(digits) <= 19:
+        return False
+    if len(set(digits)) == 1:
+        return False
+    if not digits.startswith(CARD_PREFIXES):
+        return False
+    return luhn_checksum_valid(digits)
+
+
+def extract_credit_cards(candidate):
+    """
+    Find valid card numbers inside a run of digit groups
+
+    The prefilter matches whole runs, so a card can arrive glued to an
+    unrelated number ("Order 1234 4111 1111 1111 1111"). Every window of
+    consecutive digit groups is tried, leftmost first, and a window that
+    validates is reported on its own.
+
+    Args:
+        candidate (str): Digits separated by spaces or dashes
+
+    Returns:
+        list: Card numbers as they appear in the text
+    """
+    groups = list(re.finditer(r'\d+', candidate))
+    cards = []
+    i = 0
+    while i < len(groups):
+        digits = 0
+        for j in range(i, len(groups)):
+            digits += len(groups[j].group())
+            if digits > 19:
+                break
+            span = candidate[groups[i].start():groups[j].end()]
+            if digits >= 13 and is_valid_credit_card(span):
+                cards.append(span)
+                i = j
+                break
+        i += 1
+    return cards
+
+
+def is_valid_ssn(candidate):
+    """Validate an SSN candidate against SSA area/group/serial rules"""
+    separators = re.findall(r'[-\s]', candidate)
+    if len(separators) == 1 or (len(separators) == 2 and separators[0] != separators[1]):
+        return False
+    digits = re.sub(r'[-\s]', '', candidate)
+    area, group, serial = digits[:3], digits[3:5], digits[5:]
+    if area == '000' or area == '666' or area >= '900':
+        return False
+    if group == '00' or serial == '0000':
+        return False
+    return digits not in INVALID_SSNS
+
+
+def is_valid_api_key(candidate, min_entropy_ratio=0.8):
+    """
+    Validate a secret candidate.
+
+    Tokens with a known vendor prefix are accepted as-is. Anything else must
+    look random: upper case, lower case and digits all present, and a Shannon
+    entropy close to the maximum possible for its length. Pure-hex strings
+    (checksums, UUID fragments) are rejected unless prefixed.
+    """
+    if candidate.startswith(KNOWN_KEY_PREFIXES):
+        return True
+    if not (any(c.islower() for c in candidate) and
+            any(c.isupper() for c in candidate) and
+            any(c.isdigit() for c in candidate)):
+        return False
+    max_entropy = math.log2(min(len(candidate), 64))
+    return shannon_entropy(candidate) >= min_entropy_ratio * max_entropy
+
+
+def is_valid_ip_address(candidate):
+    """Validate that every octet of a dotted quad is in range"""
+    return all(int(octet) <= 255 for octet in candidate.split('.'))
+
+
+VALIDATORS = {
+    'ssn': is_valid_ssn,
+    'api_key': is_valid_api_key,
+    'ip_address': is_valid_ip_address,
+}
+
+# Extractors confirm a prefilter match by pulling the valid parts out of it
+EXTRACTORS = {
+    'credit_card': extract_credit_cards,
+}
+
+
+class SensitiveDataDetector:
+    """Detect sensitive data using cheap prefilters followed by validators"""
+
+    def __init__(self, patterns=None, validate=True, max_examples=3):
+        """
+        Initialize detector
+
+        Args:
+            patterns (dict): Mapping of data type to prefilter regex (defaults to PATTERNS)
+            validate (bool): Whether to confirm candidates with VALIDATORS
+            max_examples (int): Number of matches to keep per data type
+        """
+        self.patterns = {name: re.compile(regex)
+                         for name, regex in (patterns or PATTERNS).items()}
+        self.validate = validate
+        self.max_examples = max_examples
+
+    def find_all(self, content):
+        """Return {data_type: [confirmed matches]} for all detectors"""
+        lowered = None
+        found = {}
+        for name, regex in self.patterns.items():
+            hints = PREFILTER_HINTS.get(name)
+            if hints:
+                if lowered is None:
+                    lowered = content.lower()
+                if not any(hint in lowered for hint in hints):
+                    continue
+
+            candidates = regex.findall(content)
+            if not candidates:
+                continue
+
+            extractor = EXTRACTORS.get(name) if self.validate else None
+            if extractor:
+                candidates = [match for c in candidates for match in extractor(c)]
+            validator = VALIDATORS.get(name) if self.validate else None
+            if validator:
+                candidates = [c for c in candidates if validator(c)]
+            if candidates:
+                found[name] = candidates
+        return found
+
+    def scan(self, content):
+        """Scan content and return truncated matches, or None if nothing confirmed"""
+        sensitive_data = {}
+        for name, matches in self.find_all(content).items():
+            # Truncate matches to avoid overwhelming output
+            displayed_matches = matches[:self.max_examples]
+            if len(matches) > self.max_examples:
+                displayed_matches.append(f"... and {len(matches) - self.max_examples} more")
+            sensitive_data[name] = displayed_matches
+        return sensitive_data if sensitive_data else None
+
+
+def evaluate_detectors(samples, detector=None, rounds=1):
+    """
+    Measure detector precision, recall and throughput on a labeled corpus
+
+    Args:
+        samples (list): (text, {data_type: set(expected matches)}) tuples
+        detector (SensitiveDataDetector): Detector to evaluate (default: validating detector)
+        rounds (int): Number of passes over the corpus for the throughput figure
+
+    Returns:
+        dict: Per-type precision/recall plus bytes and elapsed time
+    """
+    detector = detector or SensitiveDataDetector()
+    stats = {}
+    total_bytes = sum(len(text.encode()) for text, _ in samples) * rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = [detector.find_all(text) for text, _ in samples]
+    elapsed = time.perf_counter() - start
+
+    for (text, expected), found in zip(samples, results):
+        for name in set(expected) | set(found):
+            expected_set = set(expected.get(name, ()))
+            found_set = set(found.get(name, ()))
+            entry = stats.setdefault(name, {'tp': 0, 'fp': 0, 'fn': 0})
+            entry['tp'] += len(found_set & expected_set)
+            entry['fp'] += len(found_set - expected_set)
+            entry['fn'] += len(expected_set - found_set)
+
+    for entry in stats.values():
+        predicted = entry['tp'] + entry['fp']
+        actual = entry['tp'] + entry['fn']
+        entry['precision'] = entry['tp'] / predicted if predicted else 1.0
+        entry['recall'] = entry['tp'] / actual if actual else 1.0
+
+    return {
+        'types': stats,
+        'bytes': total_bytes,
+        'seconds': elapsed,
+        'mb_per_sec': (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0
+    }
+
+
+# Leading-byte signatures checked in-process before falling back to libmagic:
+# (signature, offset, mime type, description)
+FILE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 0, 'image/png', 'PNG image'),
+    (b'\xff\xd8\xff', 0, 'image/jpeg', 'JPEG image'),
+    (b'GIF87a', 0, 'image/gif', 'GIF image'),
+    (b'GIF89a', 0, 'image/gif', 'GIF image'),
+    (b'%PDF', 0, 'application/pdf', 'PDF document'),
+    (b'PK\x03\x04', 0, 'application/zip', 'ZIP archive'),
+    (b'\x1f\x8b', 0, 'application/gzip', 'GZip archive'),
+    (b'\xfd7zXZ\x00', 0, 'application/x-xz', 'XZ archive'),
+    (b'(\xb5/\xfd', 0, 'application/zstd', 'Zstandard archive'),
+    (b'7z\xbc\xaf\x27\x1c', 0, 'application/x-7z-compressed', '7-Zip archive'),
+    (b'ustar', 257, 'application/x-tar', 'TAR archive'),
+    (b'\x7fELF', 0, 'application/x-executable', 'ELF binary'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 0, 'application/x-ole-storage', 'OLE2 compound document'),
+    (b'SQLite format 3\x00', 0, 'application/vnd.sqlite3', 'SQLite database'),
+    (b'\xd4\xc3\xb2\xa1', 0, 'application/vnd.tcpdump.pcap', 'pcap capture'),
+    (b'\xa1\xb2\xc3\xd4', 0, 'application/vnd.tcpdump.pcap', 'pcap capture'),
+    (b'\x0a\x0d\x0d\x0a', 0, 'application/x-pcapng', 'pcapng capture'),
+    (b'-----BEGIN ', 0, 'text/plain', 'PEM certificate/key'),
+)
+
+# Short printable signatures that also start ordinary text (MZ_TOKEN=..., ID3_KEY=...);
+# only checked once the header has failed the text heuristic
+WEAK_SIGNATURES = (
+    (b'BZh', 0, 'application/x-bzip2', 'BZip2 archive'),
+    (b'MZ', 0, 'application/x-dosexec', 'Windows executable'),
+    (b'ID3', 0, 'audio/mpeg', 'MP3 audio'),
+    (b'OggS', 0, 'application/ogg', 'Ogg media'),
+)
+
+# Refinement of plain text by extension, applied only once content looks like text
+TEXT_EXTENSIONS = {
+    '.json': ('application/json', 'JSON data'),
+    '.xml': ('application/xml', 'XML document'),
+    '.html': ('text/html', 'HTML document'),
+    '.htm': ('text/html', 'HTML document'),
+    '.csv': ('text/csv', 'CSV text'),
+    '.py': ('text/x-python', 'Python script'),
+    '.sh': ('text/x-shellscript', 'Shell script'),
+    '.log': ('text/plain', 'Log file'),
+    '.ini': ('text/plain', 'Configuration file'),
+    '.conf': ('text/plain', 'Configuration file'),
+    '.cfg': ('text/plain', 'Configuration file'),
+    '.yml': ('text/plain', 'YAML document'),
+    '.yaml': ('text/plain', 'YAML document'),
+    '.md': ('text/markdown', 'Markdown document'),
+}
+
+
+class FileTypeDetector:
+    """
+    Detect MIME type and description from a single header read.
+
+    Common types are recognised with FILE_SIGNATURES and a text heuristic;
+    only unknown binaries are handed to libmagic, once, on the same buffer.
+    Results are cached per (device, inode, mtime).
+    """
+
+    def __init__(self, header_size=8192, max_cache_entries=100000):
+        """
+        Initialize detector
+
+        Args:
+            header_size (int): Number of leading bytes read from each file
+            max_cache_entries (int): Maximum number of cached results
+        """
+        self.header_size = header_size
+        self.max_cache_entries = max_cache_entries
+        self.cache = {}
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self.magic_calls = 0
+
+    def _magic(self):
+        """Per-thread (mime, description) libmagic handles (shared handles serialize on a lock)"""
+        handles = getattr(self._local, 'magic', None)
+        if handles is None:
+            handles = self._local.magic = (magic.Magic(mime=True), magic.Magic())
+        return handles
+
+    def detect(self, file_path, stats=None):
+        """Return (mime_type, file_type) for a file"""
+        stats = stats or os.stat(file_path)
+        key = (stats.st_dev, stats.st_ino, stats.st_mtime_ns)
+
+        cached = self.cache.get(key)
+        if cached:
+            return cached
+
+        with open(file_path, 'rb') as f:
+            header = f.read(self.header_size)
+        result = self.detect_buffer(header, file_path)
+
+        with self.lock:
+            if len(self.cache) >= self.max_cache_entries:
+                self.cache.clear()
+            self.cache[key] = result
+        return result
+
+    def detect_buffer(self, header, file_path=''):
+        """Classify a header buffer, handing it to libmagic at most once"""
+        if not header:
+            return ('inode/x-empty', 'empty')
+
+        for signature, offset, mime_type, description in FILE_SIGNATURES:
+            if header.startswith(signature, offset):
+                return (mime_type, description)
+
+        if self._looks_like_text(header):
+            extension = os.path.splitext(file_path)[1].lower()
+            return TEXT_EXTENSIONS.get(extension, ('text/plain', 'Text file'))
+
+        for signature, offset, mime_type, description in WEAK_SIGNATURES:
+            if header.startswith(signature, offset):
+                return (mime_type, description)
+
+        self.magic_calls += 1
+        mime_magic, description_magic = self._magic()
+        return (mime_magic.from_buffer(header), description_magic.from_buffer(header))
+
+    def _looks_like_text(self, header):
+        """Heuristic: no NUL bytes and valid UTF-8 (tolerating a cut-off final character)"""
+        if b'\x00' in header:
+            return False
+        try:
+            header.decode('utf-8')
+            return True
+        except UnicodeDecodeError as e:
+            # A multi-byte character split by the header boundary is still text
+            return e.start >= len(header) - 3 and e.reason == 'unexpected end of data'
+
+
+# Fixed report schema shared by the CSV and NDJSON writers
+REPORT_FIELDS = [
+    'path', 'name', 'directory', 'size', 'size_human',
+    'created', 'modified', 'accessed', 'permissions', 'owner_id', 'group_id',
+    'mime_type', 'file_type', 'md5', 'sensitive_data', 'content_error', 'hash_error'
+]
+
+
+def report_row(file_info):
+    """Flatten a file_info dict into a REPORT_FIELDS row (complex values as JSON)"""
+    row = {}
+    for key in REPORT_FIELDS:
+        value = file_info.get(key)
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, default=str)
+        row[key] = value
+    return row
+
+
+class LargestFiles:
+    """Bounded min-heap that keeps the N largest files seen so far"""
+
+    def __init__(self, limit=50):
+        """Initialize with the number of files to keep"""
+        self.limit = limit
+        self.heap = []
+        self.counter = 0
+
+    def add(self, file_info):
+        """Offer a file; O(log N) and never holds more than N entries"""
+        if self.limit <= 0:
+            return
+        self.counter += 1
+        entry = (file_info.get('size', 0), self.counter, file_info)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        """Return the kept files, largest first"""
+        return [info for _, _, info in sorted(self.heap, reverse=True)]
+
+
+class StreamingReportWriter:
+    """
+    Write file records as soon as workers produce them.
+
+    NDJSON and CSV rows use the fixed REPORT_FIELDS schema so nothing has to
+    be buffered; the 'text' format writes no rows and only keeps the
+    largest-files view for the final report.
+    """
+
+    def __init__(self, output_format='ndjson', output_file=None, top_n=50):
+        """
+        Initialize writer
+
+        Args:
+            output_format (str): 'ndjson', 'csv' or 'text'
+            output_file (str): Output path (stdout if None)
+            top_n (int): Number of largest files to keep for the text view
+        """
+        if output_format not in ('ndjson', 'csv', 'text'):
+            raise ValueError(f"Streaming is not supported for format: {output_format}")
+        self.output_format = output_format
+        self.output_file = output_file
+        self.largest = LargestFiles(top_n)
+        self.count = 0
+        self.lock = threading.Lock()
+        self.file = None
+        self.writer = None
+
+        if output_format != 'text':
+            self.file = open(output_file, 'w', newline='') if output_file else sys.stdout
+        if output_format == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=REPORT_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, file_info):
+        """Emit one record (thread-safe)"""
+        with self.lock:
+            self.count += 1
+            self.largest.add(file_info)
+            if self.output_format == 'csv':
+                self.writer.writerow(report_row(file_info))
+            elif self.output_format == 'ndjson':
+                record = {k: file_info[k] for k in REPORT_FIELDS if k in file_info}
+                self.file.write(json.dumps(record, default=str) + "\n")
+
+    def close(self):
+        """Flush and close the output file"""
+        if self.file and self.file is not sys.stdout:
+            self.file.close()
+            print(f"{self.output_format.upper()} report saved to {self.output_file}")
+        elif self.file:
+            self.file.flush()
+
 
 class FileSearch:
     """Search for files based on pattern and collect metadata"""
     
     def __init__(self, patterns, base_path, recursive=True, 
                  check_content=False, sensitive_check=False,
-                 max_file_size=10*1024*1024, max_threads=10):
+                 max_file_size=10*1024*1024, max_threads=10, sink=None):
         """
         Initialize file search with patterns and options
         
@@ -64,6 +548,8 @@ class FileSearch:
             sensitive_check (bool): Whether to check for sensitive information
             max_file_size (int): Maximum file size to check content (in bytes)
             max_threads (int): Maximum number of threads to use
+            sink (StreamingReportWriter): If set, records are streamed here
+                instead of being kept in found_files
         """
         self.patterns = patterns
         self.base_path = os.path.abspath(base_path)
@@ -72,6 +558,10 @@ class FileSearch:
         self.sensitive_check = sensitive_check
         self.max_file_size = max_file_size
         self.max_threads = max_threads
+        self.detector = SensitiveDataDetector()
+        self.type_detector = FileTypeDetector()
+        self.sink = sink
+        self.files_processed = 0
         self.found_files = []
         self.errors = []
     
@@ -96,31 +586,80 @@ class FileSearch:
         print(f"Patterns: {', '.join(self.patterns)}")
         
         self.found_files = []
-        matches = []
+        filters = (size_min, size_max, modified_after, modified_before, created_after, created_before)
+        matched = 0
         
-        # Convert to glob patterns with base path
-        for pattern in self.patterns:
-            if self.recursive:
-                # For recursive search, we need to use os.walk
-                for root, dirs, files in os.walk(self.base_path):
-                    # Skip hidden directories
-                    dirs[:] = [d for d in dirs if not d.startswith('.')]
-                    
-                    for file in files:
-                        if glob.fnmatch.fnmatch(file, pattern):
-                            full_path = os.path.join(root, file)
-                            matches.append(full_path)
-            else:
-                # For non-recursive search, we can use glob directly
-                pattern_path = os.path.join(self.base_path, pattern)
-                matches.extend(glob.glob(pattern_path))
+        # Walk, filter and process lazily: at most a few files per thread are in
+        # flight, so memory stays flat however large the tree is and records
+        # reach the sink while the walk is still going
+        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
+            worker = self._process_to_sink if self.sink else self.process_file
+            pending = deque()
+            
+            def collect(result):
+                if self.sink:
+                    self.files_processed += result
+                elif result:
+                    # Filter out None results (from errors)
+                    self.found_files.append(result)
+            
+            self.files_processed = 0
+            for file_path in self._filtered_matches(*filters):
+                matched += 1
+                pending.append(executor.submit(worker, file_path))
+                if len(pending) >= self.max_threads * 4:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
         
-        # Remove duplicates
-        matches = list(set(matches))
+        if not self.sink:
+            self.files_processed = len(self.found_files)
+        print(f"Found {matched} matches after filtering")
+        print(f"Processed {self.files_processed} files")
+        return self.found_files
+    
+    def _matches(self):
+        """Yield paths matching any pattern, each once, as the tree is walked"""
+        def matches_any(name):
+            return any(glob.fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
         
-        # Apply filters
-        filtered_matches = []
-        for file_path in matches:
+        if self.recursive:
+            # For recursive search, we need to use os.walk
+            for root, dirs, files in os.walk(self.base_path):
+                # Skip hidden directories
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                
+                for file in files:
+                    if matches_any(file):
+                        yield os.path.join(root, file)
+        else:
+            # Patterns with a directory part (conf/*.ini) still go through glob
+            path_patterns = [p for p in self.patterns if '/' in p or os.sep in p]
+            name_patterns = [p for p in self.patterns if p not in path_patterns]
+            
+            # Like glob, only patterns starting with '.' match hidden files
+            if name_patterns:
+                try:
+                    with os.scandir(self.base_path) as entries:
+                        for entry in entries:
+                            if entry.name.startswith('.') and not any(p.startswith('.') for p in name_patterns):
+                                continue
+                            if any(glob.fnmatch.fnmatch(entry.name, p) for p in name_patterns):
+                                yield entry.path
+                except OSError as e:
+                    self.errors.append(f"Error listing {self.base_path}: {str(e)}")
+            
+            seen = set()
+            for pattern in path_patterns:
+                for path in glob.iglob(os.path.join(self.base_path, pattern)):
+                    if path not in seen:
+                        seen.add(path)
+                        yield path
+    
+    def _filtered_matches(self, size_min=None, size_max=None, modified_after=None,
+                          modified_before=None, created_after=None, created_before=None):
+        """Yield matching regular files that pass the size and date filters"""
+        for file_path in self._matches():
             try:
                 # Skip if not a file
                 if not os.path.isfile(file_path):
@@ -146,21 +685,17 @@ class FileSearch:
                 if created_before and created_time > created_before:
                     continue
                 
-                filtered_matches.append(file_path)
+                yield file_path
             except Exception as e:
                 self.errors.append(f"Error filtering {file_path}: {str(e)}")
-        
-        print(f"Found {len(filtered_matches)} matches after filtering")
-        
-        # Process files with metadata using thread pool for speed
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            results = list(executor.map(self.process_file, filtered_matches))
-        
-        # Filter out None results (from errors)
-        self.found_files = [r for r in results if r]
-        
-        print(f"Processed {len(self.found_files)} files")
-        return self.found_files
+    
+    def _process_to_sink(self, file_path):
+        """Process a file and stream its record to the sink"""
+        file_info = self.process_file(file_path)
+        if not file_info:
+            return 0
+        self.sink.write(file_info)
+        return 1
     
     def process_file(self, file_path):
         """Process a single file and collect metadata"""
@@ -185,9 +720,9 @@ class FileSearch:
             
             # Try to detect file type
             try:
-                file_info['mime_type'] = magic.from_file(file_path, mime=True)
-                file_info['file_type'] = magic.from_file(file_path)
-            except:
+                file_info['mime_type'], file_info['file_type'] = \
+                    self.type_detector.detect(file_path, stats)
+            except Exception:
                 file_info['mime_type'] = 'unknown'
                 file_info['file_type'] = 'unknown'
             
@@ -219,23 +754,12 @@ class FileSearch:
     
     def check_file_content(self, file_path):
         """Check file content for sensitive information"""
-        sensitive_data = {}
-        
         try:
             with open(file_path, 'r', errors='ignore') as f:
                 content = f.read()
-                
-            # Check each pattern
-            for pattern_name, regex in PATTERNS.items():
-                matches = re.findall(regex, content)
-                if matches:
-                    # Truncate matches to avoid overwhelming output
-                    displayed_matches = matches[:3]  
-                    if len(matches) > 3:
-                        displayed_matches.append(f"... and {len(matches) - 3} more")
-                    sensitive_data[pattern_name] = displayed_matches
-            
-            return sensitive_data if sensitive_data else None
+
+            # Only validator-confirmed hits are stored
+            return self.detector.scan(content)
             
         except Exception as e:
             return {'error': str(e)}
@@ -274,19 +798,24 @@ class FileSearch:
             return self._generate_csv_report(sorted_files, output_file)
         elif output_format == 'json':
             return self._generate_json_report(sorted_files, output_file)
+        elif output_format == 'ndjson':
+            return self._generate_ndjson_report(sorted_files, output_file)
         else:
             print(f"Unsupported output format: {output_format}")
             return False
     
-    def _generate_text_report(self, files, output_file=None):
-        """Generate a plain text report"""
+    def _generate_text_report(self, files, output_file=None, total=None):
+        """Generate a plain text report (total is set when files is a top-N view)"""
         report = []
         report.append("=" * 80)
         report.append(f"FILE SEARCH REPORT - {datetime.datetime.now().isoformat()}")
         report.append("=" * 80)
         report.append(f"Search path: {self.base_path}")
         report.append(f"Patterns: {', '.join(self.patterns)}")
-        report.append(f"Files found: {len(files)}")
+        if total is None:
+            report.append(f"Files found: {len(files)}")
+        else:
+            report.append(f"Files found: {total} (showing {len(files)} largest)")
         report.append("=" * 80)
         
         for i, file in enumerate(files, 1):
@@ -338,26 +867,10 @@ class FileSearch:
             
         try:
             with open(output_file, 'w', newline='') as f:
-                # Determine all possible fields
-                fields = set()
-                for file in files:
-                    fields.update(file.keys())
-                
-                # Sort fields for consistent output
-                fieldnames = sorted(list(fields))
-                
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
                 writer.writeheader()
-                
                 for file in files:
-                    # Convert any complex objects to strings
-                    row = {}
-                    for key, value in file.items():
-                        if isinstance(value, dict):
-                            row[key] = json.dumps(value)
-                        else:
-                            row[key] = value
-                    writer.writerow(row)
+                    writer.writerow(report_row(file))
                     
             print(f"CSV report saved to {output_file}")
             return True
@@ -365,6 +878,18 @@ class FileSearch:
             print(f"Error saving CSV report: {e}")
             return False
     
+    def _generate_ndjson_report(self, files, output_file):
+        """Generate a newline-delimited JSON report"""
+        try:
+            writer = StreamingReportWriter('ndjson', output_file, top_n=0)
+            for file in files:
+                writer.write(file)
+            writer.close()
+            return True
+        except Exception as e:
+            print(f"Error generating NDJSON report: {e}")
+            return False
+    
     def _generate_json_report(self, files, output_file):
         """Generate a JSON report"""
         try:
@@ -484,8 +1009,13 @@ def parse_arguments():
                       help="Files created before this date (YYYY-MM-DD)")
     
     # Output options
-    parser.add_argument('--format', choices=['text', 'csv', 'json'], default='text',
+    parser.add_argument('--format', choices=['text', 'csv', 'json', 'ndjson'], default='text',
                       help="Output format")
+    parser.add_argument('--stream', action='store_true',
+                      help="Write csv/ndjson rows while scanning instead of at the end "
+                           "(text shows only the largest files)")
+    parser.add_argument('--top', type=int, default=50,
+                      help="Number of largest files in a streamed text report (default: 50)")
     parser.add_argument('--output', '-o',
                       help="Output file")
     
@@ -508,6 +1038,21 @@ def main():
     created_after = parse_date(args.created_after) if args.created_after else None
     created_before = parse_date(args.created_before) if args.created_before else None
     
+    # Streaming writer: rows are written as workers finish
+    sink = None
+    if args.stream:
+        if args.format == 'json':
+            print("JSON output cannot be streamed; use --format ndjson")
+            sys.exit(1)
+        if args.format == 'csv' and not args.output:
+            print("Output file is required for CSV format")
+            sys.exit(1)
+        sink = StreamingReportWriter(
+            output_format=args.format,
+            output_file=args.output if args.format != 'text' else None,
+            top_n=args.top
+        )
+    
     # Create file search
     search = FileSearch(
         patterns=args.pattern,
@@ -516,7 +1061,8 @@ def main():
         check_content=args.check_content or args.sensitive,
         sensitive_check=args.sensitive,
         max_file_size=max_file_size,
-        max_threads=args.threads
+        max_threads=args.threads,
+        sink=sink
     )
     
     # Start timer
@@ -533,13 +1079,17 @@ def main():
     )
     
     # Generate report
-    if files:
+    if sink:
+        sink.close()
+        if args.format == 'text' and sink.count:
+            search._generate_text_report(sink.largest.items(), args.output, total=sink.count)
+    elif files:
         search.generate_report(output_format=args.format, output_file=args.output)
         
     # Print summary
     elapsed = time.time() - start_time
     print(f"\nSearch completed in {elapsed:.2f} seconds")
-    print(f"Found {len(files)} matching files")
+    print(f"Found {search.files_processed} matching files")
     
     if search.errors:
         print(f"Encountered {len(search.errors)} errors during search")
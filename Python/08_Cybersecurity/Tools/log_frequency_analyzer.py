@@ -18,6 +18,7 @@ Features:
 - Configurable similarity matching for grouping similar logs
 - Support for various log formats
 - Detailed frequency reports with examples
+- Reads gzip/zstd-compressed rotated log segments transparently
 """
 
 import re
@@ -27,6 +28,7 @@ import argparse
 import datetime
 from collections import Counter, defaultdict
 from difflib import SequenceMatcher
+from log_reader import open_log
 
 
 class LogFrequencyAnalyzer:
@@ -75,7 +77,7 @@ class LogFrequencyAnalyzer:
         
         try:
             # Read the file
-            with open(file_path, 'r', errors='ignore') as f:
+            with open_log(file_path) as f:
                 lines = f.readlines()
                 
             if not lines:
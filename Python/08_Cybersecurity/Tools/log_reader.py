@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Log Reader
+----------
+Opens plain and compressed log files the same way, so the analysis tools
+can read rotated segments (app.log.20240101-120000-000000.gz, .zst) directly.
+
+Compression is detected from the file's magic bytes, not its name.
+
+Usage:
+  from log_reader import open_log
+  with open_log('/var/log/app/app.log.20240101-120000-000000.gz') as f:
+      for line in f:
+          ...
+"""
+
+import io
+import gzip
+import bz2
+import lzma
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def detect_compression(file_path):
+    """Return 'gzip', 'bzip2', 'xz', 'zstd' or None for a plain file"""
+    with open(file_path, 'rb') as f:
+        header = f.read(6)
+    if header.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if header.startswith(BZIP2_MAGIC):
+        return 'bzip2'
+    if header.startswith(XZ_MAGIC):
+        return 'xz'
+    if header.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+
+def open_log(file_path, errors='ignore'):
+    """
+    Open a log file for reading text, decompressing on the fly if needed
+
+    Args:
+        file_path (str): Plain or compressed log file
+        errors (str): How to handle undecodable bytes
+
+    Returns:
+        file object: Text stream over the (decompressed) content
+    """
+    compression = detect_compression(file_path)
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rt', errors=errors)
+    if compression == 'bzip2':
+        return bz2.open(file_path, 'rt', errors=errors)
+    if compression == 'xz':
+        return lzma.open(file_path, 'rt', errors=errors)
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise OSError(f"{file_path} is zstd-compressed; install zstandard to read it")
+        raw = open(file_path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, errors=errors)
+    return open(file_path, 'r', errors=errors)
@@ -8,26 +8,41 @@ Output: List of live IPs found on the network
 
 Usage:
   python subnet_scanner.py 192.168.1.0/24
+  python subnet_scanner.py 10.10.0.0/16 --rate 20000
+  python subnet_scanner.py 192.168.1.0/24 --engine subprocess
+  python subnet_scanner.py 192.168.1.0/24 --probes icmp,tcp,arp --ports 22,80,443
   python subnet_scanner.py 10.0.0.0/24 --timeout 0.5 --count 2
   python subnet_scanner.py 172.16.0.0/24 --output live_hosts.txt
   python subnet_scanner.py 192.168.0.0/16 --threads 100
 
 Features:
-- Multithreaded scanning for speed
+- Native asyncio ICMP sweep over a single socket (unprivileged ping socket or raw socket)
+- Falls back to multithreaded ping subprocesses when ICMP sockets are not permitted
+- Multi-probe discovery (ICMP, TCP connect, ARP) for hosts that drop ICMP,
+  with nmap-style adaptive timeouts
+- Bounded in-flight work: memory stays flat regardless of subnet size
+- Live hosts streamed to the output file as they are found
 - Adjustable timeout and ping count
-- Progress reporting
+- Progress reporting from a separate reporter thread
 """
 
 import argparse
+import asyncio
+import collections
 import ipaddress
+import itertools
+import socket
+import struct
 import subprocess
 import sys
+import os
 import platform
 import threading
 import time
 import queue
 import signal
-from concurrent.futures import ThreadPoolExecutor
+import shutil
+from abc import ABC, abstractmethod
 
 # Graceful exit handling
 stop_scan = False
@@ -41,25 +56,634 @@ def signal_handler(sig, frame):
 signal.signal(signal.SIGINT, signal_handler)
 
 
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+
+def icmp_checksum(data):
+    """RFC 1071 internet checksum"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class ICMPSweeper:
+    """Sweep many hosts with ICMP echo over one socket in an asyncio loop"""
+    
+    payload = b'subnet_scanner\x00\x00'
+    
+    def __init__(self, timeout=1.0, count=1, rate=10000, on_alive=None, on_progress=None):
+        """
+        Initialize sweeper
+        
+        Args:
+            timeout (float): Seconds to wait for each reply before retrying or giving up
+            count (int): Maximum echo requests per host (unanswered hosts are retried)
+            rate (int): Requests sent per second
+            on_alive (callable): Called with (ip, rtt) for every new live host
+            on_progress (callable): Called with the number of requests sent so far
+        """
+        self.timeout = timeout
+        self.count = count
+        self.rate = max(1, rate)
+        self.on_alive = on_alive
+        self.on_progress = on_progress
+        self.identifier = os.getpid() & 0xFFFF
+        self.sequence = 0
+        self.pending = {}
+        self.in_flight = collections.deque()
+        self.alive_count = 0
+    
+    def open_socket(self, family=socket.AF_INET):
+        """
+        Open an unprivileged ping socket (SOCK_DGRAM), falling back to SOCK_RAW.
+        
+        Raises:
+            PermissionError: If neither socket type is permitted
+        """
+        proto = socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+        errors = []
+        for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+            try:
+                sock = socket.socket(family, sock_type, proto)
+            except OSError as e:
+                errors.append(f"{sock_type.name}: {e.strerror or e}")
+                continue
+            sock.setblocking(False)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+            except OSError:
+                pass
+            return sock
+        raise PermissionError(f"ICMP sockets not permitted ({'; '.join(errors)})")
+    
+    def sweep(self, hosts, sock=None):
+        """
+        Sweep hosts and return the number that answered
+        
+        Live hosts are only reported through on_alive, and hosts are pulled
+        lazily from the iterable, so memory is bounded by the requests in
+        flight (about rate * timeout) rather than by the number of hosts.
+        
+        Args:
+            hosts (iterable): ipaddress objects of a single address family
+            sock (socket.socket): Socket from open_socket (opened here if None)
+        """
+        hosts = iter(hosts)
+        first = next(hosts, None)
+        if first is None:
+            return 0
+        if sock is None:
+            family = socket.AF_INET6 if first.version == 6 else socket.AF_INET
+            sock = self.open_socket(family)
+        try:
+            return asyncio.run(self._sweep(sock, itertools.chain([first], hosts)))
+        finally:
+            sock.close()
+    
+    async def _sweep(self, sock, hosts):
+        """Send paced echo requests, retrying expired ones, until all are answered or expired"""
+        loop = asyncio.get_running_loop()
+        self.pending = {}
+        self.in_flight = collections.deque()
+        self.alive_count = 0
+        retries = collections.deque()
+        exhausted = False
+        started = 0
+        sent = 0
+        batch = max(1, self.rate // 100)
+        start = loop.time()
+        
+        loop.add_reader(sock.fileno(), self._on_readable, sock)
+        try:
+            while not stop_scan:
+                self._expire(retries)
+                
+                if retries:
+                    ip, attempt = retries.popleft()
+                elif not exhausted:
+                    ip = next(hosts, None)
+                    if ip is None:
+                        exhausted = True
+                        continue
+                    ip, attempt = str(ip), 1
+                    started += 1
+                elif self.pending:
+                    # Everything is sent; wait for the last replies or timeouts
+                    await asyncio.sleep(0.01)
+                    continue
+                else:
+                    break
+                
+                await self._send_echo(sock, ip, attempt)
+                sent += 1
+                
+                if sent % batch == 0:
+                    if self.on_progress:
+                        self.on_progress(started)
+                    # Sleep until this batch is due; always yields so replies get read
+                    await asyncio.sleep(max(0.0, start + sent / self.rate - loop.time()))
+        finally:
+            loop.remove_reader(sock.fileno())
+        
+        if self.on_progress:
+            self.on_progress(started)
+        return self.alive_count
+    
+    def _expire(self, retries):
+        """Drop requests older than the timeout, queueing a retry while attempts remain"""
+        deadline = time.monotonic() - self.timeout
+        while self.in_flight and self.in_flight[0][2] <= deadline:
+            ip, sequence, _, attempt = self.in_flight.popleft()
+            entry = self.pending.get(ip)
+            if entry is None or entry[0] != sequence:
+                continue  # Already answered
+            del self.pending[ip]
+            if attempt < self.count:
+                retries.append((ip, attempt + 1))
+    
+    def build_echo(self, sock):
+        """Build the next echo request packet for this socket; returns (sequence, packet)"""
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        is_v6 = sock.family == socket.AF_INET6
+        icmp_type = ICMPV6_ECHO_REQUEST if is_v6 else ICMP_ECHO_REQUEST
+        header = struct.pack('!BBHHH', icmp_type, 0, 0, self.identifier, self.sequence)
+        checksum = 0 if is_v6 else icmp_checksum(header + self.payload)  # kernel fills ICMPv6
+        packet = struct.pack('!BBHHH', icmp_type, 0, checksum, self.identifier, self.sequence) + self.payload
+        return self.sequence, packet
+    
+    def read_replies(self, sock):
+        """Drain the socket and yield (ip, sequence) for every echo reply addressed to us"""
+        is_v6 = sock.family == socket.AF_INET6
+        reply_type = ICMPV6_ECHO_REPLY if is_v6 else ICMP_ECHO_REPLY
+        
+        while True:
+            try:
+                data, addr = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            
+            # Raw IPv4 sockets deliver the IP header as well
+            if sock.type == socket.SOCK_RAW and not is_v6:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            
+            icmp_type, _, _, identifier, sequence = struct.unpack('!BBHHH', data[:8])
+            if icmp_type != reply_type:
+                continue
+            # Ping sockets rewrite the identifier and filter replies in the kernel
+            if sock.type == socket.SOCK_RAW and identifier != self.identifier:
+                continue
+            
+            yield addr[0].split('%')[0], sequence
+    
+    async def _send_echo(self, sock, ip, attempt=1):
+        """Build and send a single echo request"""
+        sequence, packet = self.build_echo(sock)
+        sent_at = time.monotonic()
+        self.pending[ip] = (sequence, sent_at)
+        self.in_flight.append((ip, sequence, sent_at, attempt))
+        while True:
+            try:
+                sock.sendto(packet, (ip, 0))
+                return
+            except BlockingIOError:
+                # Send buffer is full; let the reader drain and retry
+                await asyncio.sleep(0.001)
+            except OSError:
+                # Unreachable or filtered locally; the host simply never answers
+                self.pending.pop(ip, None)
+                return
+    
+    def _on_readable(self, sock):
+        """Match echo replies against pending requests by source and sequence"""
+        for ip, sequence in self.read_replies(sock):
+            entry = self.pending.get(ip)
+            if entry is None or entry[0] != sequence:
+                continue
+            del self.pending[ip]
+            rtt = time.monotonic() - entry[1]
+            self.alive_count += 1
+            if self.on_alive:
+                self.on_alive(ip, rtt)
+
+
+# Default ports for TCP discovery (nmap's -PS default set plus common services)
+TCP_DISCOVERY_PORTS = [80, 443, 22, 445, 3389]
+
+NEIGHBOUR_COMMAND = ['ip', '-4', 'neigh', 'show']
+
+
+def parse_neighbour_table(text):
+    """
+    Parse `ip -4 neigh show` into {ip: mac} for REACHABLE entries.
+    
+    STALE, DELAY and PROBE entries are only cached from an earlier
+    exchange, and FAILED/INCOMPLETE ones never resolved, so none of them
+    prove the host is up now.
+    """
+    entries = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 5 or fields[-1] != 'REACHABLE' or 'lladdr' not in fields:
+            continue
+        entries[fields[0]] = fields[fields.index('lladdr') + 1]
+    return entries
+
+
+class RTTEstimator:
+    """
+    Adaptive probe timeout from measured round-trip times.
+    
+    Uses the smoothed RTT / RTT variance estimator from RFC 6298 (as nmap
+    does): timeout = srtt + 4 * rttvar, clamped to [min_timeout, max_timeout].
+    Until the first answer the initial timeout is used. A probe that times
+    out is retried with a doubled timeout (RFC 6298 section 5.5).
+    """
+    
+    def __init__(self, initial_timeout=1.0, min_timeout=0.1, max_timeout=10.0):
+        """Initialize with timeouts in seconds"""
+        self.initial_timeout = initial_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max(max_timeout, min_timeout)
+        self.srtt = None
+        self.rttvar = None
+    
+    def update(self, rtt):
+        """Feed one measured round-trip time"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+    
+    def timeout(self):
+        """Current probe timeout in seconds"""
+        if self.srtt is None:
+            return self.initial_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+    
+    def backoff(self, timeout):
+        """Timeout for the retry after a probe with `timeout` went unanswered"""
+        return min(self.max_timeout, timeout * 2)
+
+
+class DiscoveryProbe(ABC):
+    """Base class for host discovery probes"""
+    
+    name = 'probe'
+    
+    @classmethod
+    def build(cls, network, ports):
+        """Create the probe for a network (raise OSError if it can't be used)"""
+        return cls()
+    
+    async def start(self):
+        """Set up sockets or background tasks inside the event loop"""
+        pass
+    
+    async def stop(self):
+        """Release resources"""
+        pass
+    
+    @abstractmethod
+    async def probe(self, ip, timeout):
+        """Return the RTT in seconds if the host answered, otherwise None"""
+
+
+class ICMPProbe(DiscoveryProbe):
+    """ICMP echo over one shared socket"""
+    
+    name = 'icmp'
+    
+    def __init__(self, family=socket.AF_INET):
+        """Open the ICMP socket (raises PermissionError if not permitted)"""
+        self.sweeper = ICMPSweeper()
+        self.sock = self.sweeper.open_socket(family)
+        self.waiters = {}
+    
+    @classmethod
+    def build(cls, network, ports):
+        return cls(socket.AF_INET6 if network.version == 6 else socket.AF_INET)
+    
+    async def start(self):
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), self._on_readable)
+    
+    async def stop(self):
+        asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        self.sock.close()
+    
+    async def probe(self, ip, timeout):
+        loop = asyncio.get_running_loop()
+        sequence, packet = self.sweeper.build_echo(self.sock)
+        future = loop.create_future()
+        self.waiters[ip] = (sequence, future)
+        sent_at = time.monotonic()
+        try:
+            self.sock.sendto(packet, (ip, 0))
+            await asyncio.wait_for(future, timeout)
+            return time.monotonic() - sent_at
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            if self.waiters.get(ip, (None, None))[1] is future:
+                del self.waiters[ip]
+    
+    def _on_readable(self):
+        for ip, sequence in self.sweeper.read_replies(self.sock):
+            entry = self.waiters.get(ip)
+            if entry and entry[0] == sequence and not entry[1].done():
+                entry[1].set_result(True)
+
+
+class TCPProbe(DiscoveryProbe):
+    """
+    TCP connect to a list of ports; an accepted connection or a RST both
+    prove the host is up. (A raw SYN probe needs root; connect() does not.)
+    """
+    
+    name = 'tcp'
+    
+    def __init__(self, ports=None):
+        """Initialize with the ports to try"""
+        self.ports = list(ports or TCP_DISCOVERY_PORTS)
+    
+    @classmethod
+    def build(cls, network, ports):
+        return cls(ports)
+    
+    async def probe(self, ip, timeout):
+        sent_at = time.monotonic()
+        tasks = [asyncio.ensure_future(self._connect(ip, port, timeout)) for port in self.ports]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                if await next_done:
+                    return time.monotonic() - sent_at
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None
+    
+    async def _connect(self, ip, port, timeout):
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        except ConnectionRefusedError:
+            return True  # RST: host is up, port is closed
+        except (asyncio.TimeoutError, OSError):
+            return False
+        writer.close()
+        return True
+
+
+class ARPProbe(DiscoveryProbe):
+    """
+    ARP resolution on the local L2 segment, via the kernel neighbour table.
+    
+    A datagram to an on-link address makes the kernel send an ARP request;
+    the host is up once its neighbour entry turns REACHABLE, even if it
+    drops all IP traffic. Entries cached from earlier traffic (STALE) are
+    not trusted. Needs no privileges. Off-link targets never resolve, so
+    the probe simply times out for them.
+    """
+    
+    name = 'arp'
+    
+    def __init__(self, poll_interval=0.05):
+        """Initialize (raises OSError if neighbour states can't be read)"""
+        if shutil.which(NEIGHBOUR_COMMAND[0]) is None:
+            raise OSError("the ip command (iproute2) is needed to read neighbour states")
+        self.poll_interval = poll_interval
+        self.waiters = {}
+        self.sock = None
+        self.poller = None
+    
+    @classmethod
+    def build(cls, network, ports):
+        if network.version != 4:
+            raise OSError("ARP only applies to IPv4 networks")
+        return cls()
+    
+    async def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.poller = asyncio.ensure_future(self._poll())
+    
+    async def stop(self):
+        self.poller.cancel()
+        self.sock.close()
+    
+    async def probe(self, ip, timeout):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        sent_at = time.monotonic()
+        self.waiters.setdefault(ip, []).append(future)
+        try:
+            # UDP discard port: the payload doesn't matter, the ARP request does
+            self.sock.sendto(b'', (ip, 9))
+            await asyncio.wait_for(future, timeout)
+            return time.monotonic() - sent_at
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            futures = self.waiters.get(ip, [])
+            if future in futures:
+                futures.remove(future)
+            if not futures:
+                self.waiters.pop(ip, None)
+    
+    async def _poll(self):
+        """One shared reader of the neighbour table for all waiting probes"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.waiters:
+                continue
+            process = await asyncio.create_subprocess_exec(
+                *NEIGHBOUR_COMMAND, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            output, _ = await process.communicate()
+            table = parse_neighbour_table(output.decode(errors='ignore'))
+            for ip in [ip for ip in self.waiters if ip in table]:
+                for future in self.waiters.get(ip, []):
+                    if not future.done():
+                        future.set_result(True)
+
+
+DISCOVERY_PROBES = {
+    'icmp': ICMPProbe,
+    'tcp': TCPProbe,
+    'arp': ARPProbe,
+}
+
+
+class HostDiscovery:
+    """Run discovery probes concurrently per host; the first positive answer wins"""
+    
+    def __init__(self, probes, concurrency=256, count=1, estimator=None,
+                 on_alive=None, on_scanned=None):
+        """
+        Initialize discovery
+        
+        Args:
+            probes (list): DiscoveryProbe instances
+            concurrency (int): Hosts probed at the same time
+            count (int): Probe rounds per host before giving up
+            estimator (RTTEstimator): Shared adaptive timeout
+            on_alive (callable): Called with (ip, probe_name, rtt) for live hosts
+            on_scanned (callable): Called after each host is finished
+        """
+        self.probes = probes
+        self.concurrency = max(1, concurrency)
+        self.count = max(1, count)
+        self.estimator = estimator or RTTEstimator()
+        self.on_alive = on_alive
+        self.on_scanned = on_scanned
+        self.alive_count = 0
+    
+    def run(self, hosts):
+        """Probe every host from the iterable; returns the number of live hosts"""
+        return asyncio.run(self._run(iter(hosts)))
+    
+    async def _run(self, hosts):
+        for probe in self.probes:
+            await probe.start()
+        try:
+            # Workers share one lazy host iterator, so memory stays bounded
+            workers = [asyncio.ensure_future(self._worker(hosts)) for _ in range(self.concurrency)]
+            await asyncio.gather(*workers)
+        finally:
+            for probe in self.probes:
+                await probe.stop()
+        return self.alive_count
+    
+    async def _worker(self, hosts):
+        for ip in hosts:
+            if stop_scan:
+                return
+            ip = str(ip)
+            result = await self.discover(ip)
+            if result:
+                self.alive_count += 1
+                if self.on_alive:
+                    self.on_alive(ip, *result)
+            if self.on_scanned:
+                self.on_scanned()
+    
+    async def discover(self, ip):
+        """Return (probe_name, rtt) for the first probe that answers, or None"""
+        timeout = self.estimator.timeout()
+        for attempt in range(self.count):
+            if attempt:
+                timeout = self.estimator.backoff(timeout)
+            tasks = {asyncio.ensure_future(probe.probe(ip, timeout)): probe.name
+                     for probe in self.probes}
+            try:
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        rtt = None if task.exception() else task.result()
+                        if rtt is not None:
+                            self.estimator.update(rtt)
+                            return tasks[task], rtt
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return None
+
+
+class HostSink:
+    """Collect live hosts in memory (default result sink)"""
+    
+    def __init__(self):
+        """Initialize an empty host list"""
+        self.hosts = []
+    
+    def add(self, ip_address):
+        """Record a live host"""
+        self.hosts.append(ip_address)
+    
+    def close(self):
+        """Nothing to release for an in-memory sink"""
+        pass
+
+
+class FileHostSink:
+    """Stream live hosts to a file as soon as they are found"""
+    
+    def __init__(self, output_file):
+        """Open the output file (line buffered)"""
+        self.output_file = output_file
+        self.file = open(output_file, 'w', buffering=1)
+        self.lock = threading.Lock()
+        self.count = 0
+    
+    def add(self, ip_address):
+        """Append a live host to the file"""
+        with self.lock:
+            self.file.write(f"{ip_address}\n")
+            self.count += 1
+    
+    def close(self):
+        """Close the output file"""
+        self.file.close()
+        print(f"Results saved to {self.output_file}")
+
+
 class SubnetScanner:
     """Scan a subnet for live hosts using ping"""
     
-    def __init__(self, subnet, timeout=1.0, count=1, max_threads=50):
-        """Initialize with subnet in CIDR notation"""
+    def __init__(self, subnet, timeout=1.0, count=1, max_threads=50,
+                 engine='auto', rate=10000, sink=None, progress_interval=0.5,
+                 probes=None, ports=None, concurrency=256):
+        """
+        Initialize with subnet in CIDR notation
+        
+        Args:
+            engine (str): 'icmp' (native sweep), 'subprocess' (ping command)
+                or 'auto' (icmp, falling back to subprocess if not permitted)
+            rate (int): Echo requests per second for the icmp engine
+            sink (HostSink): Receives live hosts as they are found
+                (defaults to an in-memory HostSink backing live_hosts)
+            progress_interval (float): Seconds between progress updates
+            probes (list): Discovery probe names from DISCOVERY_PROBES
+                (e.g. ['icmp', 'tcp', 'arp']); when set, hosts are probed with
+                all of them concurrently and timeouts adapt to measured RTT
+            ports (list): Ports for the tcp probe (default: TCP_DISCOVERY_PORTS)
+            concurrency (int): Hosts probed at the same time in discovery mode
+        """
         self.subnet = subnet
         self.timeout = timeout
         self.count = count
         self.max_threads = max_threads
-        self.live_hosts = []
-        self.lock = threading.Lock()
+        self.engine = engine
+        self.engine_used = None
+        self.rate = rate
+        self.sink = sink or HostSink()
+        self.live_hosts = self.sink.hosts if isinstance(self.sink, HostSink) else []
+        self.progress_interval = progress_interval
+        self.probes = probes
+        self.ports = ports
+        self.concurrency = concurrency
+        # One [scanned, found] counter per worker; each is written by its
+        # owner only and summed by the progress reporter without locking
+        self.counters = []
         self.total_hosts = 0
         self.scanned_hosts = 0
+        self.found_hosts = 0
         self.start_time = 0
         
     def ping_host(self, ip_address):
-        """Ping a single host to check if it's online"""
+        """Ping a single host and return True if it's online"""
         if stop_scan:
-            return
+            return False
             
         try:
             # Platform-specific ping command construction
@@ -89,46 +713,152 @@ class SubnetScanner:
             
             # Check if ping was successful (exit code 0)
             if result.returncode == 0:
-                with self.lock:
-                    self.live_hosts.append(str(ip_address))
-                    print(f"✓ {ip_address} is alive")
+                self.sink.add(str(ip_address))
+                print(f"\r✓ {ip_address} is alive")
+                return True
                     
         except (subprocess.SubprocessError, subprocess.TimeoutExpired):
             # Host is not responding
             pass
+        
+        return False
+    
+    def _worker(self, work, counter):
+        """Ping hosts from the bounded work queue until a None sentinel arrives"""
+        while True:
+            ip = work.get()
+            if ip is None:
+                return
+            try:
+                if self.ping_host(ip):
+                    counter[1] += 1
+            except OSError:
+                # e.g. no ping binary available; count the host as down
+                pass
+            counter[0] += 1
+    
+    def _aggregate(self):
+        """Sum the per-worker counters"""
+        counters = list(self.counters)
+        self.scanned_hosts = sum(c[0] for c in counters)
+        self.found_hosts = sum(c[1] for c in counters)
+    
+    def _report_progress(self, done):
+        """Progress reporter thread: aggregate counters and print until done"""
+        while not done.wait(self.progress_interval):
+            self._aggregate()
+            self._print_progress()
+        self._aggregate()
+        self._print_progress()
+    
+    def _print_progress(self):
+        """Print the progress line with an ETA"""
+        progress = self.scanned_hosts / self.total_hosts * 100 if self.total_hosts else 100.0
+        elapsed = time.time() - self.start_time
+        
+        # Calculate ETA
+        if elapsed > 0 and self.scanned_hosts > 0:
+            hosts_per_second = self.scanned_hosts / elapsed
+            remaining_hosts = self.total_hosts - self.scanned_hosts
+            eta_seconds = remaining_hosts / hosts_per_second if hosts_per_second > 0 else 0
             
-        finally:
-            # Update progress counter
-            with self.lock:
-                self.scanned_hosts += 1
-                
-                # Calculate and print progress
-                progress = self.scanned_hosts / self.total_hosts * 100
-                elapsed = time.time() - self.start_time
+            # Format ETA
+            if eta_seconds < 60:
+                eta = f"{int(eta_seconds)} seconds"
+            elif eta_seconds < 3600:
+                eta = f"{int(eta_seconds / 60)} minutes"
+            else:
+                eta = f"{int(eta_seconds / 3600)} hours"
                 
-                # Only print status update every 10 hosts or on completion
-                if self.scanned_hosts % 10 == 0 or self.scanned_hosts == self.total_hosts:
-                    # Calculate ETA
-                    if elapsed > 0 and self.scanned_hosts > 0:
-                        hosts_per_second = self.scanned_hosts / elapsed
-                        remaining_hosts = self.total_hosts - self.scanned_hosts
-                        eta_seconds = remaining_hosts / hosts_per_second if hosts_per_second > 0 else 0
-                        
-                        # Format ETA
-                        if eta_seconds < 60:
-                            eta = f"{int(eta_seconds)} seconds"
-                        elif eta_seconds < 3600:
-                            eta = f"{int(eta_seconds / 60)} minutes"
-                        else:
-                            eta = f"{int(eta_seconds / 3600)} hours"
-                            
-                        # Print progress
-                        sys.stdout.write(f"\rScanning: {self.scanned_hosts}/{self.total_hosts} " 
-                                       f"({progress:.1f}%) - Found: {len(self.live_hosts)} - ETA: {eta}")
-                    else:
-                        sys.stdout.write(f"\rScanning: {self.scanned_hosts}/{self.total_hosts} "
-                                       f"({progress:.1f}%) - Found: {len(self.live_hosts)}")
-                    sys.stdout.flush()
+            # Print progress
+            sys.stdout.write(f"\rScanning: {self.scanned_hosts}/{self.total_hosts} " 
+                           f"({progress:.1f}%) - Found: {self.found_hosts} - ETA: {eta}")
+        else:
+            sys.stdout.write(f"\rScanning: {self.scanned_hosts}/{self.total_hosts} "
+                           f"({progress:.1f}%) - Found: {self.found_hosts}")
+        sys.stdout.flush()
+    
+    def _scan_icmp(self, network, sock):
+        """Sweep the network with the native asyncio ICMP engine"""
+        counter = [0, 0]
+        self.counters = [counter]
+        
+        def on_alive(ip_address, rtt):
+            self.sink.add(ip_address)
+            counter[1] += 1
+            print(f"\r✓ {ip_address} is alive ({rtt * 1000:.1f} ms)")
+        
+        def on_progress(started):
+            counter[0] = started
+        
+        sweeper = ICMPSweeper(
+            timeout=self.timeout,
+            count=self.count,
+            rate=self.rate,
+            on_alive=on_alive,
+            on_progress=on_progress
+        )
+        sweeper.sweep(network.hosts(), sock)
+    
+    def _build_probes(self, network):
+        """Instantiate the requested discovery probes, skipping unusable ones"""
+        probes = []
+        for name in self.probes:
+            probe_class = DISCOVERY_PROBES.get(name)
+            if probe_class is None:
+                print(f"Unknown probe: {name}")
+                continue
+            try:
+                probes.append(probe_class.build(network, self.ports))
+            except OSError as e:
+                print(f"Skipping {name} probe: {e}")
+        return probes
+    
+    def _scan_discovery(self, network, probes):
+        """Probe hosts with several discovery methods at once"""
+        counter = [0, 0]
+        self.counters = [counter]
+        
+        def on_alive(ip_address, probe_name, rtt):
+            self.sink.add(ip_address)
+            counter[1] += 1
+            print(f"\r✓ {ip_address} is alive ({probe_name}, {rtt * 1000:.1f} ms)")
+        
+        def on_scanned():
+            counter[0] += 1
+        
+        discovery = HostDiscovery(
+            probes,
+            concurrency=self.concurrency,
+            count=self.count,
+            estimator=RTTEstimator(initial_timeout=self.timeout),
+            on_alive=on_alive,
+            on_scanned=on_scanned
+        )
+        discovery.run(network.hosts())
+    
+    def _scan_subprocess(self, network):
+        """Scan the network with ping subprocesses and bounded in-flight work"""
+        num_threads = max(1, min(self.max_threads, self.total_hosts))
+        work = queue.Queue(maxsize=num_threads * 2)
+        self.counters = [[0, 0] for _ in range(num_threads)]
+        workers = [
+            threading.Thread(target=self._worker, args=(work, counter), daemon=True)
+            for counter in self.counters
+        ]
+        for worker in workers:
+            worker.start()
+        
+        # The producer blocks when the queue is full, so hosts are generated
+        # lazily no matter how large the network is
+        for ip in network.hosts():
+            if stop_scan:
+                break
+            work.put(ip)
+        for _ in workers:
+            work.put(None)
+        for worker in workers:
+            worker.join()
     
     def scan(self):
         """Scan the subnet for live hosts"""
@@ -144,21 +874,54 @@ class SubnetScanner:
             print(f"Starting scan of {self.subnet} ({self.total_hosts} hosts)")
             print(f"Using timeout of {self.timeout}s and {self.count} ping(s) per host")
             
+            # Multi-probe discovery replaces the ping engines when probes are given
+            probes = []
+            if self.probes:
+                probes = self._build_probes(network)
+                if not probes:
+                    print("Error: none of the requested probes can be used")
+                    return []
+            
+            # Prefer the native ICMP engine; fall back if sockets are not permitted
+            sock = None
+            if not probes and self.engine in ('auto', 'icmp'):
+                family = socket.AF_INET6 if network.version == 6 else socket.AF_INET
+                try:
+                    sock = ICMPSweeper().open_socket(family)
+                except PermissionError as e:
+                    if self.engine == 'icmp':
+                        print(f"Error: {e}")
+                        return []
+                    print(f"{e}; falling back to ping subprocesses")
+            
             self.start_time = time.time()
+            self.counters = []
+            done = threading.Event()
+            reporter = threading.Thread(target=self._report_progress, args=(done,), daemon=True)
+            reporter.start()
+            
+            try:
+                if probes:
+                    self.engine_used = 'discovery'
+                    print(f"Using probes: {', '.join(p.name for p in probes)} (adaptive timeouts)")
+                    self._scan_discovery(network, probes)
+                elif sock:
+                    self.engine_used = 'icmp'
+                    print(f"Using native ICMP engine at {self.rate} packets/s")
+                    self._scan_icmp(network, sock)
+                else:
+                    self.engine_used = 'subprocess'
+                    self._scan_subprocess(network)
+            finally:
+                done.set()
+                reporter.join()
             
-            # Create thread pool
-            num_threads = min(self.max_threads, self.total_hosts)
-            with ThreadPoolExecutor(max_workers=num_threads) as executor:
-                # Submit ping tasks
-                for ip in network.hosts():
-                    if stop_scan:
-                        break
-                    executor.submit(self.ping_host, ip)
+            self.live_hosts.sort(key=ipaddress.ip_address)
                     
             # Print final results
             elapsed = time.time() - self.start_time
             print(f"\n\nScan completed in {elapsed:.2f} seconds")
-            print(f"Found {len(self.live_hosts)} live hosts in {self.subnet}")
+            print(f"Found {self.found_hosts} live hosts in {self.subnet}")
             
             return self.live_hosts
             
@@ -166,17 +929,9 @@ class SubnetScanner:
             print(f"Error: {e}")
             print("Please provide a valid subnet in CIDR notation (e.g., 192.168.1.0/24)")
             return []
-
-
-def save_results(hosts, output_file):
-    """Save results to a file"""
-    try:
-        with open(output_file, 'w') as f:
-            for host in hosts:
-                f.write(f"{host}\n")
-        print(f"Results saved to {output_file}")
-    except Exception as e:
-        print(f"Error saving results: {e}")
+        finally:
+            # Also on errors, so a streaming sink never leaves its file open
+            self.sink.close()
 
 
 def parse_arguments():
@@ -189,6 +944,17 @@ def parse_arguments():
                       help="Number of ping packets to send (default: 1)")
     parser.add_argument("--threads", type=int, default=50, 
                       help="Maximum number of threads (default: 50)")
+    parser.add_argument("--engine", choices=['auto', 'icmp', 'subprocess'], default='auto',
+                      help="Sweep engine (default: auto = icmp with subprocess fallback)")
+    parser.add_argument("--rate", type=int, default=10000,
+                      help="ICMP echo requests per second for the icmp engine (default: 10000)")
+    parser.add_argument("--probes", type=lambda v: v.split(','),
+                      help="Comma-separated discovery probes: icmp,tcp,arp "
+                           "(host is up on the first positive answer; timeouts adapt to RTT)")
+    parser.add_argument("--ports", type=lambda v: [int(p) for p in v.split(',')],
+                      help=f"Ports for the tcp probe (default: {','.join(map(str, TCP_DISCOVERY_PORTS))})")
+    parser.add_argument("--concurrency", type=int, default=256,
+                      help="Hosts probed at once with --probes (default: 256)")
     parser.add_argument("--output", type=str, 
                       help="Output file to save results")
     return parser.parse_args()
@@ -198,12 +964,19 @@ if __name__ == "__main__":
     # Parse arguments
     args = parse_arguments()
     
-    # Create and run scanner
+    # Create and run scanner; with --output, hosts are streamed to the file
+    sink = FileHostSink(args.output) if args.output else None
     scanner = SubnetScanner(
         subnet=args.subnet, 
         timeout=args.timeout,
         count=args.count,
-        max_threads=args.threads
+        max_threads=args.threads,
+        engine=args.engine,
+        rate=args.rate,
+        sink=sink,
+        probes=args.probes,
+        ports=args.ports,
+        concurrency=args.concurrency
     )
     
     # Run scan
@@ -214,9 +987,5 @@ if __name__ == "__main__":
         print("\nLive hosts:")
         for host in live_hosts:
             print(f"  {host}")
-            
-        # Save results if output file specified
-        if args.output:
-            save_results(live_hosts, args.output)
-    else:
+    elif not scanner.found_hosts:
         print("No live hosts found.")
@@ -19,6 +19,7 @@ Features:
 - Detects activity spikes and anomalies
 - Generates HTML reports with interactive charts
 - Groups logs by severity and type over time
+- Reads gzip/zstd-compressed rotated log segments transparently
 """
 
 import re
@@ -32,6 +33,7 @@ import math
 from datetime import timedelta
 import matplotlib.pyplot as plt
 from matplotlib.dates import DateFormatter
+from log_reader import open_log
 
 
 class TimeBasedLogVisualizer:
@@ -81,7 +83,7 @@ class TimeBasedLogVisualizer:
         
         try:
             # Read the file
-            with open(file_path, 'r', errors='ignore') as f:
+            with open_log(file_path) as f:
                 lines = f.readlines()
                 
             if not lines: